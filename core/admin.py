@@ -1,6 +1,17 @@
-from django.contrib import admin
+import os
+
+from django.contrib import admin, messages
 from django.contrib.auth.admin import UserAdmin
-from .models import Participante, Evento, Atividade, Inscricao
+from django.core.exceptions import PermissionDenied
+from django.http import FileResponse, Http404
+from django.shortcuts import get_object_or_404, redirect
+from django.urls import path, reverse
+from django.utils import timezone
+from django.utils.html import format_html
+from safedelete.admin import SafeDeleteAdmin, SafeDeleteAdminFilter, highlight_deleted
+from .models import Participante, Evento, Atividade, Inscricao, TarefaLote, EventoArquivado, AtividadeArquivada, EmailPendente
+from .tarefas import criar_tarefa_lote, agendar, executar_tarefa_lote, caminho_exportacao
+from .caixa_saida import drenar_caixa_saida
 
 @admin.register(Participante)
 class ParticipanteAdmin(UserAdmin):
@@ -9,14 +20,20 @@ class ParticipanteAdmin(UserAdmin):
     )
     list_display = ('username', 'email', 'tipo', 'celular')
     list_filter = ('tipo', 'is_staff')
+    search_fields = ('username_normalizado',) # Exibe a busca; a consulta é feita por get_search_results
+    search_help_text = 'Início do usuário ou email, início ou final do celular, ou o tipo.'
+
+    def get_search_results(self, request, queryset, search_term): # Mesma busca indexada da API
+        return queryset.buscar(search_term), False
 
 class AtividadeInline(admin.TabularInline):
     model = Atividade
     extra = 1
 
 @admin.register(Evento)
-class EventoAdmin(admin.ModelAdmin):
-    list_display = ('nome', 'data_inicio', 'local')
+class EventoAdmin(SafeDeleteAdmin): # Lista também os excluídos (soft delete), com ação de restaurar
+    list_display = (highlight_deleted, 'data_inicio', 'local') + SafeDeleteAdmin.list_display
+    list_filter = (SafeDeleteAdminFilter,) + SafeDeleteAdmin.list_filter
     search_fields = ('nome',)
     inlines = [AtividadeInline] # Permite criar atividades dentro da tela de Evento
 
@@ -27,10 +44,108 @@ class AtividadeAdmin(admin.ModelAdmin):
 
 @admin.register(Inscricao)
 class InscricaoAdmin(admin.ModelAdmin):
-    list_display = ('participante', 'evento', 'data_inscricao', 'status')
+    list_display = ('participante', 'evento', 'data_inscricao', 'status', 'data_checkin')
     list_filter = ('status', 'evento')
-    actions = ['confirmar_inscricao']
+    actions = ['confirmar_inscricao', 'cancelar_inscricao', 'exportar_csv']
+
+    def _iniciar_tarefa(self, request, acao, queryset): # Executa em segundo plano e abre a página de progresso
+        tarefa = criar_tarefa_lote(acao, queryset, usuario=request.user)
+        self.message_user(request, f"{tarefa.total} inscrições enviadas para processamento em segundo plano.")
+        return redirect(reverse('admin:core_tarefalote_change', args=[tarefa.pk]))
 
     def confirmar_inscricao(self, request, queryset):
-        queryset.update(status='confirmado')
-    confirmar_inscricao.short_description = "Confirmar inscrições selecionadas"
\ No newline at end of file
+        return self._iniciar_tarefa(request, 'confirmar', queryset)
+    confirmar_inscricao.short_description = "Confirmar inscrições selecionadas"
+
+    def cancelar_inscricao(self, request, queryset):
+        return self._iniciar_tarefa(request, 'cancelar', queryset)
+    cancelar_inscricao.short_description = "Cancelar inscrições selecionadas"
+
+    def exportar_csv(self, request, queryset):
+        return self._iniciar_tarefa(request, 'exportar_csv', queryset)
+    exportar_csv.short_description = "Exportar inscrições selecionadas (CSV)"
+
+@admin.register(TarefaLote)
+class TarefaLoteAdmin(admin.ModelAdmin): # Página de progresso das ações em lote
+    list_display = ('id', 'acao', 'status', 'progresso_barra', 'criado_por', 'criada_em')
+    list_filter = ('acao', 'status')
+    readonly_fields = ('acao', 'status', 'progresso_barra', 'total', 'processados', 'link_arquivo', 'erro', 'criado_por', 'criada_em', 'atualizada_em')
+    exclude = ('ids', 'arquivo', 'tamanho_arquivo')
+    actions = ['retomar_tarefa']
+    change_form_template = 'admin/core/tarefalote/change_form.html'
+
+    def has_add_permission(self, request):
+        return False
+
+    def progresso_barra(self, obj):
+        return format_html(
+            '<progress value="{}" max="100"></progress> {}% ({} de {})',
+            obj.progresso, obj.progresso, obj.processados, obj.total
+        )
+    progresso_barra.short_description = "Progresso"
+
+    def get_urls(self):
+        return [
+            path('<int:pk>/csv/', self.admin_site.admin_view(self.baixar_csv), name='core_tarefalote_csv'),
+        ] + super().get_urls()
+
+    def baixar_csv(self, request, pk): # Único caminho até o CSV (fora do MEDIA_ROOT): staff com permissão de ver a tarefa
+        tarefa = get_object_or_404(TarefaLote, pk=pk, acao='exportar_csv', status='concluida')
+        if not self.has_view_permission(request, tarefa):
+            raise PermissionDenied
+        nome, caminho = caminho_exportacao(tarefa)
+        if not os.path.exists(caminho):
+            raise Http404
+        return FileResponse(open(caminho, 'rb'), as_attachment=True, filename=nome, content_type='text/csv')
+
+    def link_arquivo(self, obj):
+        if obj.arquivo and obj.status == 'concluida':
+            return format_html('<a href="{}">Baixar CSV</a>', reverse('admin:core_tarefalote_csv', args=[obj.pk]))
+        return '-'
+    link_arquivo.short_description = "Arquivo"
+
+    def retomar_tarefa(self, request, queryset): # Retoma tarefas interrompidas a partir do cursor salvo
+        em_execucao = queryset.filter(status='executando').count()
+        tarefas = queryset.exclude(status__in=['concluida', 'executando']) # Rodando: retomar duplicaria o trabalho
+        for tarefa in tarefas:
+            agendar(executar_tarefa_lote, tarefa.pk)
+        self.message_user(request, f"{tarefas.count()} tarefas reagendadas.")
+        if em_execucao:
+            self.message_user(
+                request, f"{em_execucao} tarefas em execução ignoradas (após um reinício, use 'python manage.py retomar_tarefas').",
+                level=messages.WARNING,
+            )
+    retomar_tarefa.short_description = "Retomar tarefas selecionadas"
+
+class AtividadeArquivadaInline(admin.TabularInline):
+    model = AtividadeArquivada
+    extra = 0
+    can_delete = False
+    readonly_fields = ('titulo', 'tipo', 'horario_inicio', 'horario_fim', 'responsavel')
+    exclude = ('descricao',)
+
+@admin.register(EventoArquivado)
+class EventoArquivadoAdmin(admin.ModelAdmin): # Arquivo morto: somente leitura
+    list_display = ('nome', 'data_inicio', 'local', 'arquivado_em')
+    search_fields = ('nome',)
+    inlines = [AtividadeArquivadaInline]
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+@admin.register(EmailPendente)
+class EmailPendenteAdmin(admin.ModelAdmin): # Caixa de saída: acompanhamento e reenvio
+    list_display = ('assunto', 'destinatario', 'status', 'tentativas', 'proxima_tentativa', 'enviado_em')
+    list_filter = ('status',)
+    search_fields = ('destinatario', 'assunto')
+    readonly_fields = ('status', 'tentativas', 'proxima_tentativa', 'lote', 'erro', 'criado_em', 'enviado_em')
+    actions = ['reenviar']
+
+    def reenviar(self, request, queryset):
+        quantidade = queryset.exclude(status='enviado').update(status='pendente', tentativas=0, proxima_tentativa=timezone.now(), erro='')
+        agendar(drenar_caixa_saida)
+        self.message_user(request, f"{quantidade} emails reenviados para a fila.")
+    reenviar.short_description = "Reenviar emails selecionados"
@@ -0,0 +1,91 @@
+import hashlib
+import heapq
+
+from django.core.cache import cache
+from django.db.models import Prefetch
+
+from .models import Atividade, Inscricao
+from .serializers import AgendaEventoSerializer
+from .cache_eventos import eventos_do_participante, versoes_eventos, versao_participante
+from .routers import no_primario
+
+TIMEOUT_AGENDA = 60 * 15
+
+
+def detectar_conflitos(intervalos):
+    """
+    Varredura (sweep line) sobre intervalos ordenados pelo início.
+
+    'intervalos' é uma lista de (inicio, fim, grupo, item). Mantém um heap dos
+    intervalos ainda abertos (ordenado pelo fim); cada novo intervalo descarta os
+    que já terminaram e conflita com todos os que restam de outro grupo.
+    Complexidade O(n log n + k), sendo k o número de conflitos.
+    """
+    conflitos = []
+    abertos = [] # heap de (fim, ordem, grupo, item)
+    for ordem, (inicio, fim, grupo, item) in enumerate(sorted(intervalos, key=lambda intervalo: intervalo[0])):
+        while abertos and abertos[0][0] <= inicio:
+            heapq.heappop(abertos)
+        for _, _, grupo_aberto, item_aberto in abertos:
+            if grupo_aberto != grupo:
+                conflitos.append((item_aberto, item))
+        heapq.heappush(abertos, (fim, ordem, grupo, item))
+    return conflitos
+
+
+def _item(tipo, objeto, evento):
+    return {'tipo': tipo, 'id': objeto.pk, 'evento': evento.pk, 'titulo': getattr(objeto, 'titulo', evento.nome)}
+
+
+def montar_agenda(participante_id, inicio=None, fim=None):
+    """
+    Agenda do participante: eventos inscritos (não cancelados) com suas atividades,
+    em ordem cronológica, mais a lista de conflitos entre eventos diferentes.
+
+    Sempre duas consultas: eventos (com o status da inscrição) e atividades (com responsável).
+    """
+    atividades = Atividade.objects.select_related('responsavel').order_by('horario_inicio')
+    inscricoes = Inscricao.objects.filter(participante_id=participante_id, evento__deleted__isnull=True).exclude(status='cancelado')
+    if inicio:
+        inscricoes = inscricoes.filter(evento__data_fim__gte=inicio)
+        atividades = atividades.filter(horario_fim__gte=inicio)
+    if fim:
+        inscricoes = inscricoes.filter(evento__data_inicio__lte=fim)
+        atividades = atividades.filter(horario_inicio__lte=fim)
+    inscricoes = inscricoes.select_related('evento').prefetch_related(
+        Prefetch('evento__atividades', queryset=atividades, to_attr='atividades_agenda')
+    ).order_by('evento__data_inicio')
+    eventos = []
+    for inscricao in inscricoes:
+        inscricao.evento.status_inscricao = inscricao.status
+        eventos.append(inscricao.evento)
+
+    intervalos_eventos, intervalos_atividades = [], []
+    for evento in eventos:
+        intervalos_eventos.append((evento.data_inicio, evento.data_fim, evento.pk, _item('evento', evento, evento)))
+        for atividade in evento.atividades_agenda:
+            intervalos_atividades.append((atividade.horario_inicio, atividade.horario_fim, evento.pk, _item('atividade', atividade, evento)))
+    conflitos = detectar_conflitos(intervalos_eventos) + detectar_conflitos(intervalos_atividades)
+
+    return {
+        'eventos': AgendaEventoSerializer(eventos, many=True).data,
+        'conflitos': [{'primeiro': primeiro, 'segundo': segundo} for primeiro, segundo in conflitos],
+    }
+
+
+def agenda_em_cache(participante_id, inicio=None, fim=None):
+    """
+    Agenda em cache por participante. A chave combina a versão das inscrições do
+    participante com a versão de cada evento inscrito: mudar inscrições, eventos ou
+    atividades gera outra chave, e um acerto não consulta o banco.
+    """
+    eventos_ids = eventos_do_participante(participante_id)
+    versoes = versoes_eventos(eventos_ids)
+    assinatura = repr((versao_participante(participante_id), sorted(versoes.items()), str(inicio), str(fim)))
+    chave = f'agenda:{participante_id}:' + hashlib.md5(assinatura.encode(), usedforsecurity=False).hexdigest()
+    agenda = cache.get(chave)
+    if agenda is None:
+        with no_primario():
+            agenda = montar_agenda(participante_id, inicio, fim)
+        cache.set(chave, agenda, TIMEOUT_AGENDA)
+    return agenda
@@ -1,5 +1,11 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
 
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        from . import signals  # noqa: F401 - registra os receivers de invalidação de cache
+        from .db import configurar_sqlite
+        connection_created.connect(configurar_sqlite, dispatch_uid='core.configurar_sqlite')
@@ -0,0 +1,77 @@
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import router, transaction
+from django.utils import timezone
+from safedelete import HARD_DELETE
+
+from .cache_eventos import invalidar_participantes
+from .models import Evento, Atividade, Inscricao, EventoArquivado, AtividadeArquivada, InscricaoArquivada
+
+logger = logging.getLogger(__name__)
+
+# Arquivamento de eventos encerrados: o evento, suas atividades e inscrições saem
+# das tabelas consultadas por listagens, buscas e dashboards e vão para as tabelas
+# *Arquivado/*Arquivada, preservando os IDs. Cada lote roda em sua própria transação.
+
+CAMPOS_ATIVIDADE = ('id', 'evento_id', 'responsavel_id', 'titulo', 'descricao', 'horario_inicio', 'horario_fim', 'tipo')
+CAMPOS_INSCRICAO = ('id', 'evento_id', 'participante_id', 'data_inscricao', 'status', 'data_checkin')
+
+
+def limite_arquivamento(retencao_dias=None):
+    """Eventos que terminaram antes deste momento podem ser arquivados."""
+    if retencao_dias is None:
+        retencao_dias = getattr(settings, 'ARQUIVAMENTO_RETENCAO_DIAS', 365)
+    return timezone.now() - timedelta(days=retencao_dias)
+
+
+def eventos_para_arquivar(retencao_dias=None):
+    """IDs (inclusive de eventos excluídos) elegíveis para o arquivo, em ordem."""
+    limite = limite_arquivamento(retencao_dias)
+    return Evento.all_objects.filter(data_fim__lt=limite).order_by('pk').values_list('pk', flat=True)
+
+
+def arquivar_lote(ids):
+    """Copia os eventos, atividades e inscrições para o arquivo e os remove das tabelas ativas."""
+    with transaction.atomic():
+        eventos = Evento.all_objects.filter(pk__in=ids)
+        participantes_ids = set(Inscricao.objects.filter(evento_id__in=ids).values_list('participante_id', flat=True))
+        EventoArquivado.objects.bulk_create([
+            EventoArquivado(
+                id=evento.pk, nome=evento.nome, descricao=evento.descricao, banner=evento.banner.name or '',
+                data_inicio=evento.data_inicio, data_fim=evento.data_fim, local=evento.local,
+                excluido_em=evento.deleted,
+            )
+            for evento in eventos
+        ])
+        AtividadeArquivada.objects.bulk_create(
+            (AtividadeArquivada(**valores) for valores in Atividade.objects.filter(evento_id__in=ids).values(*CAMPOS_ATIVIDADE).iterator()),
+            batch_size=500,
+        )
+        InscricaoArquivada.objects.bulk_create(
+            (InscricaoArquivada(**valores) for valores in Inscricao.objects.filter(evento_id__in=ids).values(*CAMPOS_INSCRICAO).iterator()),
+            batch_size=500,
+        )
+        # Atividades e inscrições já copiadas saem com um DELETE direto, sem o Collector carregar
+        # cada linha nem disparar signals por linha (nada as referencia, não há cascata a seguir)
+        banco = router.db_for_write(Evento)
+        Atividade.objects.filter(evento_id__in=ids)._raw_delete(banco)
+        Inscricao.objects.filter(evento_id__in=ids)._raw_delete(banco)
+        # Remoção definitiva dos eventos do lote (signals invalidam os caches e as páginas)
+        eventos.delete(force_policy=HARD_DELETE)
+    invalidar_participantes(participantes_ids) # Agendas e feeds dos inscritos (inscrições removidas sem signals)
+    return len(ids)
+
+
+def arquivar_eventos(retencao_dias=None, tamanho_lote=None):
+    """Arquiva todos os eventos elegíveis, em lotes de ARQUIVAMENTO_TAMANHO_LOTE. Retorna o total."""
+    if tamanho_lote is None:
+        tamanho_lote = getattr(settings, 'ARQUIVAMENTO_TAMANHO_LOTE', 50)
+    total = 0
+    while True:
+        ids = list(eventos_para_arquivar(retencao_dias)[:tamanho_lote])
+        if not ids:
+            return total
+        total += arquivar_lote(ids)
+        logger.info('%d eventos arquivados (lote até o ID %d)', total, ids[-1])
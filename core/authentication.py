@@ -0,0 +1,44 @@
+import secrets
+
+from django.core import signing
+from django.utils.crypto import constant_time_compare
+from rest_framework.authentication import BaseAuthentication
+from rest_framework.exceptions import AuthenticationFailed
+
+from .models import Participante
+
+SALT_CALENDARIO = 'core.calendario'
+
+
+def chave_calendario(participante, renovar=False):
+    """
+    Chave assinada que identifica o participante na URL do feed .ics.
+
+    Carrega o segredo de calendário do participante: renová-lo (renovar=True) invalida
+    todas as URLs distribuídas antes, sem trocar a senha.
+    """
+    if renovar or not participante.chave_calendario:
+        participante.chave_calendario = secrets.token_hex(16)
+        participante.save(update_fields=['chave_calendario'])
+    return signing.dumps([participante.pk, participante.chave_calendario], salt=SALT_CALENDARIO)
+
+
+class ChaveCalendarioAuthentication(BaseAuthentication):
+    """
+    Autentica pela chave assinada em '?chave='.
+
+    Clientes de calendário (Google Agenda, Outlook, iOS) assinam uma URL e não
+    enviam o header Authorization, então o feed pessoal aceita a chave na querystring.
+    """
+    def authenticate(self, request):
+        chave = request.query_params.get('chave')
+        if not chave:
+            return None
+        try:
+            participante_id, segredo = signing.loads(chave, salt=SALT_CALENDARIO)
+        except (signing.BadSignature, TypeError, ValueError): # Inclui chaves do formato antigo (só o ID)
+            raise AuthenticationFailed('Chave de calendário inválida.')
+        participante = Participante.objects.filter(pk=participante_id, is_active=True).first()
+        if participante is None or not participante.chave_calendario or not constant_time_compare(segredo, participante.chave_calendario):
+            raise AuthenticationFailed('Chave de calendário inválida.')
+        return (participante, None)
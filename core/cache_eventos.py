@@ -0,0 +1,209 @@
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.http import HttpResponse
+from django.utils.connection import ConnectionProxy
+
+from .models import Evento, Inscricao
+from .routers import no_primario
+
+# Versões de cache por evento: cada alteração (evento, atividade ou inscrição)
+# incrementa a versão, e toda chave derivada passa a apontar para um valor novo.
+# O valor inicial é um timestamp em ns para que uma versão despejada do cache
+# nunca volte a coincidir com uma versão antiga ainda armazenada.
+#
+# O card do evento e as listagens só mostram campos do próprio evento: têm versões
+# à parte, que inscrições, check-ins e atividades não incrementam.
+#
+# As versões ficam no cache 'compartilhado' (Redis em produção): uma edição atendida
+# por um worker invalida o cache de todos. Os valores derivados ficam no cache local
+# de cada processo, sob chaves que já levam a versão.
+
+cache_versoes = ConnectionProxy(caches, 'compartilhado')
+TIMEOUT_VERSAO = None  # versões não expiram
+CHAVE_VERSAO_LISTA = 'eventos:lista:versao' # Muda quando qualquer evento muda (páginas de listagem/busca)
+
+
+def _chave_versao_evento(evento_id):
+    return f'evento:{evento_id}:versao'
+
+
+def _chave_versao_card(evento_id):
+    return f'evento:{evento_id}:card:versao'
+
+
+def _chave_versao_programacao(evento_id):
+    return f'evento:{evento_id}:programacao:versao'
+
+
+def _versao(chave):
+    versao = cache_versoes.get(chave)
+    if versao is None:
+        cache_versoes.add(chave, time.time_ns(), TIMEOUT_VERSAO)
+        versao = cache_versoes.get(chave)
+    return versao
+
+
+def _incrementar(chave):
+    try:
+        cache_versoes.incr(chave)
+    except ValueError:  # chave ausente no cache
+        cache_versoes.add(chave, time.time_ns(), TIMEOUT_VERSAO)
+
+
+def _versoes(chave_versao, eventos_ids):
+    chaves = {chave_versao(evento_id): evento_id for evento_id in eventos_ids}
+    encontradas = cache_versoes.get_many(chaves)
+    versoes = {chaves[chave]: versao for chave, versao in encontradas.items()}
+    for evento_id in eventos_ids:
+        if evento_id not in versoes:
+            versoes[evento_id] = _versao(chave_versao(evento_id))
+    return versoes
+
+
+def versao_evento(evento_id):
+    """Retorna a versão atual do evento (criando-a se ainda não existir)."""
+    return _versao(_chave_versao_evento(evento_id))
+
+
+def _versao_existente(chave, evento_id):
+    versao = cache_versoes.get(chave)
+    if versao is None and Evento.objects.filter(pk=evento_id).exists():
+        versao = _versao(chave)
+    return versao
+
+
+def versao_evento_existente(evento_id):
+    """
+    Versão do evento sem criar chaves para IDs quaisquer: o banco só é consultado
+    quando a versão não está em cache. Retorna None se o evento não existe.
+    """
+    return _versao_existente(_chave_versao_evento(evento_id), evento_id)
+
+
+def versoes_eventos(eventos_ids):
+    """Versões de vários eventos com um único get_many (agenda e feeds)."""
+    return _versoes(_chave_versao_evento, eventos_ids)
+
+
+def versoes_cards(eventos_ids):
+    """Versões dos cards das listagens (só o próprio evento as altera), com um único get_many."""
+    return _versoes(_chave_versao_card, eventos_ids)
+
+
+def versao_lista_eventos():
+    """Versão global das listagens de eventos."""
+    return _versao(CHAVE_VERSAO_LISTA)
+
+
+def invalidar_evento(evento_id, lista=False):
+    """
+    Incrementa a versão do evento, invalidando todo cache derivado dele. Com 'lista'
+    (o próprio evento mudou), também o card e as páginas de listagem/busca.
+    """
+    _incrementar(_chave_versao_evento(evento_id))
+    if lista:
+        _incrementar(_chave_versao_card(evento_id))
+        _incrementar(CHAVE_VERSAO_LISTA)
+
+
+def invalidar_eventos(eventos_ids):
+    """Invalida vários eventos de uma vez (usado pelas ações em lote)."""
+    for evento_id in set(eventos_ids):
+        invalidar_evento(evento_id)
+
+
+def versao_programacao(evento_id):
+    """Versão da programação do evento: só muda com o evento, suas atividades e palestrantes (não com inscrições)."""
+    return _versao(_chave_versao_programacao(evento_id))
+
+
+def versao_programacao_existente(evento_id):
+    """Como versao_evento_existente, para a programação (feed .ics do evento)."""
+    return _versao_existente(_chave_versao_programacao(evento_id), evento_id)
+
+
+def versoes_programacao(eventos_ids):
+    """Versões da programação de vários eventos com um único get_many (feeds .ics)."""
+    return _versoes(_chave_versao_programacao, eventos_ids)
+
+
+def invalidar_programacao(eventos_ids):
+    """Invalida a programação dos eventos cujas atividades (ou palestrantes) mudaram."""
+    for evento_id in set(eventos_ids):
+        _incrementar(_chave_versao_programacao(evento_id))
+
+
+def versao_participante(participante_id):
+    """Versão das inscrições do participante (feeds e agenda pessoais)."""
+    return _versao(f'participante:{participante_id}:versao')
+
+
+def invalidar_participantes(participantes_ids):
+    """Invalida os caches pessoais dos participantes cujas inscrições mudaram."""
+    for participante_id in set(participantes_ids):
+        _incrementar(f'participante:{participante_id}:versao')
+
+
+def eventos_do_participante(participante_id):
+    """IDs dos eventos com inscrição ativa (não cancelada), em cache pela versão do participante."""
+    chave = f'participante:{participante_id}:eventos:{versao_participante(participante_id)}'
+    eventos_ids = cache.get(chave)
+    if eventos_ids is None:
+        with no_primario():
+            eventos_ids = list(
+                Inscricao.objects.filter(participante_id=participante_id, evento__deleted__isnull=True).exclude(status='cancelado')
+                .order_by('evento__data_inicio').values_list('evento_id', flat=True)
+            )
+        cache.set(chave, eventos_ids, 60 * 60 * 24)
+    return eventos_ids
+
+
+def chave_evento(prefixo, evento_id):
+    """Monta uma chave de cache atrelada à versão atual do evento."""
+    return f'{prefixo}:{evento_id}:{versao_evento(evento_id)}'
+
+
+def etag_confere(request, etag):
+    """Compara o If-None-Match (ignorando o prefixo W/ adicionado pela compressão); '*' confere com qualquer ETag."""
+    enviados = [valor.strip() for valor in request.META.get('HTTP_IF_NONE_MATCH', '').split(',')]
+    return '*' in enviados or any(valor.removeprefix('W/') == etag for valor in enviados)
+
+
+def cache_pagina_anonima(timeout, versao):
+    """
+    Cache de página inteira para visitantes anônimos.
+
+    A chave combina o caminho, a querystring normalizada (filtros, busca e página)
+    e a versão retornada por 'versao(**kwargs)'. Requisições com cookie de sessão
+    são tratadas como possivelmente autenticadas e não usam o cache; a verificação
+    é feita pelo cookie, sem consultar a sessão, para que um acerto não faça queries.
+    A view é renderizada no primário (no_primario): a página e os fragmentos que ela
+    grava ficam atrelados à versão nova.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method != 'GET' or settings.SESSION_COOKIE_NAME in request.COOKIES:
+                with no_primario(): # Fragmentos em cache ({% cache %}) também são gravados por versão
+                    return view(request, *args, **kwargs)
+            querystring = '&'.join(sorted(
+                f'{chave}={valor}' for chave in request.GET for valor in request.GET.getlist(chave)
+            ))
+            digest = hashlib.md5(querystring.encode(), usedforsecurity=False).hexdigest()
+            chave = f'pagina:{request.path}:{digest}:{versao(**kwargs)}'
+            conteudo = cache.get(chave)
+            if conteudo is not None:
+                return HttpResponse(conteudo, content_type='text/html; charset=utf-8')
+            with no_primario():
+                response = view(request, *args, **kwargs)
+                if hasattr(response, 'render') and not response.is_rendered:
+                    response.render()
+            if response.status_code == 200:
+                cache.set(chave, response.content, timeout)
+            return response
+        return wrapper
+    return decorator
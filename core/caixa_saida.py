@@ -0,0 +1,195 @@
+import hashlib
+import logging
+import smtplib
+import time
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+from django.utils.connection import ConnectionProxy
+
+from .models import EmailPendente, Inscricao
+from .tarefas import agendar
+
+logger = logging.getLogger(__name__)
+
+# Caixa de saída: views e comandos só gravam EmailPendente (na mesma transação dos
+# seus dados); o envio acontece no pool de tarefas ou no comando enviar_emails,
+# em lotes, reaproveitando a conexão SMTP, com limite de taxa e novas tentativas.
+# Um único drenador por vez (CHAVE_DRENAGEM, no cache 'compartilhado', valendo para
+# todos os workers e para o comando enviar_emails): vários em paralelo multiplicariam
+# o limite de taxa e ocupariam os workers do pool.
+
+CHAVE_DRENAGEM = 'caixa_saida:drenando'
+marcas = ConnectionProxy(caches, 'compartilhado')
+
+
+def _config(nome, padrao):
+    return getattr(settings, nome, padrao)
+
+
+def enfileirar_email(assunto, corpo, destinatarios, remetente='', responder_para='', chave=None):
+    """Grava uma mensagem por destinatário e agenda o envio para depois do commit."""
+    EmailPendente.objects.bulk_create([
+        EmailPendente(
+            destinatario=destinatario, assunto=assunto, corpo=corpo, remetente=remetente,
+            responder_para=responder_para, chave=f'{chave}:{destinatario}' if chave else None,
+        )
+        for destinatario in destinatarios
+    ])
+    agendar(drenar_caixa_saida)
+
+
+def notificar_inscritos(evento, assunto, corpo, tamanho_bloco=1000):
+    """
+    Enfileira a notificação para todos os inscritos (não cancelados) do evento, em blocos.
+
+    Cada bloco é gravado na sua própria transação. A chave de deduplicação permite
+    rodar de novo após uma falha sem notificar ninguém duas vezes. Retorna o total enfileirado.
+    """
+    assinatura = hashlib.md5(f'{assunto}\n{corpo}'.encode(), usedforsecurity=False).hexdigest()
+    inscritos = (
+        Inscricao.objects.filter(evento=evento).exclude(status='cancelado').exclude(participante__email='')
+        .order_by('pk').values_list('participante_id', 'participante__email')
+    )
+    total, bloco = 0, []
+    for participante_id, email in inscritos.iterator(chunk_size=tamanho_bloco):
+        bloco.append(EmailPendente(
+            destinatario=email, assunto=assunto, corpo=corpo,
+            chave=f'evento:{evento.pk}:{assinatura}:{participante_id}',
+        ))
+        if len(bloco) >= tamanho_bloco:
+            total += _gravar_bloco(bloco)
+            bloco = []
+    if bloco:
+        total += _gravar_bloco(bloco)
+    if total:
+        agendar(drenar_caixa_saida) # Um drenador para todos os blocos
+    return total
+
+
+def _gravar_bloco(bloco):
+    with transaction.atomic():
+        EmailPendente.objects.bulk_create(bloco, ignore_conflicts=True) # Reexecução: chaves já existentes são ignoradas
+    return len(bloco)
+
+
+def _reservar_lote():
+    """
+    Reserva até EMAIL_TAMANHO_LOTE mensagens vencidas para este processo.
+
+    A reserva é um UPDATE condicional (funciona em SQLite e Postgres): empurra
+    'proxima_tentativa' para o futuro e marca o lote. Se o processo morrer, a reserva
+    expira e outra execução reenvia a mensagem.
+    """
+    agora = timezone.now()
+    vencidas = EmailPendente.objects.filter(status='pendente', proxima_tentativa__lte=agora)
+    ids = list(vencidas.order_by('pk').values_list('pk', flat=True)[:_config('EMAIL_TAMANHO_LOTE', 100)])
+    if not ids:
+        return []
+    lote = uuid.uuid4().hex
+    vencidas.filter(pk__in=ids).update(lote=lote, proxima_tentativa=agora + timedelta(seconds=_config('EMAIL_RESERVA_SEGUNDOS', 300)))
+    return list(EmailPendente.objects.filter(lote=lote, status='pendente'))
+
+
+def _mensagem(email, conexao):
+    return EmailMessage(
+        email.assunto, email.corpo, email.remetente or settings.DEFAULT_FROM_EMAIL, [email.destinatario],
+        reply_to=[email.responder_para] if email.responder_para else None, connection=conexao,
+    )
+
+
+def _registrar_falha(email, exc):
+    email.tentativas += 1
+    email.erro = f'{exc.__class__.__name__}: {exc}'
+    if email.tentativas >= _config('EMAIL_MAX_TENTATIVAS', 5):
+        email.status = 'falhou'
+    else: # Espera exponencial: 1, 2, 4, 8... minutos
+        email.proxima_tentativa = timezone.now() + timedelta(seconds=60 * 2 ** (email.tentativas - 1))
+    logger.warning('Falha ao enviar email %s (tentativa %d): %s', email.pk, email.tentativas, email.erro)
+
+
+def _registrar_envio(email):
+    EmailPendente.objects.filter(pk=email.pk).update(status='enviado', enviado_em=timezone.now(), lote='', erro='')
+
+
+def _enviar_lote(emails):
+    """
+    Envia o lote por uma única conexão SMTP, respeitando EMAIL_MAX_POR_SEGUNDO.
+
+    O resultado de cada mensagem é gravado logo após a tentativa: se o processo
+    morrer no meio do lote, as já enviadas não são reenviadas quando a reserva
+    expirar. Qualquer erro de uma mensagem (ex.: BadHeaderError) conta como tentativa
+    só dela, para que uma mensagem inválida não trave a fila.
+    """
+    intervalo = 1 / _config('EMAIL_MAX_POR_SEGUNDO', 10)
+    enviados, falhas = [], []
+    conexao = get_connection(fail_silently=False)
+    try:
+        conexao.open()
+        ultimo = 0.0
+        for email in emails:
+            espera = intervalo - (time.monotonic() - ultimo)
+            if espera > 0:
+                time.sleep(espera)
+            ultimo = time.monotonic()
+            try:
+                _mensagem(email, conexao).send()
+            except smtplib.SMTPServerDisconnected as exc: # Conexão caiu: reabre para o resto do lote
+                _falhou(email, exc, falhas)
+                conexao.close()
+                conexao.open()
+            except Exception as exc:
+                _falhou(email, exc, falhas)
+            else:
+                _registrar_envio(email)
+                enviados.append(email.pk)
+    except Exception as exc: # Servidor indisponível: o resto do lote é reagendado
+        tratados = set(enviados) | {email.pk for email in falhas}
+        for email in emails:
+            if email.pk not in tratados:
+                _falhou(email, exc, falhas)
+    finally:
+        conexao.close()
+    return len(enviados)
+
+
+def _falhou(email, exc, falhas):
+    _registrar_falha(email, exc)
+    email.save(update_fields=['status', 'tentativas', 'proxima_tentativa', 'erro'])
+    falhas.append(email)
+
+
+def processar_caixa_saida(max_lotes=None):
+    """Envia as mensagens vencidas, lote a lote, até esvaziar a fila (ou max_lotes). Retorna o total enviado."""
+    total = lotes = 0
+    while max_lotes is None or lotes < max_lotes:
+        emails = _reservar_lote()
+        if not emails:
+            break
+        total += _enviar_lote(emails)
+        lotes += 1
+        marcas.touch(CHAVE_DRENAGEM, _config('EMAIL_RESERVA_SEGUNDOS', 300)) # Mantém a marca do drenador enquanto há lotes
+    return total
+
+
+def drenar_caixa_saida():
+    """
+    Tarefa agendada pelo enfileiramento (e passo do comando enviar_emails): esvazia a
+    fila se nenhum outro drenador estiver ativo. Mensagens gravadas enquanto o drenador
+    terminava são conferidas depois de liberar a marca, para não ficarem esperando o
+    próximo envio. Retorna o total enviado (0 se outro drenador estava ativo).
+    """
+    total = 0
+    while marcas.add(CHAVE_DRENAGEM, True, _config('EMAIL_RESERVA_SEGUNDOS', 300)):
+        try:
+            total += processar_caixa_saida()
+        finally:
+            marcas.delete(CHAVE_DRENAGEM)
+        if not EmailPendente.objects.filter(status='pendente', proxima_tentativa__lte=timezone.now()).exists():
+            break
+    return total
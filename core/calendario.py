@@ -0,0 +1,135 @@
+import hashlib
+from datetime import timezone as dt_timezone
+
+from django.core.cache import cache
+from django.utils import timezone
+
+from .models import Evento, Atividade
+from .cache_eventos import versao_programacao_existente, versoes_programacao, eventos_do_participante
+
+# Geração de feeds iCalendar (RFC 5545). Cada evento vira um bloco de VEVENTs
+# (o evento + suas atividades) guardado em cache pela versão da programação do
+# evento, que inscrições e check-ins não mudam; os feeds apenas concatenam blocos,
+# então polls repetidos não tocam no banco, nem durante uma onda de inscrições.
+
+TIMEOUT_BLOCO = 60 * 60 * 24
+DOMINIO_UID = 'gestao-eventos'
+
+CABECALHO = (
+    'BEGIN:VCALENDAR\r\n'
+    'VERSION:2.0\r\n'
+    'PRODID:-//Gestao de Eventos//Agenda//PT-BR\r\n'
+    'CALSCALE:GREGORIAN\r\n'
+    'METHOD:PUBLISH\r\n'
+)
+RODAPE = 'END:VCALENDAR\r\n'
+
+
+def _escapar(texto):
+    texto = (texto or '').replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+    return texto.replace('\r\n', '\\n').replace('\n', '\\n')
+
+
+def _dobrar(linha):
+    """Quebra linhas acima de 75 octetos, como exige a RFC 5545."""
+    dados = linha.encode('utf-8')
+    if len(dados) <= 75:
+        return linha + '\r\n'
+    partes, atual = [], ''
+    for caractere in linha:
+        limite = 75 if not partes else 74 # linhas de continuação começam com espaço
+        if len((atual + caractere).encode('utf-8')) > limite:
+            partes.append(atual)
+            atual = ''
+        atual += caractere
+    partes.append(atual)
+    return '\r\n '.join(partes) + '\r\n'
+
+
+def _data(valor):
+    return timezone.localtime(valor, dt_timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def _vevent(uid, inicio, fim, titulo, local='', descricao=''):
+    linhas = [
+        'BEGIN:VEVENT',
+        f'UID:{uid}@{DOMINIO_UID}',
+        f'DTSTAMP:{_data(timezone.now())}',
+        f'DTSTART:{_data(inicio)}',
+        f'DTEND:{_data(fim)}',
+        f'SUMMARY:{_escapar(titulo)}',
+    ]
+    if local:
+        linhas.append(f'LOCATION:{_escapar(local)}')
+    if descricao:
+        linhas.append(f'DESCRIPTION:{_escapar(descricao)}')
+    linhas.append('END:VEVENT')
+    return ''.join(_dobrar(linha) for linha in linhas)
+
+
+def _gerar_bloco(evento):
+    yield _vevent(f'evento-{evento.pk}', evento.data_inicio, evento.data_fim, evento.nome, evento.local, evento.descricao)
+    # Bloco gravado na chave da versão: lido do primário, nunca de uma réplica atrasada
+    atividades = Atividade.objects.using('default').filter(evento=evento).select_related('responsavel').order_by('horario_inicio')
+    for atividade in atividades.iterator(chunk_size=500):
+        descricao = atividade.descricao
+        if atividade.responsavel:
+            descricao = f'Responsável: {atividade.responsavel.username}\n{descricao}'.strip()
+        yield _vevent(
+            f'atividade-{atividade.pk}', atividade.horario_inicio, atividade.horario_fim,
+            f'{atividade.titulo} ({evento.nome})', evento.local, descricao,
+        )
+
+
+def _chave_bloco(evento_id, versao):
+    return f'ics:{evento_id}:{versao}'
+
+
+def _blocos(eventos_ids, versoes):
+    """Gera os blocos dos eventos, lendo do cache e renderizando (e guardando) os ausentes."""
+    chaves = {_chave_bloco(evento_id, versoes[evento_id]): evento_id for evento_id in eventos_ids}
+    em_cache = cache.get_many(chaves)
+    ausentes = [evento_id for chave, evento_id in chaves.items() if chave not in em_cache]
+    eventos = Evento.objects.using('default').in_bulk(ausentes) if ausentes else {}
+    for chave, evento_id in chaves.items():
+        if chave in em_cache:
+            yield em_cache[chave]
+        elif evento_id in eventos:
+            partes = []
+            for vevent in _gerar_bloco(eventos[evento_id]):
+                partes.append(vevent)
+                yield vevent
+            cache.set(chave, ''.join(partes), TIMEOUT_BLOCO)
+
+
+def _etag(*partes):
+    return '"ics-' + hashlib.md5(repr(partes).encode(), usedforsecurity=False).hexdigest() + '"'
+
+
+def etag_evento(evento_id):
+    """
+    ETag do feed do evento, calculada com a versão da programação em cache (sem
+    consultas num acerto). None se o evento não existe: IDs quaisquer não criam
+    versões que nunca expiram.
+    """
+    versao = versao_programacao_existente(evento_id)
+    return None if versao is None else _etag('evento', evento_id, versao)
+
+
+def feed_evento(evento_id, nome):
+    yield CABECALHO + _dobrar(f'X-WR-CALNAME:{_escapar(nome)}')
+    yield from _blocos([evento_id], versoes_programacao([evento_id]))
+    yield RODAPE
+
+
+def etag_participante(participante_id):
+    eventos_ids = eventos_do_participante(participante_id)
+    versoes = versoes_programacao(eventos_ids)
+    return _etag('participante', participante_id, [(evento_id, versoes[evento_id]) for evento_id in eventos_ids])
+
+
+def feed_participante(participante_id):
+    eventos_ids = eventos_do_participante(participante_id)
+    yield CABECALHO + _dobrar('X-WR-CALNAME:Minhas inscrições')
+    yield from _blocos(eventos_ids, versoes_programacao(eventos_ids))
+    yield RODAPE
@@ -0,0 +1,130 @@
+import base64
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare, salted_hmac
+from django.utils.dateparse import parse_datetime
+
+from .models import Inscricao
+from .cache_eventos import versao_evento, invalidar_evento
+from .routers import no_primario
+
+# Check-in na entrada do evento. Cada inscrição tem um código de ingresso curto
+# ("<id>-<assinatura>") assinado com a SECRET_KEY; os leitores baixam a lista de
+# ingressos válidos do evento, conferem os códigos localmente (sem rede) e depois
+# enviam os check-ins acumulados em lote.
+
+SALT_INGRESSO = 'core.checkin.ingresso'
+TAMANHO_ASSINATURA = 6 # bytes do HMAC mantidos no código (10 caracteres em base32)
+TAMANHO_BLOCO = 500
+TIMEOUT_ROSTER = 60 * 60
+
+
+class ErroCheckin(Exception):
+    """Lote de check-ins inválido (formato ou tamanho)."""
+
+
+def _assinatura(evento_id, inscricao_id):
+    digest = salted_hmac(SALT_INGRESSO, f'{evento_id}:{inscricao_id}', algorithm='sha256').digest()
+    return base64.b32encode(digest[:TAMANHO_ASSINATURA]).decode().rstrip('=')
+
+
+def codigo_ingresso(evento_id, inscricao_id):
+    return f'{inscricao_id}-{_assinatura(evento_id, inscricao_id)}'
+
+
+def ler_codigo(evento_id, codigo):
+    """ID da inscrição do código, ou None se o código não for deste evento ou estiver adulterado."""
+    inscricao_id, _, assinatura = str(codigo).strip().upper().partition('-')
+    if not inscricao_id.isdigit() or not constant_time_compare(assinatura, _assinatura(evento_id, int(inscricao_id))):
+        return None
+    return int(inscricao_id)
+
+
+def roster_evento(evento_id):
+    """
+    Ingressos válidos (inscrições não canceladas) do evento, em cache pela versão do
+    evento: inscrições, cancelamentos e check-ins geram outra chave.
+    Retorna (versao, dados).
+    """
+    versao = versao_evento(evento_id)
+    chave = f'checkin:{evento_id}:{versao}' # mesmo formato de chave_evento('checkin', ...)
+    dados = cache.get(chave)
+    if dados is None:
+        with no_primario():
+            inscricoes = (
+                Inscricao.objects.filter(evento_id=evento_id).exclude(status='cancelado')
+                .order_by('pk').values_list('pk', 'participante_id', 'participante__username', 'status', 'data_checkin')
+            )
+            dados = {
+                'evento': evento_id,
+                'gerado_em': timezone.now(),
+                'ingressos': [
+                    {
+                        'codigo': codigo_ingresso(evento_id, pk), 'participante': participante_id, 'nome': nome,
+                        'status': status, 'data_checkin': data_checkin,
+                    }
+                    for pk, participante_id, nome, status, data_checkin in inscricoes.iterator(chunk_size=2000)
+                ],
+            }
+        cache.set(chave, dados, TIMEOUT_ROSTER)
+    return versao, dados
+
+
+def _horario(valor):
+    if valor in (None, ''):
+        return timezone.now()
+    horario = parse_datetime(str(valor))
+    if horario is None:
+        return None
+    if timezone.is_naive(horario):
+        horario = timezone.make_aware(horario)
+    return horario
+
+
+def registrar_checkins(evento_id, checkins):
+    """
+    Aplica um lote de check-ins ({'codigo': str, 'horario': ISO 8601 opcional}) numa transação.
+
+    Idempotente: reenviar o mesmo lote (leitor sem confirmação do envio anterior) não
+    altera nada, e uma inscrição com vários registros fica com o horário mais cedo.
+    Usa bulk_update, sem full_clean nem signals por linha.
+
+    Retorno: {'registrados': int, 'ja_registrados': int, 'invalidos': [codigos]}
+    """
+    if not isinstance(checkins, list) or not all(isinstance(item, dict) for item in checkins):
+        raise ErroCheckin("Envie 'checkins' como uma lista de objetos com 'codigo'.")
+    maximo = getattr(settings, 'CHECKIN_MAX_LOTE', 5000)
+    if len(checkins) > maximo:
+        raise ErroCheckin(f'Máximo de {maximo} check-ins por lote.')
+
+    horarios, invalidos = {}, []
+    for item in checkins:
+        inscricao_id = ler_codigo(evento_id, item.get('codigo', ''))
+        horario = _horario(item.get('horario'))
+        if inscricao_id is None or horario is None:
+            invalidos.append(item.get('codigo'))
+        elif inscricao_id not in horarios or horario < horarios[inscricao_id]:
+            horarios[inscricao_id] = horario
+
+    alteradas, encontradas = [], set()
+    ids = sorted(horarios)
+    with transaction.atomic():
+        for inicio in range(0, len(ids), TAMANHO_BLOCO):
+            bloco = (
+                Inscricao.objects.select_for_update().filter(evento_id=evento_id, pk__in=ids[inicio:inicio + TAMANHO_BLOCO])
+                .exclude(status='cancelado').only('pk', 'data_checkin')
+            )
+            for inscricao in bloco:
+                encontradas.add(inscricao.pk)
+                if inscricao.data_checkin is None or horarios[inscricao.pk] < inscricao.data_checkin:
+                    inscricao.data_checkin = horarios[inscricao.pk]
+                    alteradas.append(inscricao)
+        Inscricao.objects.bulk_update(alteradas, ['data_checkin'], batch_size=TAMANHO_BLOCO)
+    if alteradas:
+        invalidar_evento(evento_id) # bulk_update não dispara signals
+
+    invalidos += [codigo_ingresso(evento_id, pk) for pk in ids if pk not in encontradas] # canceladas ou removidas
+    return {'registrados': len(alteradas), 'ja_registrados': len(encontradas) - len(alteradas), 'invalidos': invalidos}
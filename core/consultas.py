@@ -0,0 +1,153 @@
+import logging
+import os
+import re
+import sys
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+# Detector de N+1 (opcional, DETECTOR_CONSULTAS): agrupa o SQL executado durante a
+# requisição pelo formato normalizado (sem literais e com listas IN colapsadas). Um
+# formato repetido muitas vezes quase sempre é uma consulta por linha (ex.: um campo
+# 'source' de FK sem select_related); além disso, as views podem declarar um
+# orçamento de consultas por ação ('orcamento_consultas').
+
+_LITERAIS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b|%s|\?")
+_LISTAS = re.compile(r'\((?:\s*\?\s*,)*\s*\?\s*\)')
+_VALORES = re.compile(r'(VALUES \(\.\.\.\))(?:\s*,\s*\(\.\.\.\))+')
+_ESPACOS = re.compile(r'\s+')
+_CONTROLE = ('SAVEPOINT', 'RELEASE', 'ROLLBACK', 'BEGIN', 'COMMIT') # Transações não contam no orçamento
+_ORM = os.path.join('django', 'db', '')
+_IGNORADOS = {__file__, os.path.join(os.path.dirname(__file__), 'middleware.py')} # O próprio detector
+
+
+class ConsultasExcessivas(Exception):
+    """Requisição acima do orçamento de consultas ou com o mesmo formato repetido (N+1)."""
+
+
+def normalizar_sql(sql):
+    """Formato da consulta: literais e parâmetros viram '?', listas IN e VALUES em lote viram '(...)'."""
+    sql = _LITERAIS.sub('?', _ESPACOS.sub(' ', sql).strip())
+    return _VALORES.sub(r'\1', _LISTAS.sub('(...)', sql))
+
+
+def _origem():
+    """
+    Linha que disparou a consulta: o quadro mais interno do código do projeto ou, se a
+    consulta vem só de bibliotecas (ex.: um campo 'source' do DRF), o mais interno fora do ORM.
+    """
+    raiz, biblioteca = str(settings.BASE_DIR), None
+    quadro = sys._getframe(2)
+    while quadro is not None:
+        arquivo = quadro.f_code.co_filename
+        local = f'{quadro.f_lineno} ({quadro.f_code.co_name})'
+        if arquivo.startswith(raiz) and 'site-packages' not in arquivo and arquivo not in _IGNORADOS:
+            return f'{os.path.relpath(arquivo, raiz)}:{local}'
+        if biblioteca is None and 'site-packages' in arquivo and _ORM not in arquivo:
+            biblioteca = f'{arquivo.split("site-packages" + os.sep, 1)[1]}:{local}'
+        quadro = quadro.f_back
+    return biblioteca
+
+
+class ColetorConsultas:
+    """execute_wrapper que conta as consultas por formato e guarda a origem dos formatos repetidos."""
+
+    def __init__(self):
+        self.total = 0
+        self.formatos = Counter()
+        self.origens = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        if not sql.lstrip().upper().startswith(_CONTROLE):
+            formato = normalizar_sql(sql)
+            self.total += 1
+            self.formatos[formato] += 1
+            if self.formatos[formato] == 2: # A primeira repetição mostra de onde vem o laço
+                self.origens[formato] = _origem()
+        return execute(sql, params, many, context)
+
+    @contextmanager
+    def coletar(self):
+        """Instala o coletor em todas as conexões (primário e réplicas) da thread atual."""
+        with ExitStack() as pilha:
+            for alias in connections:
+                pilha.enter_context(connections[alias].execute_wrapper(self))
+            yield self
+
+    @contextmanager
+    def escopo(self):
+        """
+        Conta à parte o que roda dentro do bloco (ex.: uma sub-requisição do lote). Ao
+        sair, só o total volta para a requisição externa: formatos repetidos entre
+        sub-requisições diferentes não são N+1 da requisição que as agrupa.
+        """
+        externo = self.total, self.formatos, self.origens
+        self.total, self.formatos, self.origens = 0, Counter(), {}
+        try:
+            yield self
+        finally:
+            parcial = self.total
+            self.total, self.formatos, self.origens = externo
+            self.total += parcial
+
+    def repetidas(self, limite):
+        """[(formato, vezes, origem)] dos formatos executados 'limite' vezes ou mais."""
+        return [
+            (formato, vezes, self.origens.get(formato))
+            for formato, vezes in self.formatos.most_common() if vezes >= limite
+        ]
+
+
+def orcamento_da_view(view_func, metodo):
+    """
+    Orçamento de consultas da rota, ou None.
+
+    A view declara 'orcamento_consultas' como inteiro ou como dicionário por ação
+    ('list', 'participantes:POST', ...), como o throttle_scope (core.throttling).
+    """
+    classe = getattr(view_func, 'cls', None)
+    orcamento = getattr(classe, 'orcamento_consultas', None)
+    if isinstance(orcamento, dict):
+        acoes = getattr(view_func, 'actions', None) or {}
+        acao = acoes.get(metodo.lower()) or (acoes.get('get') if metodo == 'HEAD' else None)
+        orcamento = orcamento.get(f'{acao}:{metodo}', orcamento.get(acao))
+    return orcamento
+
+
+def problemas_da_requisicao(coletor, orcamento):
+    """Mensagens de orçamento estourado e de formatos repetidos (DETECTOR_CONSULTAS_REPETICOES)."""
+    problemas = []
+    if orcamento is not None and coletor.total > orcamento:
+        problemas.append(f'{coletor.total} consultas (orçamento: {orcamento})')
+    for formato, vezes, origem in coletor.repetidas(getattr(settings, 'DETECTOR_CONSULTAS_REPETICOES', 5)):
+        problemas.append(f'{vezes}x em {origem or "?"}: {formato[:300]}')
+    return problemas
+
+
+@contextmanager
+def sub_requisicao(request, view_func):
+    """
+    Sub-requisição do lote (core.lote): formatos e orçamento avaliados só com as
+    consultas dela e o orçamento da rota chamada, como se fosse uma requisição própria.
+    """
+    coletor = getattr(request, 'coletor_consultas', None)
+    if coletor is None:
+        yield
+        return
+    with coletor.escopo():
+        yield
+        problemas = problemas_da_requisicao(coletor, orcamento_da_view(view_func, 'GET'))
+    if problemas:
+        relatar(request, problemas)
+
+
+def relatar(request, problemas):
+    """Registra no log ('log') ou levanta ConsultasExcessivas ('erro', usado nos testes)."""
+    mensagem = f'{request.method} {request.path}: ' + '; '.join(problemas)
+    if getattr(settings, 'DETECTOR_CONSULTAS_MODO', 'log') == 'erro':
+        raise ConsultasExcessivas(mensagem)
+    logger.warning('Consultas excessivas em %s', mensagem)
@@ -0,0 +1,27 @@
+import logging
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+def aplicar_pragmas(cursor, pragmas):
+    """Executa os PRAGMAs no cursor (DB-API) e retorna o journal_mode efetivo."""
+    for nome, valor in pragmas.items():
+        cursor.execute(f'PRAGMA {nome} = {valor}')
+    cursor.execute('PRAGMA journal_mode')
+    return cursor.fetchone()[0]
+
+
+def configurar_sqlite(sender, connection, **kwargs):
+    """
+    Receiver de connection_created: ajusta cada nova conexão SQLite com SQLITE_PRAGMAS
+    (WAL, synchronous, busy_timeout, mmap). Bancos em memória (testes) ficam em 'memory'.
+    """
+    if connection.vendor != 'sqlite':
+        return
+    pragmas = getattr(settings, 'SQLITE_PRAGMAS', {})
+    if not pragmas:
+        return
+    modo = aplicar_pragmas(connection.connection.cursor(), pragmas)
+    logger.debug('Conexão SQLite configurada (journal_mode=%s)', modo)
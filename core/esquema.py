@@ -0,0 +1,122 @@
+import gzip
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+from functools import lru_cache
+from pathlib import Path
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Esquema OpenAPI pré-gerado. Introspectar todos os viewsets e serializers custa
+# centenas de ms, então o esquema é gerado uma vez por versão do código (no deploy,
+# com "python manage.py gerar_esquema", ou no primeiro acesso), gravado em disco e
+# mantido em memória já renderizado (YAML e JSON, também comprimidos com gzip).
+
+FORMATOS = {
+    'yaml': 'application/vnd.oai.openapi; charset=utf-8',
+    'json': 'application/vnd.oai.openapi+json; charset=utf-8',
+}
+
+_memoria = {} # formato -> artefato da versão atual
+_lock = threading.Lock()
+
+
+@lru_cache(maxsize=1)
+def _hash_do_codigo():
+    """Hash dos .py do projeto e das versões de DRF/drf-spectacular (calculado uma vez por processo)."""
+    import drf_spectacular
+    import rest_framework
+    digest = hashlib.sha256(f'{rest_framework.VERSION}:{drf_spectacular.__version__}'.encode())
+    for pasta in ('core', 'gestao_eventos'):
+        for arquivo in sorted((Path(settings.BASE_DIR) / pasta).rglob('*.py')):
+            if 'tests' not in arquivo.name:
+                digest.update(arquivo.read_bytes())
+    return digest.hexdigest()[:16]
+
+
+def versao_codigo():
+    """VERSAO_CODIGO (ex.: o commit do deploy) ou, sem ela, o hash do código-fonte."""
+    return getattr(settings, 'VERSAO_CODIGO', '') or _hash_do_codigo()
+
+
+def _diretorio():
+    return Path(getattr(settings, 'ESQUEMA_OPENAPI_DIR', Path(settings.BASE_DIR) / 'cache_esquema'))
+
+
+def _caminho(versao, formato):
+    return _diretorio() / f'openapi-{versao}.{formato}'
+
+
+def _artefato(versao, formato, conteudo):
+    return {
+        'versao': versao,
+        'formato': formato,
+        'conteudo': conteudo,
+        'gzip': gzip.compress(conteudo, compresslevel=9, mtime=0),
+        'etag': f'"openapi-{hashlib.sha256(conteudo).hexdigest()[:16]}"',
+    }
+
+
+def _gravar(caminho, conteudo):
+    """Escrita atômica: leitores de outros processos nunca veem um arquivo pela metade."""
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+    descritor, temporario = tempfile.mkstemp(dir=caminho.parent, prefix='.openapi-')
+    with os.fdopen(descritor, 'wb') as arquivo:
+        arquivo.write(conteudo)
+    os.replace(temporario, caminho)
+
+
+def gerar_esquema(versao=None):
+    """Gera o esquema, grava YAML e JSON em disco (removendo versões antigas) e os guarda em memória."""
+    from drf_spectacular.generators import SchemaGenerator
+    from drf_spectacular.renderers import OpenApiJsonRenderer, OpenApiYamlRenderer
+
+    versao = versao or versao_codigo()
+    esquema = SchemaGenerator().get_schema(request=None, public=True)
+    conteudos = {
+        'yaml': OpenApiYamlRenderer().render(esquema, renderer_context={}),
+        'json': OpenApiJsonRenderer().render(esquema, renderer_context={}),
+    }
+    for formato, conteudo in conteudos.items():
+        _gravar(_caminho(versao, formato), conteudo)
+        _memoria[formato] = _artefato(versao, formato, conteudo)
+    for antigo in _diretorio().glob('openapi-*.*'):
+        if not antigo.name.startswith(f'openapi-{versao}.'):
+            antigo.unlink(missing_ok=True)
+    logger.info('Esquema OpenAPI gerado para a versão %s', versao)
+    return _memoria
+
+
+def obter_esquema(formato='yaml'):
+    """
+    Artefato do esquema para a versão atual do código: da memória, do disco (gerado
+    no deploy ou por outro processo) ou, em último caso, gerado agora (uma vez).
+    """
+    versao = versao_codigo()
+    artefato = _memoria.get(formato)
+    if artefato and artefato['versao'] == versao:
+        return artefato
+    with _lock:
+        artefato = _memoria.get(formato)
+        if artefato and artefato['versao'] == versao:
+            return artefato
+        caminho = _caminho(versao, formato)
+        if caminho.exists():
+            _memoria[formato] = _artefato(versao, formato, caminho.read_bytes())
+        else:
+            gerar_esquema(versao)
+        return _memoria[formato]
+
+
+def formato_pedido(request):
+    """?format=json|yaml (como no SpectacularAPIView) ou o Accept; YAML por padrão."""
+    formato = request.GET.get('format')
+    if formato in FORMATOS:
+        return formato
+    aceito = request.META.get('HTTP_ACCEPT', '')
+    return 'json' if 'json' in aceito and 'yaml' not in aceito else 'yaml'
+
@@ -0,0 +1,115 @@
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import Trunc, TruncHour
+from django.utils import timezone
+
+from .models import Evento, EventoArquivado, Inscricao, InscricaoArquivada, InscricaoHora
+
+logger = logging.getLogger(__name__)
+
+# Séries de inscrições para os gráficos dos organizadores. InscricaoHora guarda, por
+# evento e hora (UTC) de inscrição, o total por status e tipo de participante; dia,
+# semana e mês são somas das horas. Cada alteração marca a hora afetada, que é
+# recalculada a partir das inscrições daquela hora (também após mudanças de status
+# e remoções, sem depender do valor anterior).
+#
+# InscricaoHora guarda só o ID do evento, sem FK: arquivar um evento não apaga suas
+# horas, e a série geral mantém o histórico (a consolidação completa refaz as horas
+# dos arquivados a partir de InscricaoArquivada). Eventos excluídos, ativos ou
+# arquivados, ficam fora das séries.
+
+GRANULARIDADES = ('hora', 'dia', 'semana', 'mes')
+KIND = {'hora': 'hour', 'dia': 'day', 'semana': 'week', 'mes': 'month'}
+UMA_HORA = timedelta(hours=1)
+
+
+def inicio_da_hora(data):
+    return timezone.localtime(data, dt_timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+
+def _contagens(inscricoes):
+    return (
+        inscricoes.annotate(hora=TruncHour('data_inscricao', tzinfo=dt_timezone.utc))
+        .values_list('evento_id', 'hora', 'status', 'participante__tipo').annotate(total=Count('pk')).order_by()
+    )
+
+
+def recalcular_horas(buckets):
+    """Recalcula as horas [(evento_id, hora ISO)] a partir das inscrições (uma consulta por evento)."""
+    horas_por_evento = defaultdict(set)
+    for evento_id, hora in buckets:
+        horas_por_evento[evento_id].add(inicio_da_hora(datetime.fromisoformat(hora)))
+    with transaction.atomic():
+        for evento_id, horas in horas_por_evento.items():
+            inscricoes = Inscricao.objects.filter(
+                evento_id=evento_id, data_inscricao__gte=min(horas), data_inscricao__lt=max(horas) + UMA_HORA,
+            )
+            linhas = [
+                InscricaoHora(evento_id=evento_id, hora=hora, status=status, tipo=tipo, total=total)
+                for _, hora, status, tipo, total in _contagens(inscricoes) if hora in horas
+            ]
+            InscricaoHora.objects.filter(evento_id=evento_id, hora__in=horas).delete()
+            if Evento.all_objects.filter(pk=evento_id).exists(): # evento removido: as horas só são apagadas
+                InscricaoHora.objects.bulk_create(linhas)
+
+
+def horas_afetadas(pares):
+    """[(evento_id, data_inscricao)] -> lista de horas [(evento_id, hora ISO)] para recalcular_horas."""
+    return sorted({(evento_id, inicio_da_hora(data).isoformat()) for evento_id, data in pares})
+
+
+def consolidar_inscricoes(eventos_ids=None):
+    """
+    Refaz a consolidação inteira (ou dos eventos informados) a partir das inscrições,
+    ativas ou arquivadas, um evento por transação. A consolidação inteira também apaga
+    as horas de eventos que não existem mais. Retorna o número de linhas gravadas.
+    """
+    arquivados = set(EventoArquivado.objects.values_list('pk', flat=True))
+    if eventos_ids is None:
+        eventos_ids = sorted(set(Evento.all_objects.values_list('pk', flat=True)) | arquivados)
+        InscricaoHora.objects.exclude(evento_id__in=eventos_ids).delete()
+    gravadas = 0
+    for evento_id in eventos_ids:
+        origem = InscricaoArquivada if evento_id in arquivados else Inscricao
+        with transaction.atomic():
+            InscricaoHora.objects.filter(evento_id=evento_id).delete()
+            linhas = InscricaoHora.objects.bulk_create(
+                (
+                    InscricaoHora(evento_id=evento_id, hora=hora, status=status, tipo=tipo, total=total)
+                    for _, hora, status, tipo, total in _contagens(origem.objects.filter(evento_id=evento_id)).iterator()
+                ),
+                batch_size=1000,
+            )
+        gravadas += len(linhas)
+    logger.info('Consolidação de inscrições refeita: %d linhas', gravadas)
+    return gravadas
+
+
+def serie_inscricoes(inicio, fim, granularidade='dia', evento_id=None):
+    """
+    Série temporal no intervalo [inicio, fim), somando as horas consolidadas: uma
+    consulta agregada sobre InscricaoHora, sem tocar em Inscricao.
+
+    Retorna [{'periodo', 'total', 'status': {...}, 'tipo': {...}}] em ordem; períodos
+    sem inscrições são omitidos.
+    """
+    linhas = InscricaoHora.objects.filter(hora__gte=inicio, hora__lt=fim).exclude(
+        evento_id__in=Evento.deleted_objects.values('pk'),
+    ).exclude(evento_id__in=EventoArquivado.objects.filter(excluido_em__isnull=False).values('pk'))
+    if evento_id is not None:
+        linhas = linhas.filter(evento_id=evento_id)
+    linhas = (
+        linhas.annotate(periodo=Trunc('hora', KIND[granularidade], tzinfo=timezone.get_current_timezone()))
+        .values_list('periodo', 'status', 'tipo').annotate(soma=Sum('total')).order_by('periodo')
+    )
+    pontos = {}
+    for periodo, status, tipo, soma in linhas:
+        ponto = pontos.setdefault(periodo, {'periodo': periodo, 'total': 0, 'status': defaultdict(int), 'tipo': defaultdict(int)})
+        ponto['total'] += soma
+        ponto['status'][status] += soma
+        ponto['tipo'][tipo] += soma
+    return [{**ponto, 'status': dict(ponto['status']), 'tipo': dict(ponto['tipo'])} for ponto in pontos.values()]
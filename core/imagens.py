@@ -0,0 +1,100 @@
+import logging
+import os
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db.models import Q
+from PIL import Image, ImageOps
+
+from .models import Evento
+from .cache_eventos import invalidar_evento
+from .paginas_estaticas import agendar_exportacao
+
+logger = logging.getLogger(__name__)
+
+# Variantes geradas para cada banner: nome -> (largura máxima, formato Pillow, extensão, qualidade)
+VARIANTES_BANNER = {
+    'card': (600, 'JPEG', 'jpg', 80),
+    'card_webp': (600, 'WEBP', 'webp', 78),
+    'detalhe': (1600, 'JPEG', 'jpg', 82),
+    'detalhe_webp': (1600, 'WEBP', 'webp', 80),
+}
+
+
+def caminho_variante(evento_id, origem, nome):
+    """
+    Caminho da variante no storage (ex: banners/variantes/42/foto_card.jpg). A pasta do
+    evento separa banners de mesmo nome (foto.jpg, foto.png) de eventos diferentes.
+    """
+    _, _, extensao, _ = VARIANTES_BANNER[nome]
+    base = os.path.splitext(os.path.basename(origem))[0]
+    return f'banners/variantes/{evento_id}/{base}_{nome}.{extensao}'
+
+
+def urls_variantes(evento):
+    """URLs públicas das variantes já geradas; vazio se o banner ainda não foi processado."""
+    variantes = evento.banner_variantes or {}
+    if not evento.banner or variantes.get('origem') != evento.banner.name:
+        return {}
+    return {nome: default_storage.url(caminho) for nome, caminho in variantes.get('arquivos', {}).items()}
+
+
+def precisa_processar(evento):
+    """True se o banner mudou (ou foi removido) desde a última geração de variantes."""
+    origem = evento.banner.name if evento.banner else None
+    return (evento.banner_variantes or {}).get('origem') != origem
+
+
+def _redimensionar(imagem, largura, formato, qualidade):
+    copia = imagem.copy()
+    copia.thumbnail((largura, largura * 4), Image.LANCZOS) # Apenas reduz, mantendo a proporção
+    if formato == 'JPEG' and copia.mode not in ('RGB', 'L'):
+        copia = copia.convert('RGB')
+    saida = BytesIO()
+    opcoes = {'quality': qualidade, 'optimize': True}
+    if formato == 'JPEG':
+        opcoes['progressive'] = True
+    copia.save(saida, format=formato, **opcoes)
+    return saida.getvalue()
+
+
+def gerar_variantes(evento_id, forcar=False):
+    """
+    Gera as variantes redimensionadas/recomprimidas do banner do evento.
+
+    Roda no pool de tarefas (fora da requisição). Ao terminar grava os caminhos
+    em 'banner_variantes', remove as variantes do banner anterior e invalida
+    os caches do evento para que templates e API passem a usar o 'srcset'.
+    """
+    evento = Evento.objects.filter(pk=evento_id).first()
+    if evento is None or (not forcar and not precisa_processar(evento)):
+        return
+    antigas = set((evento.banner_variantes or {}).get('arquivos', {}).values())
+    novas = {}
+    if evento.banner:
+        origem = evento.banner.name
+        with evento.banner.open('rb') as arquivo:
+            imagem = Image.open(arquivo)
+            imagem.load()
+        imagem = ImageOps.exif_transpose(imagem) # Respeita a orientação das fotos de celular
+        for nome, (largura, formato, _, qualidade) in VARIANTES_BANNER.items():
+            caminho = caminho_variante(evento_id, origem, nome)
+            if default_storage.exists(caminho):
+                default_storage.delete(caminho)
+            novas[nome] = default_storage.save(caminho, ContentFile(_redimensionar(imagem, largura, formato, qualidade)))
+        dados = {'origem': origem, 'arquivos': novas}
+    else:
+        dados = {}
+
+    # update() evita o full_clean/save do modelo; o filtro descarta o resultado se o banner mudou no meio
+    mesmo_banner = Q(banner=evento.banner.name) if evento.banner else (Q(banner__isnull=True) | Q(banner=''))
+    if Evento.objects.filter(mesmo_banner, pk=evento_id).update(banner_variantes=dados):
+        descartar = antigas - set(novas.values())
+    else: # Banner trocado durante o processamento: a execução agendada pela nova troca assume
+        descartar = set(novas.values())
+    for caminho in descartar:
+        default_storage.delete(caminho)
+    invalidar_evento(evento_id, lista=True)
+    agendar_exportacao(evento_id) # Banner aparece na página do evento e no card da lista
+    logger.info('Variantes do banner do evento %s geradas: %s', evento_id, ', '.join(novas) or 'nenhuma')
@@ -0,0 +1,99 @@
+import copy
+import json
+import logging
+import queue
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, WatchedFileHandler
+from pathlib import Path
+
+# Logging sem I/O no caminho da requisição: as threads das requisições só colocam o
+# registro numa fila em memória; uma thread de fundo (QueueListener) o formata como
+# uma linha JSON e grava no arquivo. Com a fila cheia (disco travado), o registro é
+# descartado e contado em vez de segurar a requisição.
+#
+# Vários processos (workers do gunicorn) gravam no mesmo arquivo em modo append; a
+# rotação fica com o logrotate do sistema. O WatchedFileHandler percebe que o arquivo
+# foi movido e reabre o caminho, sem um processo renomear o arquivo dos outros.
+
+_request_id = ContextVar('request_id', default=None) # Ligado pelo RegistroRequisicaoMiddleware
+
+_CAMPOS_PADRAO = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime', 'request_id'}
+
+
+def request_id_atual():
+    return _request_id.get()
+
+
+class FiltroRequisicao(logging.Filter):
+    """Anexa o ID da requisição atual ao registro (roda na thread da requisição, antes da fila)."""
+
+    def filter(self, record):
+        record.request_id = _request_id.get()
+        return True
+
+
+class FormatoJSON(logging.Formatter):
+    """Uma linha JSON por registro: momento, nível, logger, mensagem, request_id e os campos de 'extra'."""
+
+    def format(self, record):
+        dados = {
+            'momento': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'nivel': record.levelname,
+            'logger': record.name,
+            'mensagem': record.getMessage(),
+            'request_id': getattr(record, 'request_id', None),
+        }
+        dados.update((campo, valor) for campo, valor in vars(record).items() if campo not in _CAMPOS_PADRAO)
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            dados['excecao'] = record.exc_text
+        return json.dumps(dados, ensure_ascii=False, default=str)
+
+
+class _Gravador(QueueListener):
+    def enqueue_sentinel(self): # Ao encerrar, espera vaga na fila em vez de falhar com ela cheia
+        self.queue.put(self._sentinel)
+
+
+class FilaHandler(QueueHandler):
+    """
+    Handler das requisições: enfileira e retorna. O QueueListener grava em um
+    WatchedFileHandler (rotação externa, pelo logrotate) numa thread própria, iniciada
+    aqui e encerrada por close() (logging.shutdown, na saída do processo).
+    """
+
+    def __init__(self, filename, tamanho_fila=10000):
+        Path(filename).parent.mkdir(parents=True, exist_ok=True)
+        arquivo = WatchedFileHandler(filename, encoding='utf-8', delay=True)
+        arquivo.setFormatter(FormatoJSON())
+        super().__init__(queue.Queue(tamanho_fila)) # Criado depois do arquivo: o shutdown fecha a fila primeiro
+        self.descartados = 0
+        self.listener = _Gravador(self.queue, arquivo, respect_handler_level=True)
+        self.listener.start()
+
+    def prepare(self, record):
+        """
+        Fila local (mesmo processo): o registro segue sem formatar, só com a mensagem
+        resolvida (os argumentos podem mudar depois) e a exceção já em texto.
+        """
+        record = copy.copy(record) # Os demais handlers do logger recebem o registro original
+        record.msg, record.args = record.getMessage(), None
+        if record.exc_info:
+            record.exc_text = FormatoJSON().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.descartados += 1
+
+    def close(self):
+        if self.listener._thread is not None:
+            self.listener.stop() # Grava o que ainda está na fila
+        for handler in self.listener.handlers:
+            handler.close()
+        super().close()
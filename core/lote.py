@@ -0,0 +1,113 @@
+import json
+import logging
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.http import HttpRequest, QueryDict
+from django.urls import Resolver404, resolve
+
+from .consultas import ConsultasExcessivas, sub_requisicao
+
+logger = logging.getLogger(__name__)
+
+# Requisições em lote (POST /api/batch/): várias leituras GET executadas dentro de
+# uma única requisição, que já passou por middleware e autenticação. Cada
+# sub-requisição passa pelo throttle da própria rota.
+
+
+class ObjetoEmLoteMixin:
+    """
+    Deduplica get_object() entre as sub-requisições de um mesmo lote.
+
+    A chave combina o SQL do queryset filtrado com o valor do lookup, então só
+    consultas idênticas (ex.: o evento buscado por /eventos/1/ e /eventos/1/dashboard/)
+    são reaproveitadas. As permissões de objeto continuam verificadas a cada uso.
+    """
+
+    def get_object(self):
+        objetos = getattr(self.request, 'objetos_lote', None)
+        if objetos is None:
+            return super().get_object()
+        queryset = self.filter_queryset(self.get_queryset())
+        lookup = self.lookup_url_kwarg or self.lookup_field
+        chave = (str(queryset.query), self.kwargs.get(lookup))
+        if chave not in objetos:
+            objetos[chave] = super().get_object()
+        else:
+            self.check_object_permissions(self.request, objetos[chave])
+        return objetos[chave]
+
+
+class ErroLote(Exception):
+    pass
+
+
+def _sub_requisicao(request, caminho, consulta, objetos):
+    """Cria a requisição GET interna, herdando o usuário já autenticado do lote."""
+    sub = HttpRequest()
+    sub.method = 'GET'
+    sub.path = sub.path_info = caminho
+    sub.META = {**request.META, 'REQUEST_METHOD': 'GET', 'PATH_INFO': caminho, 'QUERY_STRING': consulta}
+    sub.META.pop('CONTENT_LENGTH', None)
+    sub.META.pop('CONTENT_TYPE', None)
+    sub.GET = QueryDict(consulta)
+    sub.COOKIES = request.COOKIES
+    sub.user = request.user
+    sub._force_auth_user = request.user # Request do DRF usa ForcedAuthentication: sem reautenticar
+    sub._force_auth_token = request.auth
+    sub.objetos_lote = objetos
+    sub.coletor_consultas = getattr(request, 'coletor_consultas', None) # Detector de N+1: escopo por sub-requisição
+    return sub
+
+
+def _resolver(url):
+    partes = urlsplit(url)
+    if partes.scheme or partes.netloc or not partes.path.startswith('/api/'):
+        raise ErroLote('Use caminhos relativos da API (/api/...).')
+    try:
+        rota = resolve(partes.path)
+    except Resolver404:
+        raise ErroLote('Rota não encontrada.')
+    classe = getattr(rota.func, 'cls', None)
+    if classe is None or not classe.__module__.startswith('core.') or getattr(classe, 'permite_em_lote', True) is False:
+        raise ErroLote('Rota não disponível em lote.')
+    return rota, partes.path, partes.query
+
+
+def _corpo(response):
+    if hasattr(response, 'data'):
+        return response.data
+    if response.get('Content-Type', '').startswith('application/json') and not response.streaming:
+        return json.loads(response.content) # Resposta vinda do cache_page (já renderizada)
+    raise ErroLote('A rota não retorna JSON.')
+
+
+def executar_lote(request, urls):
+    """
+    Executa as URLs (GET) na ordem recebida e retorna [{'url', 'status', 'dados'}].
+
+    URLs repetidas são executadas (e contadas no limite) uma vez; objetos repetidos
+    entre URLs diferentes são buscados uma vez (ObjetoEmLoteMixin). Uma exceção
+    inesperada em uma sub-requisição vira status 500 só no item, sem derrubar o lote.
+    """
+    limite = getattr(settings, 'LOTE_MAX_REQUISICOES', 20)
+    if len(urls) > limite:
+        raise ErroLote(f'No máximo {limite} requisições por lote.')
+    objetos, executadas, respostas = {}, {}, []
+    for url in urls:
+        if url not in executadas:
+            try:
+                rota, caminho, consulta = _resolver(url)
+                sub = _sub_requisicao(request, caminho, consulta, objetos)
+                with sub_requisicao(sub, rota.func):
+                    response = rota.func(sub, *rota.args, **rota.kwargs)
+                executadas[url] = {'status': response.status_code, 'dados': _corpo(response)}
+            except ErroLote as exc:
+                executadas[url] = {'status': 400, 'dados': {'error': str(exc)}}
+            except ConsultasExcessivas: # Detector em modo 'erro' (testes): falha a requisição inteira
+                raise
+            except Exception:
+                logger.exception('Falha na sub-requisição do lote: %s', url)
+                executadas[url] = {'status': 500, 'dados': {'error': 'Erro interno.'}}
+        respostas.append({'url': url, **executadas[url]})
+    return respostas
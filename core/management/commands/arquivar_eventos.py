@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from core.arquivamento import arquivar_eventos, eventos_para_arquivar, limite_arquivamento
+
+
+class Command(BaseCommand):
+    help = 'Move eventos encerrados há mais que a retenção (com atividades e inscrições) para as tabelas de arquivo.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dias', type=int, help='Retenção em dias após data_fim (padrão: ARQUIVAMENTO_RETENCAO_DIAS).')
+        parser.add_argument('--lote', type=int, help='Eventos por transação (padrão: ARQUIVAMENTO_TAMANHO_LOTE).')
+        parser.add_argument('--simular', action='store_true', help='Apenas conta os eventos elegíveis.')
+
+    def handle(self, *args, **options):
+        limite = limite_arquivamento(options['dias'])
+        if options['simular']:
+            quantidade = eventos_para_arquivar(options['dias']).count()
+            self.stdout.write(f'{quantidade} eventos encerrados antes de {limite:%d/%m/%Y} seriam arquivados.')
+            return
+        total = arquivar_eventos(options['dias'], options['lote'])
+        self.stdout.write(self.style.SUCCESS(f'{total} eventos encerrados antes de {limite:%d/%m/%Y} arquivados.'))
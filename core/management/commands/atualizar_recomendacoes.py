@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from core.recomendacoes import atualizar_recomendacoes
+
+
+class Command(BaseCommand):
+    help = 'Atualiza os eventos similares (co-inscrição). Incremental, a partir das inscrições novas, por padrão.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--completo', action='store_true', help='Recalcula todos os eventos (considera cancelamentos e remoções).')
+        parser.add_argument('--k', type=int, help='Similares por evento (padrão: RECOMENDACOES_TOP_K).')
+
+    def handle(self, *args, **options):
+        total = atualizar_recomendacoes(completo=options['completo'], k=options['k'])
+        self.stdout.write(self.style.SUCCESS(f'Recomendações recalculadas para {total} eventos.'))
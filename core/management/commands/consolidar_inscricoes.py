@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from core.estatisticas import consolidar_inscricoes
+
+
+class Command(BaseCommand):
+    help = 'Refaz a consolidação horária das inscrições (InscricaoHora) usada pelas séries de estatísticas.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('eventos', nargs='*', type=int, help='IDs dos eventos (padrão: todos).')
+
+    def handle(self, *args, **options):
+        total = consolidar_inscricoes(options['eventos'] or None)
+        self.stdout.write(self.style.SUCCESS(f'{total} linhas consolidadas.'))
@@ -0,0 +1,21 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.caixa_saida import drenar_caixa_saida
+
+
+class Command(BaseCommand):
+    help = 'Envia os emails pendentes da caixa de saída (inclusive novas tentativas vencidas).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', type=int, metavar='SEGUNDOS', help='Continua rodando, verificando a fila a cada N segundos.')
+
+    def handle(self, *args, **options):
+        while True:
+            enviados = drenar_caixa_saida() # Respeita o drenador de outro processo
+            if enviados:
+                self.stdout.write(f'{enviados} emails enviados.')
+            if not options['loop']:
+                return
+            time.sleep(options['loop'])
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from core.paginas_estaticas import diretorio_paginas, exportar_tudo
+
+
+class Command(BaseCommand):
+    help = 'Exporta as páginas públicas (detalhes dos eventos e lista de próximos eventos) como HTML estático. Rode no deploy e periodicamente.'
+
+    def handle(self, *args, **options):
+        resultado = exportar_tudo()
+        self.stdout.write(f"Eventos regravados: {resultado['eventos']}, removidos: {resultado['removidos']}")
+        self.stdout.write(f"Páginas da lista regravadas: {resultado['lista']}")
+        self.stdout.write(self.style.SUCCESS(f'Páginas exportadas em {diretorio_paginas()}.'))
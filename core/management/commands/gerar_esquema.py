@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from core.esquema import gerar_esquema, versao_codigo
+
+
+class Command(BaseCommand):
+    help = 'Gera o esquema OpenAPI da versão atual do código (YAML e JSON) para /api/schema/. Rode no deploy.'
+
+    def handle(self, *args, **options):
+        versao = versao_codigo()
+        artefatos = gerar_esquema(versao)
+        for formato, artefato in artefatos.items():
+            self.stdout.write(f"{formato}: {len(artefato['conteudo'])} bytes, ETag {artefato['etag']}")
+        self.stdout.write(self.style.SUCCESS(f'Esquema OpenAPI gerado para a versão {versao}.'))
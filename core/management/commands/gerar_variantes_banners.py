@@ -0,0 +1,31 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from core.imagens import gerar_variantes, precisa_processar
+from core.models import Evento
+
+
+def _processar(evento_id, forcar):
+    try:
+        gerar_variantes(evento_id, forcar=forcar)
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = 'Gera (ou regenera) as variantes redimensionadas dos banners de eventos já cadastrados.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--forcar', action='store_true', help='Regenera mesmo banners já processados.')
+        parser.add_argument('--workers', type=int, default=4, help='Threads de processamento (padrão: 4).')
+
+    def handle(self, *args, **options):
+        eventos = Evento.objects.exclude(banner='').exclude(banner__isnull=True).only('id', 'banner', 'banner_variantes')
+        pendentes = [evento.pk for evento in eventos.iterator() if options['forcar'] or precisa_processar(evento)]
+        self.stdout.write(f'{len(pendentes)} banners para processar.')
+        with ThreadPoolExecutor(max_workers=options['workers']) as executor:
+            for evento_id, _ in zip(pendentes, executor.map(lambda pk: _processar(pk, options['forcar']), pendentes)):
+                self.stdout.write(f'Evento {evento_id}: variantes geradas.')
+        self.stdout.write(self.style.SUCCESS('Concluído.'))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.caixa_saida import notificar_inscritos
+from core.models import Evento
+
+
+class Command(BaseCommand):
+    help = 'Enfileira uma notificação por email para todos os inscritos de um evento, em blocos.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('evento_id', type=int)
+        parser.add_argument('--assunto', required=True)
+        parser.add_argument('--mensagem', required=True)
+        parser.add_argument('--bloco', type=int, default=1000, help='Mensagens gravadas por transação.')
+
+    def handle(self, *args, **options):
+        evento = Evento.objects.filter(pk=options['evento_id']).first()
+        if evento is None:
+            raise CommandError(f"Evento {options['evento_id']} não encontrado.")
+        total = notificar_inscritos(evento, options['assunto'], options['mensagem'], options['bloco'])
+        self.stdout.write(self.style.SUCCESS(f'{total} notificações enfileiradas para "{evento.nome}".'))
@@ -0,0 +1,42 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.middleware import estatisticas_compressao
+
+
+class Command(BaseCommand):
+    help = 'Relata os bytes economizados pelas versões .gz/.br do collectstatic e pela compressão das respostas dinâmicas.'
+
+    def handle(self, *args, **options):
+        totais = {'.gz': [0, 0, 0], '.br': [0, 0, 0]} # arquivos, bytes originais, bytes comprimidos
+        for pasta, _, arquivos in os.walk(settings.STATIC_ROOT):
+            for nome in arquivos:
+                base, extensao = os.path.splitext(nome)
+                original = os.path.join(pasta, base)
+                if extensao not in totais or not os.path.exists(original):
+                    continue
+                totais[extensao][0] += 1
+                totais[extensao][1] += os.path.getsize(original)
+                totais[extensao][2] += os.path.getsize(os.path.join(pasta, nome))
+
+        for extensao, (quantidade, original, comprimido) in totais.items():
+            if not quantidade:
+                self.stdout.write(f'{extensao}: nenhum arquivo (rode collectstatic; .br exige o pacote brotli).')
+                continue
+            economia = original - comprimido
+            self.stdout.write(
+                f'{extensao}: {quantidade} arquivos, {original} -> {comprimido} bytes '
+                f'({economia} economizados, {economia * 100 / original:.1f}%)'
+            )
+
+        dinamicas = estatisticas_compressao()
+        if not dinamicas['respostas']:
+            self.stdout.write('respostas dinâmicas: nenhuma comprimida ainda.')
+            return
+        original, economia = dinamicas['bytes_originais'], dinamicas['bytes_economizados']
+        self.stdout.write(
+            f"respostas dinâmicas: {dinamicas['respostas']} respostas, {original} -> {dinamicas['bytes_comprimidos']} bytes "
+            f'({economia} economizados, {economia * 100 / original:.1f}%)'
+        )
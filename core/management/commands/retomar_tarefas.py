@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from core.models import TarefaLote
+from core.tarefas import executar_tarefa_lote
+
+
+class Command(BaseCommand):
+    help = 'Retoma tarefas em lote interrompidas (ex: após reinício do servidor) a partir do cursor salvo.'
+
+    def handle(self, *args, **options):
+        pendentes = TarefaLote.objects.exclude(status='concluida').order_by('pk')
+        for tarefa in pendentes:
+            self.stdout.write(f'Retomando {tarefa} ...')
+            try:
+                tarefa = executar_tarefa_lote(tarefa.pk)
+            except Exception as exc:
+                self.stderr.write(f'Tarefa #{tarefa.pk} falhou: {exc}')
+                continue
+            self.stdout.write(self.style.SUCCESS(f'Tarefa #{tarefa.pk} concluída ({tarefa.processados}/{tarefa.total}).'))
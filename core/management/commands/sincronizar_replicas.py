@@ -0,0 +1,32 @@
+import sqlite3
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from core.routers import aliases_replicas
+
+
+class Command(BaseCommand):
+    help = 'Copia o banco SQLite primário para os arquivos de réplica (simula a replicação em desenvolvimento).'
+
+    def handle(self, *args, **options):
+        primario = connections['default']
+        if primario.vendor != 'sqlite':
+            raise CommandError('Disponível apenas para SQLite; no Postgres use a replicação do próprio servidor.')
+        replicas = aliases_replicas()
+        if not replicas:
+            raise CommandError('Nenhuma réplica configurada (defina DB_REPLICAS).')
+
+        origem = sqlite3.connect(primario.settings_dict['NAME'])
+        try:
+            for alias in replicas:
+                destino_nome = connections[alias].settings_dict['NAME']
+                connections[alias].close() # Libera o arquivo antes de sobrescrevê-lo
+                destino = sqlite3.connect(destino_nome)
+                try:
+                    origem.backup(destino) # API de backup online: cópia consistente mesmo com escritas em andamento
+                finally:
+                    destino.close()
+                self.stdout.write(f'{alias}: {destino_nome} sincronizada.')
+        finally:
+            origem.close()
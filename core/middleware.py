@@ -0,0 +1,389 @@
+import hashlib
+import logging
+import os
+import random
+import re
+import threading
+import time
+import uuid
+import zlib
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import FileResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from django.utils.functional import SimpleLazyObject, empty
+
+from .cache_eventos import etag_confere
+from .logs import _request_id
+from .consultas import ColetorConsultas, orcamento_da_view, problemas_da_requisicao, relatar
+from .paginas_estaticas import arquivo_da_pagina, habilitado
+from .routers import _ler_da_replica, aliases_replicas
+
+try: # Brotli é opcional: sem o pacote, negociamos apenas gzip
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+TIPOS_COMPRESSIVEIS = (
+    'text/html', 'text/csv', 'text/plain', 'text/calendar', 'application/json',
+    'application/x-ndjson', 'application/javascript', 'application/vnd.oai.openapi',
+)
+
+# Totais da compressão dinâmica: cada processo acumula em memória e, a cada
+# COMPRESSAO_INTERVALO_ESTATISTICAS segundos, soma o acumulado no cache 'compartilhado'
+# (no pool de tarefas, fora da requisição), onde o relatorio_compressao lê o total
+# de todos os workers.
+CAMPOS_ESTATISTICAS = ('respostas', 'bytes_originais', 'bytes_comprimidos')
+
+_lock = threading.Lock()
+_pendentes = dict.fromkeys(CAMPOS_ESTATISTICAS, 0)
+_ultimo_envio = time.monotonic()
+
+
+def _publicar_estatisticas(pendentes):
+    compartilhado = caches['compartilhado']
+    for campo, valor in pendentes.items():
+        if not valor:
+            continue
+        chave = f'compressao:{campo}'
+        try:
+            compartilhado.incr(chave, valor)
+        except ValueError: # Primeira publicação
+            if not compartilhado.add(chave, valor, None):
+                compartilhado.incr(chave, valor)
+
+
+def estatisticas_compressao():
+    """Totais de todos os processos (cache 'compartilhado') mais o acumulado deste, ainda não publicado."""
+    publicados = caches['compartilhado'].get_many([f'compressao:{campo}' for campo in CAMPOS_ESTATISTICAS])
+    with _lock:
+        dados = {campo: publicados.get(f'compressao:{campo}', 0) + _pendentes[campo] for campo in CAMPOS_ESTATISTICAS}
+    dados['bytes_economizados'] = dados['bytes_originais'] - dados['bytes_comprimidos']
+    return dados
+
+
+def _registrar(caminho, codificacao, original, comprimido):
+    global _ultimo_envio
+    from .tarefas import agendar
+    agora = time.monotonic()
+    with _lock:
+        _pendentes['respostas'] += 1
+        _pendentes['bytes_originais'] += original
+        _pendentes['bytes_comprimidos'] += comprimido
+        publicar = agora - _ultimo_envio >= getattr(settings, 'COMPRESSAO_INTERVALO_ESTATISTICAS', 60)
+        if publicar:
+            pendentes = dict(_pendentes)
+            _pendentes.update(dict.fromkeys(CAMPOS_ESTATISTICAS, 0))
+            _ultimo_envio = agora
+    if publicar:
+        agendar(_publicar_estatisticas, pendentes)
+    logger.debug('%s: %s %d -> %d bytes (%d economizados)', caminho, codificacao, original, comprimido, original - comprimido)
+
+
+def codificacoes_aceitas(cabecalho):
+    """Codificações aceitas pelo cliente (Accept-Encoding), ignorando as com q=0."""
+    aceitas = set()
+    for item in cabecalho.split(','):
+        partes = [parte.strip() for parte in item.split(';')]
+        if not partes[0]:
+            continue
+        qualidade = next((parte[2:] for parte in partes[1:] if parte.startswith('q=')), '1')
+        try:
+            if float(qualidade) > 0:
+                aceitas.add(partes[0].lower())
+        except ValueError:
+            continue
+    return aceitas
+
+
+class _Compressor:
+    """Interface única (compress/flush) sobre gzip (zlib) e brotli, usada de forma incremental."""
+
+    def __init__(self, codificacao):
+        if codificacao == 'br':
+            self._objeto = brotli.Compressor(quality=getattr(settings, 'COMPRESSAO_NIVEL_BROTLI', 5))
+            self.comprimir = self._objeto.process
+            self.finalizar = self._objeto.finish
+        else:
+            self._objeto = zlib.compressobj(getattr(settings, 'COMPRESSAO_NIVEL_GZIP', 6), zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+            self.comprimir = self._objeto.compress
+            self.finalizar = self._objeto.flush
+
+
+class CompressaoMiddleware:
+    """
+    Comprime respostas da API e do portal com brotli ou gzip, conforme o Accept-Encoding.
+
+    - Respostas comuns só são comprimidas acima de COMPRESSAO_TAMANHO_MINIMO bytes.
+    - Respostas em streaming (CSV, NDJSON, feeds) são comprimidas bloco a bloco, sem
+      acumular o corpo em memória.
+    - Arquivos estáticos ficam com o WhiteNoise, que serve as versões pré-comprimidas.
+    - Respostas que levam o token CSRF (formulários do portal, admin) não são
+      comprimidas: a compressão de um segredo junto de texto refletido da requisição
+      abre caminho para o BREACH.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        codificacao = self._negociar(request, response)
+        if codificacao is None:
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = self._comprimir_async(request.path, codificacao, response.streaming_content)
+            else:
+                response.streaming_content = self._comprimir_stream(request.path, codificacao, response.streaming_content)
+            response.headers.pop('Content-Length', None)
+        else:
+            original = len(response.content)
+            if original < getattr(settings, 'COMPRESSAO_TAMANHO_MINIMO', 1024):
+                return response
+            compressor = _Compressor(codificacao)
+            comprimido = compressor.comprimir(response.content) + compressor.finalizar()
+            if len(comprimido) >= original:
+                return response
+            response.content = comprimido
+            response.headers['Content-Length'] = str(len(comprimido))
+            _registrar(request.path, codificacao, original, len(comprimido))
+
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'): # A representação mudou: ETag forte vira fraco
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = codificacao
+        return response
+
+    def _negociar(self, request, response):
+        if response.has_header('Content-Encoding') or response.status_code < 200 or response.status_code == 204:
+            return None
+        if response.has_header('Content-Range'): # Intervalos se referem aos bytes sem compressão extra
+            return None
+        if request.META.get('CSRF_COOKIE_NEEDS_UPDATE'): # get_token() foi chamado: o corpo tem o token CSRF (BREACH)
+            return None
+        if request.path.startswith('/' + settings.STATIC_URL.lstrip('/')):
+            return None
+        tipo = response.get('Content-Type', '').split(';')[0].strip().lower()
+        if tipo not in TIPOS_COMPRESSIVEIS:
+            return None
+        aceitas = codificacoes_aceitas(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if brotli is not None and 'br' in aceitas:
+            return 'br'
+        if 'gzip' in aceitas:
+            return 'gzip'
+        return None
+
+    def _comprimir_stream(self, caminho, codificacao, conteudo):
+        compressor = _Compressor(codificacao)
+        original = comprimido = 0
+        for bloco in conteudo:
+            original += len(bloco)
+            saida = compressor.comprimir(bloco)
+            if saida:
+                comprimido += len(saida)
+                yield saida
+        saida = compressor.finalizar()
+        comprimido += len(saida)
+        _registrar(caminho, codificacao, original, comprimido)
+        yield saida
+
+    async def _comprimir_async(self, caminho, codificacao, conteudo):
+        compressor = _Compressor(codificacao)
+        original = comprimido = 0
+        async for bloco in conteudo:
+            original += len(bloco)
+            saida = compressor.comprimir(bloco)
+            if saida:
+                comprimido += len(saida)
+                yield saida
+        saida = compressor.finalizar()
+        comprimido += len(saida)
+        _registrar(caminho, codificacao, original, comprimido)
+        yield saida
+
+
+METODOS_SEGUROS = ('GET', 'HEAD', 'OPTIONS')
+COOKIE_FIXACAO = 'fixar_primario'
+
+
+class ReplicaMiddleware:
+    """
+    Marca as requisições de leitura para o ReplicaRouter e garante read-your-writes.
+
+    Depois de uma escrita (POST/PUT/PATCH/DELETE), o cliente fica fixado no primário
+    por REPLICA_JANELA_FIXACAO segundos, pelo cookie e também por sua credencial
+    (token ou sessão), já que clientes da API nem sempre guardam cookies. A marca da
+    credencial fica no cache 'compartilhado': a próxima requisição costuma cair em
+    outro worker. Assim a inscrição recém-criada não "some" enquanto a réplica ainda
+    não a recebeu.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not aliases_replicas():
+            return self.get_response(request)
+
+        leitura = request.method in METODOS_SEGUROS and not self._fixado(request)
+        marcador = _ler_da_replica.set(leitura)
+        try:
+            response = self.get_response(request)
+        finally:
+            _ler_da_replica.reset(marcador)
+
+        if request.method not in METODOS_SEGUROS:
+            janela = getattr(settings, 'REPLICA_JANELA_FIXACAO', 10)
+            response.set_cookie(COOKIE_FIXACAO, '1', max_age=janela, httponly=True, samesite='Lax')
+            chave = self._chave_credencial(request)
+            if chave:
+                caches['compartilhado'].set(chave, True, janela)
+        return response
+
+    def _chave_credencial(self, request):
+        credencial = request.META.get('HTTP_AUTHORIZATION') or request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+        if not credencial:
+            return None
+        return 'replica:fixar:' + hashlib.md5(credencial.encode(), usedforsecurity=False).hexdigest()
+
+    def _fixado(self, request):
+        if COOKIE_FIXACAO in request.COOKIES:
+            return True
+        chave = self._chave_credencial(request)
+        return bool(chave and caches['compartilhado'].get(chave))
+
+
+class DetectorConsultasMiddleware:
+    """
+    Detector de N+1 e orçamento de consultas por requisição (core.consultas).
+
+    Ligado por DETECTOR_CONSULTAS. Conta o SQL de cada requisição agrupado pelo
+    formato normalizado e aponta formatos repetidos DETECTOR_CONSULTAS_REPETICOES
+    vezes ou mais (com a linha do projeto que os disparou) e views acima do seu
+    'orcamento_consultas'. Em DETECTOR_CONSULTAS_MODO='log' só registra um aviso;
+    em 'erro' (testes) a requisição falha com ConsultasExcessivas. O total vai no
+    cabeçalho X-Consultas. Consultas feitas durante o streaming da resposta não contam.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not getattr(settings, 'DETECTOR_CONSULTAS', False):
+            return self.get_response(request)
+
+        coletor = ColetorConsultas()
+        request.coletor_consultas = coletor # Sub-requisições do lote contam em escopo próprio (core.consultas.sub_requisicao)
+        with coletor.coletar():
+            response = self.get_response(request)
+        response.headers['X-Consultas'] = str(coletor.total)
+        problemas = problemas_da_requisicao(coletor, getattr(request, 'orcamento_consultas', None))
+        if problemas:
+            relatar(request, problemas)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if getattr(settings, 'DETECTOR_CONSULTAS', False):
+            request.orcamento_consultas = orcamento_da_view(view_func, request.method)
+
+
+REQUEST_ID_VALIDO = re.compile(r'^[A-Za-z0-9._-]{1,64}$')
+logger_requisicoes = logging.getLogger('core.requisicoes')
+
+
+class RegistroRequisicaoMiddleware:
+    """
+    ID e tempo de cada requisição no log estruturado (core.logs).
+
+    Usa o X-Request-ID recebido (do proxy, se válido) ou gera um, devolve-o no
+    cabeçalho da resposta e o deixa disponível a todos os registros da requisição.
+    Ao final registra método, caminho, status, duração e consultas em
+    'core.requisicoes'. Respostas de sucesso rápidas são amostradas
+    (LOG_AMOSTRAGEM_REQUISICOES); erros e requisições acima de LOG_REQUISICAO_LENTA_MS
+    são sempre registrados.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        recebido = request.META.get('HTTP_X_REQUEST_ID', '')
+        request.request_id = recebido if REQUEST_ID_VALIDO.match(recebido) else uuid.uuid4().hex
+        marcador = _request_id.set(request.request_id)
+        inicio = time.perf_counter()
+        try:
+            response = self.get_response(request)
+            duracao_ms = round((time.perf_counter() - inicio) * 1000, 1)
+            response.headers['X-Request-ID'] = request.request_id
+            if self._registrar(response.status_code, duracao_ms):
+                logger_requisicoes.info(
+                    '%s %s %s', request.method, request.path, response.status_code,
+                    extra={
+                        'metodo': request.method, 'caminho': request.path, 'status': response.status_code,
+                        'duracao_ms': duracao_ms, 'consultas': response.get('X-Consultas'),
+                        'usuario': self._usuario(request),
+                    },
+                )
+            return response
+        finally:
+            _request_id.reset(marcador)
+
+    def _usuario(self, request):
+        """ID do usuário só se a requisição já o carregou (não consulta sessão nem banco só para o log)."""
+        usuario = getattr(request, 'user', None)
+        if isinstance(usuario, SimpleLazyObject) and usuario._wrapped is empty:
+            return None
+        return getattr(usuario, 'pk', None)
+
+    def _registrar(self, status, duracao_ms):
+        if status >= 400 or duracao_ms >= getattr(settings, 'LOG_REQUISICAO_LENTA_MS', 1000):
+            return True
+        return random.random() < getattr(settings, 'LOG_AMOSTRAGEM_REQUISICOES', 1.0)
+
+
+class PaginasEstaticasMiddleware:
+    """
+    Serve as páginas públicas exportadas em PAGINAS_ESTATICAS_DIR (core.paginas_estaticas).
+
+    Só para GET/HEAD anônimos (sem cookie de sessão) em URLs que têm arquivo exportado:
+    a resposta sai do disco, sem sessão, autenticação, view ou banco, com a versão .gz
+    quando o cliente aceita gzip, ETag pelo arquivo e 304 em revalidações. Sem o
+    arquivo (ainda não exportado, evento removido), a requisição segue para a view.
+    O WhiteNoise não serve este diretório porque indexa os arquivos na inicialização.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not habilitado() or request.method not in ('GET', 'HEAD') or settings.SESSION_COOKIE_NAME in request.COOKIES:
+            return self.get_response(request)
+        arquivo = arquivo_da_pagina(request.path_info, request.GET)
+        if arquivo is None:
+            return self.get_response(request)
+        codificacao = None
+        if 'gzip' in codificacoes_aceitas(request.META.get('HTTP_ACCEPT_ENCODING', '')):
+            arquivo, codificacao = arquivo.with_name(arquivo.name + '.gz'), 'gzip'
+        try:
+            descritor = open(arquivo, 'rb')
+        except FileNotFoundError:
+            return self.get_response(request)
+        estado = os.fstat(descritor.fileno())
+        etag = f'"pagina-{estado.st_mtime_ns:x}-{estado.st_size:x}{"-gz" if codificacao else ""}"'
+        if etag_confere(request, etag):
+            descritor.close()
+            response = HttpResponseNotModified()
+        else:
+            response = FileResponse(descritor, content_type='text/html; charset=utf-8')
+            if codificacao:
+                response.headers['Content-Encoding'] = codificacao
+        response.headers['ETag'] = etag
+        response.headers['Cache-Control'] = f"public, max-age={getattr(settings, 'PAGINAS_ESTATICAS_MAX_AGE', 60)}"
+        patch_vary_headers(response, ('Accept-Encoding', 'Cookie'))
+        return response
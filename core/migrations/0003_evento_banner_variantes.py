@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_tarefalote'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='evento',
+            name='banner_variantes',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
@@ -0,0 +1,100 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:37
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_evento_banner_variantes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AtividadeArquivada',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('titulo', models.CharField(max_length=200)),
+                ('descricao', models.TextField(blank=True)),
+                ('horario_inicio', models.DateTimeField()),
+                ('horario_fim', models.DateTimeField()),
+                ('tipo', models.CharField(choices=[('palestra', 'Palestra'), ('workshop', 'Workshop'), ('oficina', 'Oficina')], max_length=20)),
+            ],
+            options={
+                'verbose_name': 'Atividade arquivada',
+                'verbose_name_plural': 'Atividades arquivadas',
+                'ordering': ['horario_inicio'],
+            },
+        ),
+        migrations.CreateModel(
+            name='EventoArquivado',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('nome', models.CharField(max_length=200)),
+                ('descricao', models.TextField()),
+                ('banner', models.CharField(blank=True, max_length=255)),
+                ('data_inicio', models.DateTimeField()),
+                ('data_fim', models.DateTimeField()),
+                ('local', models.CharField(max_length=255)),
+                ('excluido_em', models.DateTimeField(blank=True, null=True)),
+                ('arquivado_em', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Evento arquivado',
+                'verbose_name_plural': 'Eventos arquivados',
+                'ordering': ['-data_inicio'],
+            },
+        ),
+        migrations.CreateModel(
+            name='InscricaoArquivada',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('data_inscricao', models.DateTimeField()),
+                ('status', models.CharField(choices=[('pendente', 'Pendente'), ('confirmado', 'Confirmado'), ('cancelado', 'Cancelado')], max_length=20)),
+            ],
+            options={
+                'verbose_name': 'Inscrição arquivada',
+                'verbose_name_plural': 'Inscrições arquivadas',
+            },
+        ),
+        migrations.AddField(
+            model_name='evento',
+            name='deleted',
+            field=models.DateTimeField(db_index=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='evento',
+            name='deleted_by_cascade',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='evento',
+            index=models.Index(condition=models.Q(('deleted__isnull', True)), fields=['data_inicio'], name='evento_ativo_inicio_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='evento',
+            index=models.Index(condition=models.Q(('deleted__isnull', True)), fields=['data_fim'], name='evento_ativo_fim_idx'),
+        ),
+        migrations.AddField(
+            model_name='atividadearquivada',
+            name='responsavel',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='atividadearquivada',
+            name='evento',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='atividades', to='core.eventoarquivado'),
+        ),
+        migrations.AddField(
+            model_name='inscricaoarquivada',
+            name='evento',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='inscricoes', to='core.eventoarquivado'),
+        ),
+        migrations.AddField(
+            model_name='inscricaoarquivada',
+            name='participante',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='inscricoes_arquivadas', to=settings.AUTH_USER_MODEL),
+        ),
+    ]
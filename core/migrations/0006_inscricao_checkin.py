@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:47
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_caixa_saida'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='evento',
+            name='organizador',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='eventos_organizados', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='inscricao',
+            name='data_checkin',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='inscricaoarquivada',
+            name='data_checkin',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='inscricao',
+            index=models.Index(fields=['evento', 'data_checkin'], name='inscricao_checkin_idx'),
+        ),
+    ]
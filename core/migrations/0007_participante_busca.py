@@ -0,0 +1,58 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:52
+
+import core.models
+import re
+
+from django.db import migrations, models
+
+
+def preencher_busca(apps, schema_editor):
+    Participante = apps.get_model('core', 'Participante')
+    alterados = []
+    for participante in Participante.objects.only('username', 'email', 'celular').iterator(chunk_size=2000):
+        participante.username_normalizado = (participante.username or '').strip().lower()
+        participante.email_normalizado = (participante.email or '').strip().lower()
+        participante.celular_digitos = re.sub(r'\D', '', participante.celular or '')
+        participante.celular_invertido = participante.celular_digitos[::-1]
+        alterados.append(participante)
+        if len(alterados) == 2000:
+            Participante.objects.bulk_update(alterados, ['username_normalizado', 'email_normalizado', 'celular_digitos', 'celular_invertido'])
+            alterados = []
+    Participante.objects.bulk_update(alterados, ['username_normalizado', 'email_normalizado', 'celular_digitos', 'celular_invertido'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_inscricao_checkin'),
+    ]
+
+    operations = [
+        migrations.AlterModelManagers(
+            name='participante',
+            managers=[
+                ('objects', core.models.ParticipanteManager()),
+            ],
+        ),
+        migrations.AddField(
+            model_name='participante',
+            name='celular_digitos',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=20),
+        ),
+        migrations.AddField(
+            model_name='participante',
+            name='celular_invertido',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=20),
+        ),
+        migrations.AddField(
+            model_name='participante',
+            name='email_normalizado',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=254),
+        ),
+        migrations.AddField(
+            model_name='participante',
+            name='username_normalizado',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=150),
+        ),
+        migrations.RunPython(preencher_busca, migrations.RunPython.noop),
+    ]
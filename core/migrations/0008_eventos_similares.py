@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:54
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_participante_busca'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EstadoRecomendacoes',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ultima_inscricao', models.BigIntegerField(default=0)),
+                ('atualizado_em', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='EventoSimilar',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('posicao', models.PositiveSmallIntegerField()),
+                ('pontuacao', models.FloatField()),
+                ('em_comum', models.PositiveIntegerField()),
+                ('evento', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='similares', to='core.evento')),
+                ('similar', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.evento')),
+            ],
+            options={
+                'verbose_name': 'Evento similar',
+                'verbose_name_plural': 'Eventos similares',
+                'ordering': ['evento', 'posicao'],
+                'constraints': [models.UniqueConstraint(fields=('evento', 'posicao'), name='evento_similar_posicao_unica')],
+            },
+        ),
+    ]
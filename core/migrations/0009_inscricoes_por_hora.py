@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_eventos_similares'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InscricaoHora',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('evento_id', models.BigIntegerField()),
+                ('hora', models.DateTimeField()),
+                ('status', models.CharField(choices=[('pendente', 'Pendente'), ('confirmado', 'Confirmado'), ('cancelado', 'Cancelado')], max_length=20)),
+                ('tipo', models.CharField(choices=[('estudante', 'Estudante'), ('convidado', 'Convidado'), ('palestrante', 'Palestrante'), ('organizador', 'Organizador')], max_length=20)),
+                ('total', models.PositiveIntegerField()),
+            ],
+            options={
+                'verbose_name': 'Inscrições por hora',
+                'verbose_name_plural': 'Inscrições por hora',
+                'indexes': [models.Index(fields=['hora'], name='inscricao_hora_idx')],
+                'constraints': [models.UniqueConstraint(fields=('evento_id', 'hora', 'status', 'tipo'), name='inscricao_hora_unica')],
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_inscricoes_por_hora'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='inscricao',
+            index=models.Index(fields=['evento', 'id'], name='inscricao_roster_idx'),
+        ),
+    ]
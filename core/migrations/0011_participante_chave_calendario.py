@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_inscricao_roster'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='participante',
+            name='chave_calendario',
+            field=models.CharField(blank=True, editable=False, max_length=32),
+        ),
+    ]
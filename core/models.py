@@ -1,9 +1,11 @@
-from django.db import models
-from django.contrib.auth.models import AbstractUser
+import re
+
+from django.db import connections, models
+from django.contrib.auth.models import AbstractUser, UserManager
 from django.core.exceptions import ValidationError # import necessário para validações personalizadas
 from django.utils import timezone # import necessário para manipulação de datas
 from django.db.models import Q # import necessário para consultas complexas
-from safedelete.models import SafeDeleteModel, SOFT_DELETE_CASCADE # import para soft delete
+from safedelete.models import SafeDeleteModel, SOFT_DELETE # import para soft delete
 
 class TimeStampedModel(models.Model): # Modelo abstrato para timestamps
     created_at = models.DateTimeField(auto_now_add=True) # Data de criação
@@ -12,6 +14,53 @@ class TimeStampedModel(models.Model): # Modelo abstrato para timestamps
     class Meta: # Modelo abstrato para não criar tabela no banco de dados
         abstract = True
         
+# Busca de participantes: colunas normalizadas e indexadas, mantidas pelo save()
+CAMPOS_BUSCA = ('username_normalizado', 'email_normalizado', 'celular_digitos', 'celular_invertido')
+FIM_PREFIXO = '\U0010ffff' # maior caractere Unicode: na ordem bytewise, 'x' <= valor < 'x' + FIM_PREFIXO equivale a começar com 'x'
+
+
+def apenas_digitos(valor):
+    return re.sub(r'\D', '', valor or '')
+
+
+def filtro_prefixo(campo, prefixo, vendor):
+    """
+    'campo começa com prefixo' pelo índice do campo.
+
+    No SQLite (colação BINARY, bytewise) vira um intervalo (>= e <), já que o LIKE não
+    usa índice. Nos demais bancos o intervalo só vale com colação bytewise (no
+    PostgreSQL, com a colação do banco, daria falsos positivos), então usamos
+    startswith: o Django cria para cada CharField com db_index, no PostgreSQL, um
+    índice extra com varchar_pattern_ops (<índice>_like), que atende ao LIKE 'x%'.
+    """
+    if vendor == 'sqlite':
+        return Q(**{f'{campo}__gte': prefixo, f'{campo}__lt': prefixo + FIM_PREFIXO})
+    return Q(**{f'{campo}__startswith': prefixo})
+
+
+class ParticipanteQuerySet(models.QuerySet):
+    def buscar(self, termo):
+        """
+        Busca indexada: prefixo do username ou do email (sem diferenciar maiúsculas),
+        prefixo ou final do celular (só os dígitos) e tipo exato.
+        """
+        termo = (termo or '').strip().lower()
+        if not termo:
+            return self
+        vendor = connections[self.db].vendor
+        filtro = filtro_prefixo('username_normalizado', termo, vendor) | filtro_prefixo('email_normalizado', termo, vendor)
+        digitos = apenas_digitos(termo)
+        if len(digitos) >= 2 and re.fullmatch(r'[\d\s()+.-]+', termo): # parece telefone
+            filtro |= filtro_prefixo('celular_digitos', digitos, vendor) | filtro_prefixo('celular_invertido', digitos[::-1], vendor)
+        if termo in dict(Participante.TIPO_CHOICES):
+            filtro |= Q(tipo=termo)
+        return self.filter(filtro)
+
+
+class ParticipanteManager(UserManager.from_queryset(ParticipanteQuerySet)):
+    pass
+
+
 # 1. Entidade Participante (Herança do User do Django) [cite: 51]
 class Participante(AbstractUser):
     TIPO_CHOICES = (
@@ -24,17 +73,42 @@ class Participante(AbstractUser):
     celular = models.CharField(max_length=20, blank=True, null=True)
     tipo = models.CharField(max_length=20, choices=TIPO_CHOICES, default='estudante')
 
+    # Colunas de busca (ParticipanteQuerySet.buscar), derivadas no save()
+    username_normalizado = models.CharField(max_length=150, blank=True, editable=False, db_index=True)
+    email_normalizado = models.CharField(max_length=254, blank=True, editable=False, db_index=True)
+    celular_digitos = models.CharField(max_length=20, blank=True, editable=False, db_index=True)
+    celular_invertido = models.CharField(max_length=20, blank=True, editable=False, db_index=True) # busca pelo final do número
+    chave_calendario = models.CharField(max_length=32, blank=True, editable=False) # Segredo do feed .ics (core.authentication); trocá-lo revoga as URLs
+
+    objects = ParticipanteManager()
+
+    def normalizar_busca(self):
+        self.username_normalizado = (self.username or '').strip().lower()
+        self.email_normalizado = (self.email or '').strip().lower()
+        self.celular_digitos = apenas_digitos(self.celular)
+        self.celular_invertido = self.celular_digitos[::-1]
+
+    def save(self, *args, **kwargs):
+        self.normalizar_busca()
+        if kwargs.get('update_fields') is not None: # ex.: last_login no login
+            kwargs['update_fields'] = {*kwargs['update_fields'], *CAMPOS_BUSCA}
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f"{self.username} ({self.get_tipo_display()})"
 
 # 2. Entidade Evento [cite: 40]
-class Evento(models.Model):
+class Evento(SafeDeleteModel): # delete() marca 'deleted'; Evento.objects ignora os excluídos
     nome = models.CharField(max_length=200)
     descricao = models.TextField()
     banner = models.ImageField(upload_to='banners/', blank=True, null=True) # Banner solicitado
+    banner_variantes = models.JSONField(default=dict, blank=True, editable=False) # Variantes redimensionadas (core.imagens)
     data_inicio = models.DateTimeField()
     data_fim = models.DateTimeField()
     local = models.CharField(max_length=255)
+    organizador = models.ForeignKey( # Quem criou o evento: gerencia check-in, inscritos e estatísticas
+        'Participante', on_delete=models.SET_NULL, null=True, blank=True, related_name='eventos_organizados'
+    )
     
     # Relacionamento N:N explícito via tabela Inscricao [cite: 59]
     participantes = models.ManyToManyField(
@@ -51,7 +125,21 @@ class Evento(models.Model):
         self.full_clean() # Chama a validação personalizada
         super().save(*args, **kwargs) # Salva o objeto
 
-    _safedelete_policy = SOFT_DELETE_CASCADE # Habilita soft delete com cascata
+    @property
+    def variantes_urls(self): # URLs das variantes do banner ({} enquanto não geradas)
+        from .imagens import urls_variantes
+        return urls_variantes(self)
+
+    # Soft delete só do evento: atividades e inscrições não são SafeDeleteModel (a cascata
+    # do safedelete não as alcançaria); as consultas delas filtram evento__deleted__isnull
+    _safedelete_policy = SOFT_DELETE
+
+    class Meta:
+        indexes = [ # Índices parciais: cobrem só os eventos ativos, que são os consultados
+            models.Index(fields=['data_inicio'], condition=Q(deleted__isnull=True), name='evento_ativo_inicio_idx'),
+            models.Index(fields=['data_fim'], condition=Q(deleted__isnull=True), name='evento_ativo_fim_idx'),
+            # 'deleted' já tem o db_index do próprio safedelete
+        ]
     
     def __str__(self):
         return self.nome
@@ -111,6 +199,7 @@ class Inscricao(models.Model):
     evento = models.ForeignKey(Evento, on_delete=models.CASCADE)
     data_inscricao = models.DateTimeField(auto_now_add=True)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pendente')
+    data_checkin = models.DateTimeField(null=True, blank=True) # Entrada no evento (core.checkin)
 
     def clean(self): # Validação personalizada para inscrição
         if self.evento.data_fim < timezone.now(): # Verifica se o evento já passou
@@ -122,8 +211,179 @@ class Inscricao(models.Model):
 
     class Meta:
         unique_together = ('participante', 'evento') # Evita inscrição duplicada
+        indexes = [
+            models.Index(fields=['evento', 'data_checkin'], name='inscricao_checkin_idx'), # Presentes por evento
+            models.Index(fields=['evento', 'id'], name='inscricao_roster_idx'), # Paginação por cursor dos inscritos
+        ]
         verbose_name = 'Inscrição'
         verbose_name_plural = 'Inscrições'
 
     def __str__(self):
-        return f"{self.participante.username} em {self.evento.nome}"
\ No newline at end of file
+        return f"{self.participante.username} em {self.evento.nome}"
+
+# 5. Tarefa em Lote (ações em massa do admin executadas em segundo plano)
+class TarefaLote(models.Model):
+    ACAO_CHOICES = (
+        ('confirmar', 'Confirmar inscrições'),
+        ('cancelar', 'Cancelar inscrições'),
+        ('exportar_csv', 'Exportar inscrições (CSV)'),
+    )
+    STATUS_CHOICES = (
+        ('pendente', 'Pendente'),
+        ('executando', 'Executando'),
+        ('concluida', 'Concluída'),
+        ('falhou', 'Falhou'),
+    )
+    acao = models.CharField(max_length=20, choices=ACAO_CHOICES)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pendente')
+    ids = models.JSONField(default=list) # PKs das inscrições selecionadas, em ordem crescente
+    total = models.PositiveIntegerField(default=0)
+    processados = models.PositiveIntegerField(default=0) # Cursor em 'ids': permite retomar a tarefa
+    arquivo = models.FileField(upload_to='exportacoes/', blank=True, null=True) # Nome do CSV em EXPORTACOES_DIR (fora do MEDIA_ROOT)
+    tamanho_arquivo = models.PositiveBigIntegerField(default=0) # Bytes do CSV até 'processados': a retomada trunca aqui
+    erro = models.TextField(blank=True)
+    criado_por = models.ForeignKey(Participante, on_delete=models.SET_NULL, null=True, blank=True)
+    criada_em = models.DateTimeField(auto_now_add=True)
+    atualizada_em = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-criada_em']
+        verbose_name = 'Tarefa em lote'
+        verbose_name_plural = 'Tarefas em lote'
+
+    @property
+    def progresso(self): # Percentual concluído (0-100)
+        if not self.total:
+            return 100
+        return int(self.processados * 100 / self.total)
+
+    def __str__(self):
+        return f"{self.get_acao_display()} #{self.pk} ({self.progresso}%)"
+
+
+# 6. Arquivo morto: eventos encerrados há mais que a retenção (core.arquivamento)
+class EventoArquivado(models.Model):
+    id = models.BigIntegerField(primary_key=True) # Mesmo ID do evento original
+    nome = models.CharField(max_length=200)
+    descricao = models.TextField()
+    banner = models.CharField(max_length=255, blank=True) # Caminho do arquivo em MEDIA_ROOT
+    data_inicio = models.DateTimeField()
+    data_fim = models.DateTimeField()
+    local = models.CharField(max_length=255)
+    excluido_em = models.DateTimeField(null=True, blank=True) # Preenchido se o evento estava excluído (soft delete)
+    arquivado_em = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-data_inicio']
+        verbose_name = 'Evento arquivado'
+        verbose_name_plural = 'Eventos arquivados'
+
+    def __str__(self):
+        return self.nome
+
+
+class AtividadeArquivada(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    evento = models.ForeignKey(EventoArquivado, on_delete=models.CASCADE, related_name='atividades')
+    responsavel = models.ForeignKey(Participante, on_delete=models.SET_NULL, null=True, related_name='+')
+    titulo = models.CharField(max_length=200)
+    descricao = models.TextField(blank=True)
+    horario_inicio = models.DateTimeField()
+    horario_fim = models.DateTimeField()
+    tipo = models.CharField(max_length=20, choices=Atividade.TIPO_ATIVIDADE)
+
+    class Meta:
+        ordering = ['horario_inicio']
+        verbose_name = 'Atividade arquivada'
+        verbose_name_plural = 'Atividades arquivadas'
+
+    def __str__(self):
+        return self.titulo
+
+
+class InscricaoArquivada(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    evento = models.ForeignKey(EventoArquivado, on_delete=models.CASCADE, related_name='inscricoes')
+    participante = models.ForeignKey(Participante, on_delete=models.CASCADE, related_name='inscricoes_arquivadas')
+    data_inscricao = models.DateTimeField()
+    status = models.CharField(max_length=20, choices=Inscricao.STATUS_CHOICES)
+    data_checkin = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'Inscrição arquivada'
+        verbose_name_plural = 'Inscrições arquivadas'
+
+    def __str__(self):
+        return f"{self.participante_id} em {self.evento_id}"
+
+
+# 7. Caixa de saída de emails (core.caixa_saida): gravada na transação da view, enviada em segundo plano
+class EmailPendente(models.Model):
+    STATUS_CHOICES = (
+        ('pendente', 'Pendente'),
+        ('enviado', 'Enviado'),
+        ('falhou', 'Falhou'),
+    )
+    destinatario = models.EmailField()
+    assunto = models.CharField(max_length=255)
+    corpo = models.TextField()
+    remetente = models.CharField(max_length=255, blank=True) # Vazio: DEFAULT_FROM_EMAIL
+    responder_para = models.EmailField(blank=True)
+    chave = models.CharField(max_length=255, unique=True, null=True, blank=True) # Evita duplicar notificações em massa
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pendente')
+    tentativas = models.PositiveSmallIntegerField(default=0)
+    proxima_tentativa = models.DateTimeField(default=timezone.now) # Também serve de "lease" enquanto um envio está em curso
+    lote = models.CharField(max_length=32, blank=True) # Marca do processo que reservou a mensagem
+    erro = models.TextField(blank=True)
+    criado_em = models.DateTimeField(auto_now_add=True)
+    enviado_em = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['pk']
+        indexes = [models.Index(fields=['status', 'proxima_tentativa'], name='email_fila_idx')]
+        verbose_name = 'Email pendente'
+        verbose_name_plural = 'Caixa de saída'
+
+    def __str__(self):
+        return f"{self.assunto} -> {self.destinatario} ({self.get_status_display()})"
+
+
+# 8. Recomendações "quem se inscreveu neste evento também se inscreveu em" (core.recomendacoes)
+class EventoSimilar(models.Model):
+    evento = models.ForeignKey(Evento, on_delete=models.CASCADE, related_name='similares')
+    similar = models.ForeignKey(Evento, on_delete=models.CASCADE, related_name='+')
+    posicao = models.PositiveSmallIntegerField() # 0 = mais parecido
+    pontuacao = models.FloatField() # Similaridade do cosseno entre os conjuntos de inscritos
+    em_comum = models.PositiveIntegerField() # Participantes inscritos nos dois eventos
+
+    class Meta:
+        ordering = ['evento', 'posicao']
+        constraints = [models.UniqueConstraint(fields=['evento', 'posicao'], name='evento_similar_posicao_unica')] # Também é o índice da leitura
+        verbose_name = 'Evento similar'
+        verbose_name_plural = 'Eventos similares'
+
+    def __str__(self):
+        return f"{self.evento_id} -> {self.similar_id} ({self.pontuacao:.2f})"
+
+
+class EstadoRecomendacoes(models.Model): # Linha única: até qual inscrição as recomendações já consideram
+    ultima_inscricao = models.BigIntegerField(default=0)
+    atualizado_em = models.DateTimeField(auto_now=True)
+
+
+# 9. Consolidação horária das inscrições para os gráficos (core.estatisticas)
+class InscricaoHora(models.Model):
+    evento_id = models.BigIntegerField() # Sem FK: a série continua com os eventos arquivados (EventoArquivado mantém o ID)
+    hora = models.DateTimeField() # Início da hora (UTC) de data_inscricao
+    status = models.CharField(max_length=20, choices=Inscricao.STATUS_CHOICES)
+    tipo = models.CharField(max_length=20, choices=Participante.TIPO_CHOICES) # Tipo do participante
+    total = models.PositiveIntegerField()
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['evento_id', 'hora', 'status', 'tipo'], name='inscricao_hora_unica')] # Séries por evento
+        indexes = [models.Index(fields=['hora'], name='inscricao_hora_idx')] # Séries gerais
+        verbose_name = 'Inscrições por hora'
+        verbose_name_plural = 'Inscrições por hora'
+
+    def __str__(self):
+        return f"{self.evento_id} {self.hora:%Y-%m-%d %H}h {self.status}/{self.tipo}: {self.total}"
@@ -0,0 +1,159 @@
+import gzip
+import logging
+import os
+import re
+import shutil
+import tempfile
+from functools import partial
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.db import transaction
+from django.http import Http404, HttpRequest, QueryDict
+
+from .models import Evento
+from .tarefas import agendar
+
+logger = logging.getLogger(__name__)
+
+# Exportação estática das páginas públicas (detalhes de cada evento e lista de próximos
+# eventos). As páginas são renderizadas pelas próprias views, como para um visitante
+# anônimo, e gravadas em PAGINAS_ESTATICAS_DIR no formato <caminho>/index.html (com a
+# versão .gz ao lado). O PaginasEstaticasMiddleware as serve antes de sessão, autenticação
+# e views; um nginx/CDN pode servir o mesmo diretório diretamente.
+#
+# - /evento/<id>/              -> evento/<id>/index.html
+# - / e /eventos/ (?page=N)    -> eventos/<N>/index.html
+#
+# Cada alteração reexporta só a página do evento alterado (e a lista, se o card mudou);
+# arquivos cujo conteúdo não mudou não são regravados. A lista só mostra eventos futuros:
+# rode 'exportar_paginas' periodicamente para tirar dela os que já começaram.
+
+ROTA_EVENTO = re.compile(r'^/evento/(\d+)/$')
+ROTAS_LISTA = ('/', '/eventos/')
+
+
+def diretorio_paginas():
+    return Path(getattr(settings, 'PAGINAS_ESTATICAS_DIR', Path(settings.BASE_DIR) / 'paginas_estaticas'))
+
+
+def habilitado():
+    return getattr(settings, 'PAGINAS_ESTATICAS', False)
+
+
+def arquivo_da_pagina(caminho, consulta):
+    """Arquivo exportado que responde a esta URL, ou None (querystrings além de ?page=N vão para a view)."""
+    encontrado = ROTA_EVENTO.match(caminho)
+    if encontrado and not consulta:
+        return diretorio_paginas() / 'evento' / encontrado.group(1) / 'index.html'
+    if caminho in ROTAS_LISTA and set(consulta) <= {'page'}:
+        pagina = consulta.get('page', '1')
+        if pagina.isdigit() and int(pagina) > 0 and len(consulta.getlist('page')) <= 1:
+            return diretorio_paginas() / 'eventos' / str(int(pagina)) / 'index.html'
+    return None
+
+
+def _renderizar(view, caminho, consulta='', **kwargs):
+    """HTML da view para um visitante anônimo, ou None se a página não existe (404)."""
+    request = HttpRequest()
+    request.method = 'GET'
+    request.path = request.path_info = caminho
+    request.META = {
+        'REQUEST_METHOD': 'GET', 'PATH_INFO': caminho, 'QUERY_STRING': consulta,
+        'SERVER_NAME': (settings.ALLOWED_HOSTS or ['localhost'])[0].lstrip('.'), 'SERVER_PORT': '80',
+    }
+    request.GET = QueryDict(consulta)
+    request.user = AnonymousUser()
+    try:
+        response = view(request, **kwargs)
+    except Http404:
+        return None
+    if hasattr(response, 'render'):
+        response.render()
+    return response.content if response.status_code == 200 else None
+
+
+def _gravar(arquivo, conteudo):
+    """Grava HTML e .gz (escrita atômica) se o conteúdo mudou. Retorna True se gravou."""
+    if arquivo.exists() and arquivo.read_bytes() == conteudo:
+        return False
+    arquivo.parent.mkdir(parents=True, exist_ok=True)
+    for destino, dados in ((arquivo.with_name(arquivo.name + '.gz'), gzip.compress(conteudo, compresslevel=9, mtime=0)), (arquivo, conteudo)):
+        descritor, temporario = tempfile.mkstemp(dir=arquivo.parent, prefix='.pagina-')
+        with os.fdopen(descritor, 'wb') as saida:
+            saida.write(dados)
+        os.replace(temporario, destino)
+    return True
+
+
+def exportar_evento(evento_id):
+    """(Re)exporta a página do evento; remove-a se o evento não existe mais. Retorna True se algo mudou."""
+    from .views import EventoDetailView
+    pasta = diretorio_paginas() / 'evento' / str(evento_id)
+    conteudo = _renderizar(EventoDetailView.as_view(), f'/evento/{evento_id}/', pk=evento_id)
+    if conteudo is None:
+        existia = pasta.exists()
+        shutil.rmtree(pasta, ignore_errors=True)
+        return existia
+    return _gravar(pasta / 'index.html', conteudo)
+
+
+def exportar_lista():
+    """Exporta todas as páginas da lista de próximos eventos e remove as que sobraram. Retorna as páginas gravadas."""
+    from .views import EventosListView
+    view, pagina, gravadas = EventosListView.as_view(), 1, 0
+    while True:
+        conteudo = _renderizar(view, '/eventos/', f'page={pagina}')
+        if conteudo is None:
+            break
+        gravadas += _gravar(diretorio_paginas() / 'eventos' / str(pagina) / 'index.html', conteudo)
+        pagina += 1
+    pasta = diretorio_paginas() / 'eventos'
+    if pasta.exists():
+        for sobra in pasta.iterdir():
+            if sobra.name.isdigit() and int(sobra.name) >= max(pagina, 2): # a primeira página existe mesmo vazia
+                shutil.rmtree(sobra, ignore_errors=True)
+    return gravadas
+
+
+def exportar_tudo():
+    """Exportação completa (comando exportar_paginas). Retorna {'eventos': gravados, 'removidos': n, 'lista': páginas gravadas}."""
+    ids = set(Evento.objects.values_list('pk', flat=True))
+    gravados = sum(exportar_evento(evento_id) for evento_id in sorted(ids))
+    removidos = 0
+    pasta = diretorio_paginas() / 'evento'
+    if pasta.exists():
+        for sobra in pasta.iterdir():
+            if not sobra.name.isdigit() or int(sobra.name) not in ids: # excluídos ou arquivados
+                shutil.rmtree(sobra, ignore_errors=True)
+                removidos += 1
+    return {'eventos': gravados, 'removidos': removidos, 'lista': exportar_lista()}
+
+
+def _executar_pendente(chave, funcao, *args):
+    cache.delete(chave) # Antes de ler o banco: mudanças durante a exportação agendam outra
+    try:
+        funcao(*args)
+    except Exception:
+        logger.exception('Falha ao exportar a página estática (%s)', chave)
+
+
+def _enfileirar(evento_id, lista):
+    pendentes = [(f'paginas:evento:{evento_id}', exportar_evento, (evento_id,))]
+    if lista:
+        pendentes.append(('paginas:lista', exportar_lista, ()))
+    for chave, funcao, args in pendentes:
+        if cache.add(chave, True, 60 * 10):
+            agendar(_executar_pendente, chave, funcao, *args)
+
+
+def agendar_exportacao(evento_id, lista=True):
+    """
+    Agenda, após o commit, a reexportação da página do evento e, com 'lista', das
+    páginas da lista (que mostram os cards). No máximo uma pendente de cada; a marca
+    de pendente só é criada no commit, para um rollback não bloquear as próximas.
+    """
+    if habilitado():
+        transaction.on_commit(partial(_enfileirar, evento_id, lista))
@@ -1,8 +1,51 @@
-from rest_framework.pagination import PageNumberPagination
+import hashlib
+
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.utils.functional import cached_property
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+from .cache_eventos import versao_lista_eventos
+from .routers import no_primario
 
 class CustomPagination(PageNumberPagination):
     page_size = 20
     page_size_query_param = 'tamanho'
     max_page_size = 100
 
-# Configuração básica de logging para registrar eventos importantes
\ No newline at end of file
+class RosterPagination(CursorPagination):
+    """
+    Paginação por cursor (keyset) dos inscritos de um evento: cada página continua
+    do último ID de inscrição visto (id > cursor), sem OFFSET nem COUNT, então o custo
+    não cresce com a página pedida nem com o tamanho do evento.
+    """
+    ordering = 'pk'
+    page_size = 100
+    page_size_query_param = 'tamanho'
+    max_page_size = 1000
+
+class PaginatorContagemCache(Paginator):
+    """
+    Paginator das páginas HTML de eventos que guarda o COUNT em cache.
+
+    'chave_contagem' identifica a consulta (view + filtros da querystring); a versão
+    das listagens entra na chave, então qualquer alteração em eventos invalida as contagens.
+    """
+    def __init__(self, *args, chave_contagem=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.chave_contagem = chave_contagem
+
+    @cached_property
+    def count(self):
+        if self.chave_contagem is None:
+            return super().count
+        digest = hashlib.md5(self.chave_contagem.encode(), usedforsecurity=False).hexdigest()
+        chave = f'eventos:contagem:{digest}:{versao_lista_eventos()}'
+        total = cache.get(chave)
+        if total is None:
+            with no_primario():
+                total = super().count
+            cache.set(chave, total, 60 * 15)
+        return total
+
+# Configuração básica de logging para registrar eventos importantes
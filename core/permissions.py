@@ -26,4 +26,21 @@ class IsResponsavelOrReadOnly(BasePermission):
     def has_object_permission(self, request, view, obj):
         if request.method in ['GET', 'HEAD', 'OPTIONS']:
             return True
-        return obj.responsavel == request.user
\ No newline at end of file
+        return obj.responsavel == request.user
+
+
+def organiza_evento(user, evento):
+    """Staff ou o organizador do evento (o 'tipo' do participante é escolhido no cadastro e não basta)."""
+    return user.is_authenticated and (user.is_staff or evento.organizador_id == user.pk)
+
+
+class IsOrganizadorDoEvento(BasePermission):
+    """
+    Acesso apenas para o organizador do evento (e staff), inclusive leitura.
+    """
+    def has_permission(self, request, view):
+        return request.user.is_authenticated
+
+    def has_object_permission(self, request, view, obj):
+        return organiza_evento(request.user, obj)
+
@@ -0,0 +1,56 @@
+from django.core.cache import cache
+from django.utils import timezone
+
+from .models import Evento, Atividade
+from .cache_eventos import versao_programacao
+from .routers import no_primario
+
+# Programação do evento: atividades agrupadas por dia (fuso do projeto) e ordenadas
+# pelo início, com o responsável no mesmo JOIN. A programação completa fica em cache
+# pela versão da programação (evento, atividade ou palestrante alterados geram outra
+# chave; inscrições e check-ins não); os filtros de tipo e período são aplicados
+# sobre a versão em cache.
+
+TIMEOUT_PROGRAMACAO = 60 * 60 * 24
+
+
+def programacao_evento(evento_id):
+    """
+    Programação completa do evento. Retorna (versao, dados), com dados None se o evento
+    não existe. Duas consultas quando não está em cache; nenhuma quando está.
+    """
+    versao = versao_programacao(evento_id)
+    chave = f'programacao:{evento_id}:{versao}'
+    dados = cache.get(chave)
+    if dados is None:
+        with no_primario():
+            if not Evento.objects.filter(pk=evento_id).exists():
+                return versao, None
+            dias = {}
+            atividades = Atividade.objects.filter(evento_id=evento_id).select_related('responsavel').order_by('horario_inicio', 'pk')
+            for atividade in atividades:
+                responsavel = atividade.responsavel
+                dia = timezone.localtime(atividade.horario_inicio).date()
+                dias.setdefault(dia, []).append({
+                    'id': atividade.pk, 'titulo': atividade.titulo, 'descricao': atividade.descricao, 'tipo': atividade.tipo,
+                    'inicio': atividade.horario_inicio, 'fim': atividade.horario_fim,
+                    'responsavel': responsavel and {'id': responsavel.pk, 'nome': responsavel.get_full_name() or responsavel.username},
+                })
+            dados = {'evento': evento_id, 'dias': [{'dia': dia, 'atividades': itens} for dia, itens in dias.items()]}
+        cache.set(chave, dados, TIMEOUT_PROGRAMACAO)
+    return versao, dados
+
+
+def filtrar_programacao(dados, tipo=None, inicio=None, fim=None):
+    """Atividades do tipo e que se sobrepõem a [inicio, fim]; dias que ficam vazios saem."""
+    dias = []
+    for dia in dados['dias']:
+        atividades = [
+            atividade for atividade in dia['atividades']
+            if (tipo is None or atividade['tipo'] == tipo)
+            and (inicio is None or atividade['fim'] > inicio)
+            and (fim is None or atividade['inicio'] < fim)
+        ]
+        if atividades:
+            dias.append({'dia': dia['dia'], 'atividades': atividades})
+    return {**dados, 'dias': dias}
@@ -0,0 +1,155 @@
+import heapq
+import logging
+import math
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Max
+
+from .models import Evento, Inscricao, EventoSimilar, EstadoRecomendacoes
+from .cache_eventos import invalidar_evento
+from .paginas_estaticas import agendar_exportacao
+
+logger = logging.getLogger(__name__)
+
+# Eventos similares por co-inscrição ("quem se inscreveu neste evento também se
+# inscreveu em"). A matriz evento x participante é esparsa: cada evento é o conjunto
+# dos seus inscritos, e a similaridade entre dois eventos é o cosseno entre esses
+# conjuntos: em_comum / sqrt(|A| * |B|). Só pares com ao menos um inscrito em comum
+# são visitados. O resultado (top K por evento) fica em EventoSimilar.
+
+TAMANHO_BLOCO = 200 # eventos recalculados por transação
+TAMANHO_IN = 900 # valores por cláusula IN
+
+
+def _ativas():
+    return Inscricao.objects.exclude(status='cancelado').filter(evento__deleted__isnull=True)
+
+
+def _pares(campo, ids, *valores):
+    """values_list(*valores) das inscrições ativas com 'campo' em ids, em blocos de TAMANHO_IN."""
+    ids = list(ids)
+    for inicio in range(0, len(ids), TAMANHO_IN):
+        yield from _ativas().filter(**{f'{campo}__in': ids[inicio:inicio + TAMANHO_IN]}).values_list(*valores).iterator(chunk_size=5000)
+
+
+def _tamanhos(eventos_ids):
+    """Número de inscritos ativos de cada evento."""
+    eventos_ids, tamanhos = list(eventos_ids), {}
+    for inicio in range(0, len(eventos_ids), TAMANHO_IN):
+        contagens = (
+            _ativas().filter(evento_id__in=eventos_ids[inicio:inicio + TAMANHO_IN])
+            .values('evento_id').annotate(total=Count('pk')).values_list('evento_id', 'total')
+        )
+        tamanhos.update(contagens)
+    return tamanhos
+
+
+def calcular_similares(eventos_ids, k):
+    """
+    Top K similares de cada evento em 'eventos_ids'.
+
+    Retorna {evento_id: [(similar_id, pontuacao, em_comum), ...]} em ordem decrescente.
+    Lê só as inscrições dos participantes desses eventos (as colunas esparsas da matriz).
+    """
+    inscritos = defaultdict(set) # evento -> participantes
+    for evento_id, participante_id in _pares('evento_id', eventos_ids, 'evento_id', 'participante_id'):
+        inscritos[evento_id].add(participante_id)
+    participantes = set().union(*inscritos.values())
+
+    eventos_de = defaultdict(list) # participante -> eventos
+    for participante_id, evento_id in _pares('participante_id', participantes, 'participante_id', 'evento_id'):
+        eventos_de[participante_id].append(evento_id)
+    tamanhos = _tamanhos({evento_id for eventos in eventos_de.values() for evento_id in eventos}) # |B| de cada vizinho
+
+    resultado = {}
+    for evento_id in eventos_ids:
+        em_comum = Counter()
+        for participante_id in inscritos.get(evento_id, ()):
+            em_comum.update(eventos_de[participante_id])
+        em_comum.pop(evento_id, None)
+        tamanho = len(inscritos.get(evento_id, ()))
+        candidatos = (
+            (comum / math.sqrt(tamanho * tamanhos[similar_id]), comum, -similar_id)
+            for similar_id, comum in em_comum.items()
+        )
+        resultado[evento_id] = [
+            (-similar_negativo, round(pontuacao, 6), comum)
+            for pontuacao, comum, similar_negativo in heapq.nlargest(k, candidatos)
+        ]
+    return resultado
+
+
+def _gravar(similares):
+    """Substitui as linhas dos eventos calculados. Retorna os eventos cuja lista mudou."""
+    atuais = defaultdict(list)
+    for evento_id, similar_id, pontuacao, em_comum in (
+        EventoSimilar.objects.filter(evento_id__in=list(similares)).order_by('evento_id', 'posicao')
+        .values_list('evento_id', 'similar_id', 'pontuacao', 'em_comum')
+    ):
+        atuais[evento_id].append((similar_id, pontuacao, em_comum))
+    alterados = [evento_id for evento_id, lista in similares.items() if atuais.get(evento_id, []) != lista]
+    if alterados:
+        EventoSimilar.objects.filter(evento_id__in=alterados).delete()
+        EventoSimilar.objects.bulk_create(
+            EventoSimilar(evento_id=evento_id, similar_id=similar_id, posicao=posicao, pontuacao=pontuacao, em_comum=em_comum)
+            for evento_id in alterados
+            for posicao, (similar_id, pontuacao, em_comum) in enumerate(similares[evento_id])
+        )
+    return alterados
+
+
+def eventos_afetados(desde_inscricao, ate_inscricao):
+    """
+    Eventos cujas recomendações mudam com as inscrições em (desde, ate]: os eventos
+    das novas inscrições e todos os que compartilham algum inscrito com eles (o
+    tamanho desses eventos entra no cosseno dos vizinhos).
+    """
+    novos = set(
+        Inscricao.objects.filter(pk__gt=desde_inscricao, pk__lte=ate_inscricao)
+        .values_list('evento_id', flat=True).distinct()
+    )
+    participantes = {participante_id for (participante_id,) in _pares('evento_id', novos, 'participante_id')}
+    vizinhos = {evento_id for (evento_id,) in _pares('participante_id', participantes, 'evento_id')}
+    return novos | vizinhos
+
+
+def atualizar_recomendacoes(completo=False, k=None):
+    """
+    Atualiza EventoSimilar. Incremental por padrão: só recalcula os eventos afetados
+    pelas inscrições criadas desde a última execução (EstadoRecomendacoes). Cancelamentos
+    e remoções não criam inscrições novas; a execução 'completo' recalcula tudo.
+
+    Retorna o número de eventos recalculados.
+    """
+    k = k or getattr(settings, 'RECOMENDACOES_TOP_K', 5)
+    estado, _ = EstadoRecomendacoes.objects.get_or_create(pk=1)
+    ultima = Inscricao.objects.aggregate(ultima=Max('pk'))['ultima'] or 0
+    if completo:
+        eventos_ids = set(Evento.objects.values_list('pk', flat=True))
+        EventoSimilar.objects.exclude(evento_id__in=Evento.objects.values('pk')).delete() # eventos excluídos
+    else:
+        eventos_ids = eventos_afetados(estado.ultima_inscricao, ultima)
+
+    eventos_ids = sorted(eventos_ids)
+    for inicio in range(0, len(eventos_ids), TAMANHO_BLOCO):
+        bloco = eventos_ids[inicio:inicio + TAMANHO_BLOCO]
+        with transaction.atomic():
+            alterados = _gravar(calcular_similares(bloco, k))
+        for evento_id in alterados:
+            invalidar_evento(evento_id) # página do evento (cache por versão) mostra as recomendações
+            agendar_exportacao(evento_id, lista=False)
+
+    estado.ultima_inscricao = ultima
+    estado.save(update_fields=['ultima_inscricao', 'atualizado_em'])
+    logger.info('Recomendações atualizadas para %d eventos (completo=%s)', len(eventos_ids), completo)
+    return len(eventos_ids)
+
+
+def similares_do_evento(evento_id):
+    """Leitura: uma consulta pelo índice único (evento, posicao)."""
+    return (
+        EventoSimilar.objects.filter(evento_id=evento_id, similar__deleted__isnull=True)
+        .select_related('similar').order_by('posicao')
+    )
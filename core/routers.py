@@ -0,0 +1,72 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+
+# Ligado pelo ReplicaMiddleware durante requisições de leitura que podem ir para réplicas
+_ler_da_replica = ContextVar('ler_da_replica', default=False)
+
+
+def ler_da_replica():
+    return _ler_da_replica.get()
+
+
+@contextmanager
+def no_primario():
+    """
+    Leituras do bloco vão para o primário, mesmo em requisições marcadas para réplica.
+
+    Usado ao preencher caches por versão: depois de uma escrita incrementar a versão,
+    uma réplica atrasada gravaria linhas antigas na chave nova até o timeout.
+    """
+    marcador = _ler_da_replica.set(False)
+    try:
+        yield
+    finally:
+        _ler_da_replica.reset(marcador)
+
+
+def aliases_replicas():
+    """Aliases configurados como réplica de leitura (DB_REPLICAS gera replica_1, replica_2, ...)."""
+    return [alias for alias in settings.DATABASES if alias.startswith('replica_')]
+
+
+class ReplicaRouter:
+    """
+    Roteia o app 'core' entre o primário ('default') e as réplicas de leitura.
+
+    Escritas sempre vão para o primário. Leituras só vão para uma réplica quando o
+    ReplicaMiddleware marcou a requisição (método seguro, usuário fora da janela de
+    fixação) e não há transação aberta no primário; fora de requisições (admin
+    actions, tarefas, comandos) e no preenchimento de caches por versão
+    (no_primario) tudo fica no primário.
+    """
+    app_label = 'core'
+
+    def __init__(self, replicas=None):
+        self.replicas = aliases_replicas() if replicas is None else replicas
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label != self.app_label or not self.replicas or not ler_da_replica():
+            return None
+        if connections['default'].in_atomic_block: # Leituras dentro de transação enxergam as próprias escritas
+            return 'default'
+        return random.choice(self.replicas)
+
+    def db_for_write(self, model, **hints):
+        if model._meta.app_label == self.app_label:
+            return 'default'
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        bancos = {'default', *self.replicas}
+        if obj1._state.db in bancos and obj2._state.db in bancos:
+            return True # Réplicas têm os mesmos dados do primário
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in self.replicas:
+            return False # Réplicas recebem o schema pela replicação
+        return None
@@ -1,13 +1,15 @@
+from collections import Counter
+
 from rest_framework import serializers
 from django.db.models import Count # import para agregações
-from .models import Participante, Evento, Atividade, Inscricao
+from .models import Participante, Evento, Atividade, Inscricao, EventoArquivado, AtividadeArquivada, EventoSimilar
 
 class ParticipanteRegistroSerializer(serializers.ModelSerializer): # Serializer para registro de participantes
     password_confirm = serializers.CharField(write_only=True)
 
     class Meta: # Meta do serializer
         model = Participante
-        fields = ['username', 'email', 'password', 'password_confirm', 'celular', 'tipo']
+        fields = ['username', 'email', 'password', 'password_confirm', 'celular'] # 'tipo' fica no padrão; organizadores são definidos pelo admin
         extra_kwargs = { 
             'password': {'write_only': True} # senha não será exibida
         }
@@ -34,14 +36,27 @@ class AtividadeSerializer(serializers.ModelSerializer):
         model = Atividade
         fields = '__all__'
 
+class EventoResumoSerializer(serializers.ModelSerializer): # Resumo embutido nas inscrições (sem atividades)
+    banner = serializers.SerializerMethodField() # Variante 'card' do banner, se já gerada
+
+    class Meta:
+        model = Evento
+        fields = ['id', 'nome', 'local', 'data_inicio', 'data_fim', 'banner']
+
+    def get_banner(self, obj):
+        url = obj.variantes_urls.get('card')
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if url and request is not None else url
+
 class InscricaoSerializer(serializers.ModelSerializer):
     participante_nome = serializers.CharField(source='participante.username', read_only=True)
     evento_nome = serializers.CharField(source='evento.nome', read_only=True)
+    evento_resumo = EventoResumoSerializer(source='evento', read_only=True) # Evita um GET /api/eventos/{id}/ por inscrição
     
     class Meta:
         model = Inscricao
-        fields = ['id', 'evento', 'evento_nome', 'participante', 'participante_nome', 'data_inscricao', 'status']
-        read_only_fields = ['data_inscricao']
+        fields = ['id', 'evento', 'evento_nome', 'evento_resumo', 'participante', 'participante_nome', 'data_inscricao', 'status', 'data_checkin']
+        read_only_fields = ['data_inscricao', 'data_checkin'] # check-in só pelo endpoint de check-in do evento
 
 class RelatorioParticipacaoSerializer(serializers.ModelSerializer): # Serializer para relatório de participação
     participante_nome = serializers.CharField(source='participante.username', read_only=True) # Nome do participante
@@ -54,16 +69,35 @@ class RelatorioParticipacaoSerializer(serializers.ModelSerializer): # Serializer
         fields = ['participante_nome', 'participante_email', 'participante_tipo', 'data_inscricao', 'status', 'atividades_responsavel']
 
     def get_atividades_responsavel(self, obj): # Método para obter atividades em que o participante é responsável
+        por_responsavel = self.context.get('atividades_por_responsavel') # Montado uma vez pela view (sem consulta por linha)
+        if por_responsavel is not None:
+            return por_responsavel.get(obj.participante_id, [])
         atividades = Atividade.objects.filter(evento=obj.evento, responsavel=obj.participante)
         return [atividade.titulo for atividade in atividades]
 
 class EventoSerializer(serializers.ModelSerializer):
     # Serializer aninhado para leitura (mostra as atividades dentro do evento)
     atividades = AtividadeSerializer(many=True, read_only=True)
+    banner_variantes = serializers.SerializerMethodField() # URLs das versões redimensionadas do banner
     
     class Meta:
         model = Evento
-        fields = ['id', 'nome', 'descricao', 'banner', 'data_inicio', 'data_fim', 'local', 'atividades']
+        fields = ['id', 'nome', 'descricao', 'banner', 'banner_variantes', 'data_inicio', 'data_fim', 'local', 'atividades']
+
+    def get_banner_variantes(self, obj): # {} até o pool terminar de gerar as variantes
+        request = self.context.get('request')
+        urls = obj.variantes_urls
+        if request is not None:
+            return {nome: request.build_absolute_uri(url) for nome, url in urls.items()}
+        return urls
+
+class AgendaEventoSerializer(serializers.ModelSerializer): # Evento na agenda pessoal (core.agenda)
+    status_inscricao = serializers.CharField(read_only=True)
+    atividades = AtividadeSerializer(source='atividades_agenda', many=True, read_only=True) # Já filtradas pela janela
+
+    class Meta:
+        model = Evento
+        fields = ['id', 'nome', 'local', 'data_inicio', 'data_fim', 'status_inscricao', 'atividades']
 
 # Serializer especial para o Dashboard [cite: 84]
 class EventoDashboardSerializer(serializers.ModelSerializer):
@@ -79,19 +113,44 @@ class EventoDashboardSerializer(serializers.ModelSerializer):
         model = Evento
         fields = ['id', 'nome', 'local', 'total_inscritos', 'total_atividades', 'participantes_por_tipo', 'atividades_por_tipo', 'responsaveis_atividades', 'participantes_sem_atividade', 'atividades']
 
+    # Os métodos usam obj.participantes/obj.atividades (prefetch de dados_dashboard) em vez de uma consulta por campo
+
     def get_participantes_por_tipo(self, obj): # Método para obter contagem de participantes por tipo
-        tipos = Inscricao.objects.filter(evento=obj).values('participante__tipo').annotate(count=Count('participante__tipo')).order_by('participante__tipo')
-        return {tipo['participante__tipo']: tipo['count'] for tipo in tipos}
+        tipos = Counter(participante.tipo for participante in obj.participantes.all())
+        return dict(sorted(tipos.items()))
  
     def get_atividades_por_tipo(self, obj): # Método para obter contagem de atividades por tipo
-        tipos = obj.atividades.values('tipo').annotate(count=Count('tipo')).order_by('tipo')
-        return {tipo['tipo']: tipo['count'] for tipo in tipos}
+        tipos = Counter(atividade.tipo for atividade in obj.atividades.all())
+        return dict(sorted(tipos.items()))
 
     def get_responsaveis_atividades(self, obj): # Método para obter lista de responsáveis por atividades
-        responsaveis = obj.atividades.exclude(responsavel__isnull=True).values_list('responsavel__username', flat=True).distinct()
-        return list(responsaveis)
+        return list(dict.fromkeys(atividade.responsavel.username for atividade in obj.atividades.all() if atividade.responsavel))
 
     def get_participantes_sem_atividade(self, obj): # Método para obter participantes sem atividade atribuída
-        participantes_com_atividade = obj.atividades.exclude(responsavel__isnull=True).values_list('responsavel', flat=True)
-        sem_atividade = Inscricao.objects.filter(evento=obj).exclude(participante__in=participantes_com_atividade).values_list('participante__username', flat=True)
-        return list(sem_atividade)
\ No newline at end of file
+        responsaveis = {atividade.responsavel_id for atividade in obj.atividades.all()}
+        return [participante.username for participante in obj.participantes.all() if participante.pk not in responsaveis]
+
+class AtividadeArquivadaSerializer(serializers.ModelSerializer):
+    responsavel_nome = serializers.CharField(source='responsavel.username', read_only=True, default=None)
+
+    class Meta:
+        model = AtividadeArquivada
+        fields = ['id', 'titulo', 'descricao', 'tipo', 'horario_inicio', 'horario_fim', 'responsavel', 'responsavel_nome']
+
+class EventoArquivadoSerializer(serializers.ModelSerializer): # Somente leitura (core.arquivamento)
+    atividades = AtividadeArquivadaSerializer(many=True, read_only=True)
+    total_inscritos = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = EventoArquivado
+        fields = ['id', 'nome', 'descricao', 'banner', 'data_inicio', 'data_fim', 'local', 'total_inscritos', 'arquivado_em', 'atividades']
+
+class EventoSimilarSerializer(serializers.ModelSerializer): # Recomendações pré-calculadas (core.recomendacoes)
+    id = serializers.IntegerField(source='similar.id', read_only=True)
+    nome = serializers.CharField(source='similar.nome', read_only=True)
+    local = serializers.CharField(source='similar.local', read_only=True)
+    data_inicio = serializers.DateTimeField(source='similar.data_inicio', read_only=True)
+
+    class Meta:
+        model = EventoSimilar
+        fields = ['id', 'nome', 'local', 'data_inicio', 'pontuacao', 'em_comum']
@@ -0,0 +1,110 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from safedelete.signals import post_softdelete, post_undelete
+
+from .models import Participante, Evento, Atividade, Inscricao
+from .cache_eventos import invalidar_evento, invalidar_eventos, invalidar_participantes, invalidar_programacao
+from .imagens import gerar_variantes, precisa_processar
+from .tarefas import agendar
+from .tempo_real import publicar_delta, publicar_ressincronizacao
+from .snapshot import agendar_snapshot, descartar_snapshot
+from .estatisticas import horas_afetadas, recalcular_horas
+from .paginas_estaticas import agendar_exportacao
+
+
+@receiver([post_save, post_delete], sender=Evento)
+def evento_alterado(sender, instance, **kwargs): # Qualquer edição do evento invalida seus caches (e as listagens)
+    invalidar_evento(instance.pk, lista=True)
+    invalidar_programacao([instance.pk])
+
+
+@receiver([post_softdelete, post_undelete], sender=Evento)
+def evento_excluido(sender, instance, **kwargs): # Some/volta nas agendas e feeds dos inscritos
+    invalidar_participantes(Inscricao.objects.filter(evento_id=instance.pk).values_list('participante_id', flat=True))
+    descartar_snapshot(instance.pk)
+
+
+@receiver(post_save, sender=Evento)
+def banner_alterado(sender, instance, **kwargs): # Novo banner: variantes geradas no pool, fora da requisição
+    if precisa_processar(instance):
+        agendar(gerar_variantes, instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Atividade)
+def atividade_alterada(sender, instance, **kwargs): # Atividades fazem parte do evento (detalhes, dashboard, programação)
+    invalidar_evento(instance.evento_id)
+    invalidar_programacao([instance.evento_id])
+
+
+CAMPOS_RESPONSAVEL = {'username', 'first_name', 'last_name', 'tipo'} # Exibidos na programação, snapshot e detalhes
+
+
+@receiver(post_save, sender=Participante)
+def responsavel_alterado(sender, instance, created, update_fields=None, **kwargs): # Nome do palestrante em cache nos eventos
+    if created or (update_fields is not None and not CAMPOS_RESPONSAVEL & set(update_fields)):
+        return # Ex.: login (update_fields=['last_login'])
+    eventos_ids = list(Atividade.objects.filter(responsavel=instance).values_list('evento_id', flat=True))
+    invalidar_eventos(eventos_ids)
+    invalidar_programacao(eventos_ids)
+
+
+@receiver(post_save, sender=Evento)
+@receiver([post_save, post_delete], sender=Atividade)
+def snapshot_desatualizado(sender, instance, **kwargs): # Refaz o snapshot do app em segundo plano
+    agendar_snapshot(instance.evento_id if sender is Atividade else instance.pk)
+
+
+@receiver([post_save, post_delete, post_softdelete, post_undelete], sender=Evento)
+@receiver([post_save, post_delete], sender=Atividade)
+def pagina_estatica_desatualizada(sender, instance, **kwargs): # Reexporta a página pública (PAGINAS_ESTATICAS)
+    if sender is Atividade:
+        agendar_exportacao(instance.evento_id, lista=False) # O card da lista não mostra atividades
+    else:
+        agendar_exportacao(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Inscricao)
+def inscricao_alterada(sender, instance, **kwargs): # Inscrições alteram os contadores do dashboard
+    invalidar_evento(instance.evento_id)
+    invalidar_participantes([instance.participante_id]) # ...e os caches pessoais do participante
+
+
+@receiver([post_save, post_delete], sender=Inscricao)
+def inscricao_consolidada(sender, instance, origin=None, **kwargs): # Recalcula a hora da inscrição nas séries (core.estatisticas)
+    if isinstance(origin, Evento) or getattr(origin, 'model', None) is Evento:
+        return # Remoção do evento: as linhas consolidadas saem em cascata
+    agendar(recalcular_horas, horas_afetadas([(instance.evento_id, instance.data_inscricao)]))
+
+
+# --- Dashboard ao vivo (core.tempo_real): deltas dos contadores, publicados após o commit ---
+
+def _delta_inscricao(instance, sinal):
+    if not Inscricao._meta.get_field('participante').is_cached(instance):
+        # Exclusões em massa (cascata, arquivamento) não trazem o participante: evita uma consulta por linha
+        publicar_ressincronizacao(instance.evento_id)
+        return
+    publicar_delta(instance.evento_id, total_inscritos=sinal, participantes_por_tipo={instance.participante.tipo: sinal})
+
+
+@receiver(post_save, sender=Inscricao)
+def inscricao_criada_ao_vivo(sender, instance, created, **kwargs):
+    if created:
+        _delta_inscricao(instance, 1)
+
+
+@receiver(post_delete, sender=Inscricao)
+def inscricao_removida_ao_vivo(sender, instance, **kwargs):
+    _delta_inscricao(instance, -1)
+
+
+@receiver(post_save, sender=Atividade)
+def atividade_salva_ao_vivo(sender, instance, created, **kwargs):
+    if created:
+        publicar_delta(instance.evento_id, total_atividades=1, atividades_por_tipo={instance.tipo: 1})
+    else: # Edição pode mudar tipo/responsável: o stream reenvia o snapshot
+        publicar_ressincronizacao(instance.evento_id)
+
+
+@receiver(post_delete, sender=Atividade)
+def atividade_removida_ao_vivo(sender, instance, **kwargs):
+    publicar_delta(instance.evento_id, total_atividades=-1, atividades_por_tipo={instance.tipo: -1})
@@ -0,0 +1,114 @@
+import gzip
+import hashlib
+import json
+import logging
+
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import Evento, Atividade, Participante
+from .cache_eventos import versao_evento
+from .tarefas import agendar
+
+logger = logging.getLogger(__name__)
+
+# Snapshot do evento para o app e clientes offline: evento, atividades e resumo dos
+# responsáveis num único JSON compacto, já comprimido com gzip. O artefato fica em
+# cache (os mesmos bytes e ETag para todos os clientes) e é refeito em segundo plano
+# quando a versão do evento muda; enquanto isso, a versão anterior continua sendo servida.
+
+FORMATO = 1
+TIMEOUT_SNAPSHOT = 60 * 60 * 24 * 7
+TIMEOUT_GERACAO = 60 # trava contra gerações simultâneas do mesmo evento
+
+
+def _chave(evento_id):
+    return f'snapshot:{evento_id}'
+
+
+def montar_snapshot(evento_id):
+    """Conteúdo do snapshot (três consultas), ou None se o evento não existe."""
+    evento = Evento.objects.filter(pk=evento_id).first()
+    if evento is None:
+        return None
+    atividades = list(
+        Atividade.objects.filter(evento_id=evento_id).order_by('horario_inicio', 'pk')
+        .values('id', 'titulo', 'descricao', 'tipo', 'horario_inicio', 'horario_fim', 'responsavel_id')
+    )
+    responsaveis = Participante.objects.filter(
+        pk__in={atividade['responsavel_id'] for atividade in atividades} - {None}
+    ).order_by('pk')
+    return {
+        'formato': FORMATO,
+        'evento': {
+            'id': evento.pk, 'nome': evento.nome, 'descricao': evento.descricao, 'local': evento.local,
+            'data_inicio': evento.data_inicio, 'data_fim': evento.data_fim, 'banner': evento.variantes_urls,
+        },
+        'atividades': [ # responsáveis referenciados pelo ID, descritos uma vez em 'responsaveis'
+            {
+                'id': atividade['id'], 'titulo': atividade['titulo'], 'descricao': atividade['descricao'],
+                'tipo': atividade['tipo'], 'inicio': atividade['horario_inicio'], 'fim': atividade['horario_fim'],
+                'responsavel': atividade['responsavel_id'],
+            }
+            for atividade in atividades
+        ],
+        'responsaveis': [
+            {'id': responsavel.pk, 'nome': responsavel.get_full_name() or responsavel.username, 'tipo': responsavel.tipo}
+            for responsavel in responsaveis
+        ],
+    }
+
+
+def gerar_snapshot(evento_id):
+    """
+    (Re)gera o artefato do evento para a versão atual e o guarda em cache.
+
+    Se o conteúdo não mudou (ex.: a versão subiu por causa de uma inscrição), os bytes
+    e o ETag anteriores são mantidos e só a versão é atualizada: clientes com o ETag
+    antigo continuam recebendo 304. Retorna o artefato, ou None se o evento não existe.
+    """
+    try:
+        versao = versao_evento(evento_id)
+        dados = montar_snapshot(evento_id)
+        if dados is None:
+            cache.delete(_chave(evento_id))
+            return None
+        corpo = json.dumps(dados, cls=DjangoJSONEncoder, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        digest = hashlib.sha256(corpo).hexdigest()
+        anterior = cache.get(_chave(evento_id))
+        if anterior and anterior['digest'] == digest:
+            artefato = {**anterior, 'versao': versao}
+        else:
+            artefato = {
+                'versao': versao,
+                'digest': digest,
+                'etag': f'"snapshot-{evento_id}-{digest[:16]}"',
+                'conteudo': gzip.compress(corpo, compresslevel=9, mtime=0), # mtime fixo: mesmos bytes para o mesmo conteúdo
+            }
+        cache.set(_chave(evento_id), artefato, TIMEOUT_SNAPSHOT)
+        return artefato
+    finally:
+        cache.delete(_chave(evento_id) + ':gerando')
+
+
+def agendar_snapshot(evento_id):
+    """Agenda a regeneração no pool de tarefas, uma por evento por vez."""
+    if cache.add(_chave(evento_id) + ':gerando', True, TIMEOUT_GERACAO):
+        agendar(gerar_snapshot, evento_id)
+
+
+def obter_snapshot(evento_id):
+    """
+    Artefato para servir agora. Sem artefato em cache, gera na hora; com artefato de
+    uma versão anterior, serve-o e agenda a regeneração em segundo plano.
+    """
+    artefato = cache.get(_chave(evento_id))
+    if artefato is None:
+        return gerar_snapshot(evento_id)
+    if artefato['versao'] != versao_evento(evento_id):
+        agendar_snapshot(evento_id)
+    return artefato
+
+
+def descartar_snapshot(evento_id):
+    cache.delete(_chave(evento_id))
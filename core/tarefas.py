@@ -0,0 +1,148 @@
+import csv
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections, transaction
+
+from .models import Inscricao, TarefaLote
+from .cache_eventos import invalidar_eventos, invalidar_participantes
+from .estatisticas import horas_afetadas, recalcular_horas
+
+logger = logging.getLogger(__name__)
+
+# Pool de threads compartilhado para trabalhos fora do ciclo da requisição
+_executor = ThreadPoolExecutor(
+    max_workers=getattr(settings, 'TAREFAS_MAX_WORKERS', 2),
+    thread_name_prefix='tarefas',
+)
+
+
+def _executar(funcao, *args):
+    try:
+        funcao(*args)
+    except Exception:
+        logger.exception('Falha ao executar tarefa em segundo plano: %s', funcao.__name__)
+    finally:
+        connections.close_all() # Threads do pool não passam pelo request_finished
+
+
+def agendar(funcao, *args):
+    """
+    Agenda 'funcao(*args)' para rodar no pool após o commit da transação atual.
+
+    Com TAREFAS_SINCRONAS=True (testes/desenvolvimento) executa na própria thread.
+    """
+    def submeter():
+        if getattr(settings, 'TAREFAS_SINCRONAS', False):
+            funcao(*args)
+        else:
+            _executor.submit(_executar, funcao, *args)
+    transaction.on_commit(submeter)
+
+
+# --- Tarefas em lote do admin (inscrições) ---
+
+NOVO_STATUS = {'confirmar': 'confirmado', 'cancelar': 'cancelado'}
+CABECALHO_CSV = ['ID', 'Participante', 'Email', 'Tipo', 'Evento', 'Data Inscrição', 'Status']
+
+
+def criar_tarefa_lote(acao, queryset, usuario=None):
+    """Registra a seleção do admin como uma tarefa e agenda sua execução."""
+    ids = list(queryset.order_by('pk').values_list('pk', flat=True))
+    tarefa = TarefaLote.objects.create(acao=acao, ids=ids, total=len(ids), criado_por=usuario)
+    agendar(executar_tarefa_lote, tarefa.pk)
+    return tarefa
+
+
+def caminho_exportacao(tarefa):
+    """CSV da tarefa em EXPORTACOES_DIR: contém emails, então não fica no MEDIA_ROOT (servido publicamente)."""
+    nome = f'inscricoes_{tarefa.pk}.csv'
+    os.makedirs(settings.EXPORTACOES_DIR, exist_ok=True)
+    return nome, os.path.join(settings.EXPORTACOES_DIR, nome)
+
+
+def _preparar_exportacao(tarefa):
+    """
+    Recomeço: descarta a exportação parcial. Retomada: trunca o CSV no tamanho salvo
+    com o último cursor, descartando linhas de um bloco cuja transação não chegou ao commit.
+    """
+    _, caminho = caminho_exportacao(tarefa)
+    if tarefa.processados and not os.path.exists(caminho): # Arquivo perdido: refaz do início
+        tarefa.processados = tarefa.tamanho_arquivo = 0
+    if tarefa.processados == 0:
+        if os.path.exists(caminho):
+            os.remove(caminho)
+        return
+    with open(caminho, 'r+b') as arquivo:
+        arquivo.truncate(tarefa.tamanho_arquivo)
+
+
+def _processar_bloco(tarefa, bloco):
+    """Aplica a ação a um bloco de PKs. Retorna (evento_id, participante_id, data_inscricao) das alteradas."""
+    inscricoes = Inscricao.objects.filter(pk__in=bloco)
+    if tarefa.acao in NOVO_STATUS:
+        novo_status = NOVO_STATUS[tarefa.acao]
+        alteradas = inscricoes.exclude(status=novo_status)
+        afetados = list(alteradas.values_list('evento_id', 'participante_id', 'data_inscricao'))
+        alteradas.update(status=novo_status) # update() não dispara signals: invalidação é feita pelo chamador
+        return afetados
+
+    nome, caminho = caminho_exportacao(tarefa)
+    with open(caminho, 'a', newline='', encoding='utf-8') as arquivo:
+        writer = csv.writer(arquivo)
+        if tarefa.processados == 0:
+            writer.writerow(CABECALHO_CSV)
+        for inscricao in inscricoes.select_related('participante', 'evento').order_by('pk'):
+            writer.writerow([
+                inscricao.pk,
+                inscricao.participante.username,
+                inscricao.participante.email,
+                inscricao.participante.get_tipo_display(),
+                inscricao.evento.nome,
+                inscricao.data_inscricao.isoformat(),
+                inscricao.get_status_display(),
+            ])
+    tarefa.arquivo.name = nome
+    tarefa.tamanho_arquivo = os.path.getsize(caminho) # Salvo com o cursor, na mesma transação
+    return []
+
+
+def executar_tarefa_lote(tarefa_id):
+    """
+    Executa (ou retoma) uma tarefa em lote em blocos de TAREFAS_TAMANHO_LOTE.
+
+    Cada bloco é gravado na sua própria transação curta, liberando o lock de escrita
+    do SQLite entre blocos; o cursor 'processados' é salvo junto, então a tarefa pode
+    ser retomada do ponto em que parou.
+    """
+    tamanho = getattr(settings, 'TAREFAS_TAMANHO_LOTE', 500)
+    tarefa = TarefaLote.objects.get(pk=tarefa_id)
+    if tarefa.status == 'concluida':
+        return tarefa
+    if tarefa.acao == 'exportar_csv':
+        _preparar_exportacao(tarefa)
+
+    tarefa.status = 'executando'
+    tarefa.save(update_fields=['status', 'processados', 'tamanho_arquivo', 'atualizada_em'])
+    try:
+        while tarefa.processados < tarefa.total:
+            bloco = tarefa.ids[tarefa.processados:tarefa.processados + tamanho]
+            with transaction.atomic():
+                afetados = _processar_bloco(tarefa, bloco)
+                tarefa.processados += len(bloco)
+                tarefa.save(update_fields=['processados', 'arquivo', 'tamanho_arquivo', 'atualizada_em'])
+            # Mesma invalidação das edições individuais (signals)
+            invalidar_eventos(evento_id for evento_id, _, _ in afetados)
+            invalidar_participantes(participante_id for _, participante_id, _ in afetados)
+            if afetados: # Já estamos no pool: as séries são recalculadas aqui mesmo
+                recalcular_horas(horas_afetadas((evento_id, data) for evento_id, _, data in afetados))
+    except Exception as exc:
+        tarefa.status = 'falhou'
+        tarefa.erro = str(exc)
+        tarefa.save(update_fields=['status', 'erro', 'atualizada_em'])
+        raise
+    tarefa.status = 'concluida'
+    tarefa.save(update_fields=['status', 'atualizada_em'])
+    return tarefa
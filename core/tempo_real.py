@@ -0,0 +1,137 @@
+import asyncio
+import logging
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+from .cache_eventos import versao_evento
+
+logger = logging.getLogger(__name__)
+
+# Atualizações ao vivo do dashboard (SSE). Os signals publicam deltas dos contadores
+# num canal por evento; o Hub de cada processo mantém UMA assinatura por canal no
+# backend de pub/sub e a distribui para todos os ouvintes conectados àquele evento.
+
+TAMANHO_FILA = 100
+RESSINCRONIZAR = {'tipo': 'resync'} # Enviado a quem ficou para trás: o stream manda um snapshot novo
+
+
+class MemoriaPubSub:
+    """
+    Backend em memória (um processo). Outros backends (ex.: Redis) implementam a
+    mesma interface: publicar(canal, mensagem), assinar(canal, callback) e
+    cancelar(canal, callback), chamando o callback com a mensagem (dict serializável em JSON).
+    """
+
+    def __init__(self):
+        self._callbacks = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def publicar(self, canal, mensagem):
+        with self._lock:
+            callbacks = list(self._callbacks.get(canal, ()))
+        for callback in callbacks:
+            callback(mensagem)
+
+    def assinar(self, canal, callback):
+        with self._lock:
+            self._callbacks[canal].add(callback)
+
+    def cancelar(self, canal, callback):
+        with self._lock:
+            self._callbacks[canal].discard(callback)
+            if not self._callbacks[canal]:
+                del self._callbacks[canal]
+
+
+def _entregar(fila, mensagem): # Roda no event loop do ouvinte
+    if fila.full():
+        while not fila.empty():
+            fila.get_nowait()
+        mensagem = RESSINCRONIZAR
+    fila.put_nowait(mensagem)
+
+
+class _Transmissao:
+    """Ouvintes locais de um canal, alimentados por uma única assinatura no backend."""
+
+    def __init__(self):
+        self.ouvintes = set()
+
+    def receber(self, mensagem): # Pode ser chamado de qualquer thread
+        for loop, fila in list(self.ouvintes):
+            try:
+                loop.call_soon_threadsafe(_entregar, fila, mensagem)
+            except RuntimeError: # Event loop já encerrado
+                self.ouvintes.discard((loop, fila))
+
+
+class Hub:
+    def __init__(self, backend):
+        self.backend = backend
+        self._transmissoes = {}
+        self._lock = threading.Lock()
+
+    def entrar(self, canal):
+        """Registra um ouvinte no canal e retorna sua asyncio.Queue."""
+        fila = asyncio.Queue(maxsize=TAMANHO_FILA)
+        with self._lock:
+            transmissao = self._transmissoes.get(canal)
+            if transmissao is None:
+                transmissao = self._transmissoes[canal] = _Transmissao()
+                self.backend.assinar(canal, transmissao.receber)
+            transmissao.ouvintes.add((asyncio.get_running_loop(), fila))
+        return fila
+
+    def sair(self, canal, fila):
+        with self._lock:
+            transmissao = self._transmissoes.get(canal)
+            if transmissao is None:
+                return
+            transmissao.ouvintes = {ouvinte for ouvinte in transmissao.ouvintes if ouvinte[1] is not fila}
+            if not transmissao.ouvintes:
+                self.backend.cancelar(canal, transmissao.receber)
+                del self._transmissoes[canal]
+
+    def ouvintes(self, canal):
+        transmissao = self._transmissoes.get(canal)
+        return len(transmissao.ouvintes) if transmissao else 0
+
+
+_hub = None
+_hub_lock = threading.Lock()
+
+
+def obter_hub():
+    """Hub do processo, com o backend definido em TEMPO_REAL_BACKEND."""
+    global _hub
+    with _hub_lock:
+        if _hub is None:
+            backend = import_string(getattr(settings, 'TEMPO_REAL_BACKEND', 'core.tempo_real.MemoriaPubSub'))
+            _hub = Hub(backend())
+        return _hub
+
+
+def canal_evento(evento_id):
+    return f'evento:{evento_id}:dashboard'
+
+
+def publicar_evento(evento_id, mensagem):
+    """Publica após o commit (rollback não gera delta), com a versão do evento já incrementada."""
+    def enviar():
+        try:
+            obter_hub().backend.publicar(canal_evento(evento_id), {**mensagem, 'versao': versao_evento(evento_id)})
+        except Exception:
+            logger.exception('Falha ao publicar atualização do evento %s', evento_id)
+    transaction.on_commit(enviar)
+
+
+def publicar_delta(evento_id, **contadores):
+    publicar_evento(evento_id, {'tipo': 'delta', 'dados': contadores})
+
+
+def publicar_ressincronizacao(evento_id):
+    publicar_evento(evento_id, RESSINCRONIZAR)
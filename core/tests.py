@@ -2,6 +2,7 @@ from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase, APIClient
 from django.contrib.auth import get_user_model
+from django.test import override_settings, TransactionTestCase
 from .models import Evento, Atividade, Inscricao
 
 User = get_user_model()
@@ -274,4 +275,2005 @@ class TestInscricaoModel(APITestCase):
             evento=evento
         )
         with self.assertRaises(ValidationError):
-            inscricao.full_clean()
\ No newline at end of file
+            inscricao.full_clean()
+class TestTarefasLoteAdmin(APITestCase):
+
+    def setUp(self):
+        self.evento = Evento.objects.create(
+            nome="Evento Lote",
+            descricao="Descrição",
+            data_inicio="2030-12-01T09:00:00Z",
+            data_fim="2030-12-03T18:00:00Z",
+            local="Local"
+        )
+        self.usuarios = [
+            User.objects.create_user(username=f'lote{i}', password='pass', email=f'lote{i}@example.com')
+            for i in range(5)
+        ]
+        for usuario in self.usuarios:
+            Inscricao.objects.create(participante=usuario, evento=self.evento)
+
+    @override_settings(TAREFAS_SINCRONAS=True, TAREFAS_TAMANHO_LOTE=2)
+    def test_confirmar_em_lote_por_blocos(self):
+        """Confirma todas as inscrições em blocos e invalida o dashboard do evento"""
+        from .cache_eventos import versao_evento
+        from .tarefas import criar_tarefa_lote
+        versao_antes = versao_evento(self.evento.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            tarefa = criar_tarefa_lote('confirmar', Inscricao.objects.all())
+        tarefa.refresh_from_db()
+        self.assertEqual(tarefa.status, 'concluida')
+        self.assertEqual(tarefa.processados, 5)
+        self.assertEqual(Inscricao.objects.filter(status='confirmado').count(), 5)
+        self.assertNotEqual(versao_evento(self.evento.pk), versao_antes)
+
+    @override_settings(TAREFAS_SINCRONAS=True, TAREFAS_TAMANHO_LOTE=2)
+    def test_retomar_tarefa_interrompida(self):
+        """Uma tarefa interrompida continua do cursor salvo, sem reprocessar blocos"""
+        from .models import TarefaLote
+        from .tarefas import executar_tarefa_lote
+        ids = list(Inscricao.objects.order_by('pk').values_list('pk', flat=True))
+        tarefa = TarefaLote.objects.create(acao='cancelar', ids=ids, total=len(ids), processados=2, status='executando')
+        executar_tarefa_lote(tarefa.pk)
+        self.assertEqual(Inscricao.objects.filter(status='cancelado').count(), 3)
+        self.assertEqual(Inscricao.objects.filter(pk__in=ids[:2], status='pendente').count(), 2)
+
+    @override_settings(TAREFAS_SINCRONAS=True, TAREFAS_TAMANHO_LOTE=2)
+    def test_exportar_csv_em_lote(self):
+        """Exporta a seleção para CSV em blocos, fora do MEDIA_ROOT, baixado só pelo admin"""
+        import tempfile
+        from .tarefas import criar_tarefa_lote, caminho_exportacao
+        with tempfile.TemporaryDirectory() as privado, self.settings(EXPORTACOES_DIR=privado):
+            with self.captureOnCommitCallbacks(execute=True):
+                tarefa = criar_tarefa_lote('exportar_csv', Inscricao.objects.all())
+            tarefa.refresh_from_db()
+            _, caminho = caminho_exportacao(tarefa)
+            self.assertTrue(caminho.startswith(privado))
+            with open(caminho, encoding='utf-8') as arquivo:
+                linhas = arquivo.read().splitlines()
+            url = f'/admin/core/tarefalote/{tarefa.pk}/csv/'
+            self.client.force_login(self.usuarios[0])
+            self.assertNotEqual(self.client.get(url).status_code, 200) # não staff: login do admin
+            self.client.force_login(User.objects.create_superuser(username='admin_csv', password='pass'))
+            response = self.client.get(url)
+            self.assertEqual(b''.join(response.streaming_content).decode().splitlines(), linhas)
+        self.assertEqual(len(linhas), 6)  # cabeçalho + 5 inscrições
+        self.assertIn('lote4', linhas[-1])
+
+    @override_settings(TAREFAS_SINCRONAS=True, TAREFAS_TAMANHO_LOTE=2)
+    def test_retomar_exportacao_descarta_bloco_sem_commit(self):
+        """A retomada trunca o CSV no tamanho salvo com o cursor: linhas de um bloco sem commit não duplicam"""
+        import tempfile
+        from .models import TarefaLote
+        from .tarefas import caminho_exportacao, executar_tarefa_lote
+        ids = list(Inscricao.objects.order_by('pk').values_list('pk', flat=True))
+        with tempfile.TemporaryDirectory() as privado, self.settings(EXPORTACOES_DIR=privado):
+            tarefa = TarefaLote.objects.create(acao='exportar_csv', ids=ids, total=len(ids), status='falhou')
+            executar_tarefa_lote(tarefa.pk)
+            _, caminho = caminho_exportacao(tarefa)
+            with open(caminho, 'rb') as arquivo:
+                completo = arquivo.read()
+            tamanho_dois_blocos = sum(len(linha) + 2 for linha in completo.split(b'\r\n')[:5]) # cabeçalho + 4 inscrições
+            TarefaLote.objects.filter(pk=tarefa.pk).update(processados=4, tamanho_arquivo=tamanho_dois_blocos, status='falhou')
+            with open(caminho, 'ab') as arquivo:
+                arquivo.write(b'linha,de,um,bloco,sem,commit\r\n')
+            executar_tarefa_lote(tarefa.pk)
+            with open(caminho, 'rb') as arquivo:
+                self.assertEqual(arquivo.read(), completo)
+
+    def test_admin_nao_retoma_tarefa_em_execucao(self):
+        """A ação 'retomar' ignora tarefas ainda em execução"""
+        from unittest import mock
+        from .models import TarefaLote
+        executando = TarefaLote.objects.create(acao='cancelar', ids=[1], total=1, status='executando')
+        falhou = TarefaLote.objects.create(acao='cancelar', ids=[1], total=1, status='falhou')
+        self.client.force_login(User.objects.create_superuser(username='admin_retomar', password='pass'))
+        with mock.patch('core.admin.agendar') as agendar:
+            self.client.post('/admin/core/tarefalote/', {'action': 'retomar_tarefa', '_selected_action': [executando.pk, falhou.pk]})
+        self.assertEqual([chamada.args[1] for chamada in agendar.call_args_list], [falhou.pk])
+
+class TestCachePortal(APITestCase):
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.evento = Evento.objects.create(
+            nome="Evento Portal",
+            descricao="Descrição",
+            data_inicio="2030-12-01T09:00:00Z",
+            data_fim="2030-12-03T18:00:00Z",
+            local="Local"
+        )
+
+    def test_paginas_sem_queries_com_cache_quente(self):
+        """Listagem, busca e detalhes não consultam o banco para anônimos com cache quente"""
+        urls = ['/', '/eventos/?local=Local', '/busca/?q=Portal', f'/evento/{self.evento.pk}/']
+        for url in urls:
+            self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+        for url in urls:
+            with self.assertNumQueries(0):
+                response = self.client.get(url)
+            self.assertContains(response, "Evento Portal")
+
+    def test_cache_respeita_querystring(self):
+        """Filtros diferentes geram páginas em cache diferentes"""
+        self.client.get('/busca/?q=Portal')
+        response = self.client.get('/busca/?q=Inexistente')
+        self.assertNotContains(response, "Evento Portal")
+
+    def test_alteracao_invalida_pagina_e_fragmento(self):
+        """Editar o evento ou suas atividades invalida o cache da página de detalhes"""
+        url = f'/evento/{self.evento.pk}/'
+        self.client.get(url)
+        Atividade.objects.create(
+            evento=self.evento,
+            responsavel=User.objects.create_user(username='palestrante', password='pass'),
+            titulo="Workshop Novo",
+            horario_inicio="2030-12-01T10:00:00Z",
+            horario_fim="2030-12-01T12:00:00Z",
+            tipo="workshop"
+        )
+        self.assertContains(self.client.get(url), "Workshop Novo")
+        self.evento.nome = "Evento Renomeado"
+        self.evento.save()
+        self.assertContains(self.client.get('/'), "Evento Renomeado")
+
+    def test_inscricao_nao_invalida_listagens(self):
+        """Inscrições mudam a versão do evento, mas não a das listagens nem a do card"""
+        from .cache_eventos import versao_evento, versao_lista_eventos, versoes_cards
+        self.assertEqual(self.client.get('/').status_code, status.HTTP_200_OK)
+        versoes = (versao_evento(self.evento.pk), versao_lista_eventos(), versoes_cards([self.evento.pk]))
+        Inscricao.objects.create(participante=User.objects.create_user(username='inscrito_portal'), evento=self.evento)
+        self.assertNotEqual(versao_evento(self.evento.pk), versoes[0])
+        self.assertEqual((versao_lista_eventos(), versoes_cards([self.evento.pk])), versoes[1:])
+        with self.assertNumQueries(0):
+            self.client.get('/')
+        self.evento.local = "Outro Local"
+        self.evento.save()
+        self.assertNotEqual((versao_lista_eventos(), versoes_cards([self.evento.pk])), versoes[1:])
+
+    def test_versoes_valem_para_todos_os_workers(self):
+        """As versões ficam no cache compartilhado: o cache local de outro worker não as perde nem as diverge"""
+        from django.core.cache import cache
+        from .cache_eventos import invalidar_evento, versao_evento
+        url = f'/evento/{self.evento.pk}/'
+        self.client.get(url)
+        invalidar_evento(self.evento.pk, lista=True)  # edição atendida por um worker
+        versao = versao_evento(self.evento.pk)
+        cache.clear()  # outro worker: cache local vazio
+        self.assertEqual(versao_evento(self.evento.pk), versao)
+        Evento.objects.filter(pk=self.evento.pk).update(nome="Editado em outro worker")
+        invalidar_evento(self.evento.pk, lista=True)
+        self.assertContains(self.client.get(url), "Editado em outro worker")
+
+    def test_usuario_logado_usa_fragmentos(self):
+        """Usuários com sessão não usam o cache de página, mas reaproveitam os fragmentos"""
+        self.client.force_login(User.objects.create_user(username='logado', password='pass'))
+        url = f'/evento/{self.evento.pk}/'
+        self.assertContains(self.client.get(url), "Evento Portal")
+        with self.assertNumQueries(1):  # apenas o evento; atividades vêm do fragmento
+            self.assertContains(self.client.get(url), "Evento Portal")
+
+@override_settings(TAREFAS_SINCRONAS=True)
+class TestVariantesBanner(APITestCase):
+
+    def setUp(self):
+        import tempfile
+        self.media = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media.cleanup)
+        configuracao = self.settings(MEDIA_ROOT=self.media.name)
+        configuracao.enable()
+        self.addCleanup(configuracao.disable)
+
+    def _banner(self, nome='foto.jpg'):
+        from io import BytesIO
+        from PIL import Image
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        conteudo = BytesIO()
+        Image.new('RGB', (3000, 2000), 'purple').save(conteudo, format='JPEG')
+        return SimpleUploadedFile(nome, conteudo.getvalue(), content_type='image/jpeg')
+
+    def test_upload_gera_variantes(self):
+        """O upload do banner gera as variantes card/detalhe (JPEG e WebP) fora da requisição"""
+        from PIL import Image
+        from django.core.files.storage import default_storage
+        with self.captureOnCommitCallbacks(execute=True):
+            evento = Evento.objects.create(
+                nome="Evento Banner", descricao="X", local="Local", banner=self._banner(),
+                data_inicio="2030-12-01T09:00:00Z", data_fim="2030-12-03T18:00:00Z",
+            )
+        evento.refresh_from_db()
+        arquivos = evento.banner_variantes['arquivos']
+        self.assertEqual(set(arquivos), {'card', 'card_webp', 'detalhe', 'detalhe_webp'})
+        with default_storage.open(arquivos['card']) as arquivo:
+            self.assertEqual(Image.open(arquivo).size, (600, 400))
+        with default_storage.open(arquivos['detalhe_webp']) as arquivo:
+            self.assertEqual(Image.open(arquivo).format, 'WEBP')
+
+        response = self.client.get(f'/api/eventos/{evento.pk}/')
+        self.assertTrue(response.data['banner_variantes']['card'].endswith('_card.jpg'))
+        self.assertContains(self.client.get('/'), 'srcset=')
+
+    def test_troca_de_banner_remove_variantes_antigas(self):
+        """Ao trocar o banner, as variantes anteriores são apagadas"""
+        from django.core.files.storage import default_storage
+        with self.captureOnCommitCallbacks(execute=True):
+            evento = Evento.objects.create(
+                nome="Evento Banner", descricao="X", local="Local", banner=self._banner('antigo.jpg'),
+                data_inicio="2030-12-01T09:00:00Z", data_fim="2030-12-03T18:00:00Z",
+            )
+        evento.refresh_from_db()
+        antigas = list(evento.banner_variantes['arquivos'].values())
+        with self.captureOnCommitCallbacks(execute=True):
+            evento.banner = self._banner('novo.jpg')
+            evento.save()
+        evento.refresh_from_db()
+        self.assertTrue(evento.banner_variantes['origem'].endswith('novo.jpg'))
+        self.assertFalse(any(default_storage.exists(caminho) for caminho in antigas))
+
+    def test_banners_de_mesmo_nome_em_eventos_diferentes(self):
+        """Banners foto.jpg/foto.png de eventos diferentes não sobrescrevem as variantes um do outro"""
+        from django.core.files.storage import default_storage
+        eventos = []
+        for nome in ('foto.jpg', 'foto.png'):
+            with self.captureOnCommitCallbacks(execute=True):
+                eventos.append(Evento.objects.create(
+                    nome="Evento Banner", descricao="X", local="Local", banner=self._banner(nome),
+                    data_inicio="2030-12-01T09:00:00Z", data_fim="2030-12-03T18:00:00Z",
+                ))
+        primeiro, segundo = (Evento.objects.get(pk=evento.pk).banner_variantes['arquivos'] for evento in eventos)
+        self.assertTrue(primeiro['card'].startswith(f'banners/variantes/{eventos[0].pk}/'))
+        self.assertFalse(set(primeiro.values()) & set(segundo.values()))
+        self.assertTrue(all(default_storage.exists(caminho) for caminho in list(primeiro.values()) + list(segundo.values())))
+
+class TestCompressaoRespostas(APITestCase):
+
+    def setUp(self):
+        from django.test import RequestFactory
+        self.factory = RequestFactory()
+
+    def _middleware(self, response):
+        from .middleware import CompressaoMiddleware
+        return CompressaoMiddleware(lambda request: response)
+
+    def test_json_grande_comprimido_com_gzip(self):
+        """Respostas acima do limite são comprimidas com gzip quando o cliente aceita"""
+        import gzip
+        import json
+        from django.http import JsonResponse
+        dados = {'eventos': [{'nome': f'Evento {i}', 'local': 'Centro de Convenções'} for i in range(200)]}
+        request = self.factory.get('/api/eventos/', HTTP_ACCEPT_ENCODING='gzip, deflate')
+        response = self._middleware(JsonResponse(dados))(request)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(json.loads(gzip.decompress(response.content)), dados)
+
+    def test_resposta_com_token_csrf_nao_comprimida(self):
+        """Páginas que renderizam o token CSRF saem sem compressão (BREACH)"""
+        from django.middleware.csrf import get_token
+        from django.template import engines
+        pagina = engines['django'].from_string('<form>{% csrf_token %}{{ texto }}</form>')
+        request = self.factory.get('/contato/', HTTP_ACCEPT_ENCODING='gzip')
+        conteudo = pagina.render({'texto': 'x' * 5000}, request)
+        self.assertTrue(get_token(request))
+        from django.http import HttpResponse
+        response = self._middleware(HttpResponse(conteudo))(request)
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertIn(b'csrfmiddlewaretoken', response.content)
+
+    def test_estatisticas_dinamicas_no_relatorio(self):
+        """Totais da compressão dinâmica chegam ao cache compartilhado e ao relatorio_compressao"""
+        from io import StringIO
+        from django.core.cache import caches
+        from django.core.management import call_command
+        from django.http import JsonResponse
+        from django.test import override_settings
+        from unittest import mock
+        from . import middleware
+        caches['compartilhado'].clear()
+        zerados = dict.fromkeys(middleware.CAMPOS_ESTATISTICAS, 0) # Descarta o acumulado de outros testes
+        saida = StringIO()
+        with mock.patch.dict(middleware._pendentes, zerados), override_settings(COMPRESSAO_INTERVALO_ESTATISTICAS=0, TAREFAS_SINCRONAS=True):
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self._middleware(JsonResponse({'texto': 'x' * 5000}))(self.factory.get('/', HTTP_ACCEPT_ENCODING='gzip'))
+            self.assertEqual(response['Content-Encoding'], 'gzip')
+            self.assertEqual(caches['compartilhado'].get('compressao:respostas'), 1)
+            estatisticas = middleware.estatisticas_compressao()
+            self.assertEqual(estatisticas['bytes_comprimidos'], len(response.content))
+            self.assertGreater(estatisticas['bytes_economizados'], 4000)
+            call_command('relatorio_compressao', stdout=saida)
+        self.assertIn('respostas dinâmicas: 1 respostas', saida.getvalue())
+
+    def test_resposta_pequena_ou_sem_accept_encoding(self):
+        """Respostas pequenas e clientes sem gzip recebem o corpo original"""
+        from django.http import JsonResponse
+        pequena = self._middleware(JsonResponse({'ok': True}))(self.factory.get('/', HTTP_ACCEPT_ENCODING='gzip'))
+        self.assertFalse(pequena.has_header('Content-Encoding'))
+        grande = JsonResponse({'texto': 'x' * 5000})
+        sem_gzip = self._middleware(grande)(self.factory.get('/', HTTP_ACCEPT_ENCODING='gzip;q=0'))
+        self.assertFalse(sem_gzip.has_header('Content-Encoding'))
+
+    def test_streaming_comprimido_sem_bufferizar(self):
+        """Streaming é comprimido bloco a bloco, consumindo o gerador sob demanda"""
+        import gzip
+        from django.http import StreamingHttpResponse
+        consumidos = []
+
+        def linhas():
+            for i in range(5000):
+                consumidos.append(i)
+                yield f'{i},participante{i},participante{i}@example.com\n'
+
+        response = self._middleware(StreamingHttpResponse(linhas(), content_type='text/csv'))(
+            self.factory.get('/relatorio/', HTTP_ACCEPT_ENCODING='gzip')
+        )
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(consumidos, [])  # nada foi lido antes de iterar a resposta
+        corpo = gzip.decompress(b''.join(response.streaming_content)).decode()
+        self.assertEqual(corpo.count('\n'), 5000)
+
+class TestCalendarioICS(APITestCase):
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.user = User.objects.create_user(username='agenda', password='pass')
+        self.evento = Evento.objects.create(
+            nome="Evento ICS",
+            descricao="Descrição; com vírgula, e ponto-e-vírgula",
+            data_inicio="2030-12-01T09:00:00Z",
+            data_fim="2030-12-03T18:00:00Z",
+            local="Local"
+        )
+        Atividade.objects.create(
+            evento=self.evento,
+            responsavel=self.user,
+            titulo="Palestra de Abertura",
+            horario_inicio="2030-12-01T10:00:00Z",
+            horario_fim="2030-12-01T11:00:00Z",
+            tipo="palestra"
+        )
+
+    def test_feed_evento_com_atividades_e_etag(self):
+        """O feed do evento inclui as atividades e responde 304 sem consultas para If-None-Match"""
+        url = f'/api/eventos/{self.evento.pk}/calendar.ics'
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        corpo = b''.join(response.streaming_content).decode()
+        self.assertEqual(corpo.count('BEGIN:VEVENT'), 2)
+        self.assertIn('DTSTART:20301201T090000Z', corpo)
+        self.assertIn('vírgula\\, e ponto-e-vírgula', corpo)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=f'W/{response["ETag"]}')
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_alteracao_de_atividade_muda_etag(self):
+        """Alterar uma atividade gera nova versão do feed"""
+        url = f'/api/eventos/{self.evento.pk}/calendar.ics'
+        etag = self.client.get(url)['ETag']
+        atividade = Atividade.objects.get()
+        atividade.titulo = "Palestra Renomeada"
+        atividade.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('Palestra Renomeada', b''.join(response.streaming_content).decode())
+
+    def test_feed_participante_por_chave_assinada(self):
+        """O feed pessoal lista os eventos inscritos e aceita a chave assinada da URL"""
+        outro = Evento.objects.create(
+            nome="Evento Sem Inscrição", descricao="X", local="Local",
+            data_inicio="2030-11-01T09:00:00Z", data_fim="2030-11-01T18:00:00Z",
+        )
+        Inscricao.objects.create(participante=self.user, evento=self.evento)
+        self.client.force_authenticate(user=self.user)
+        url = self.client.get('/api/participantes/me/calendario/').data['url']
+        self.client.force_authenticate(user=None)
+
+        response = self.client.get(url)
+        corpo = b''.join(response.streaming_content).decode()
+        self.assertIn('Evento ICS', corpo)
+        self.assertNotIn(outro.nome, corpo)
+
+        Inscricao.objects.create(participante=self.user, evento=outro)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertIn(outro.nome, b''.join(response.streaming_content).decode())
+        self.assertEqual(self.client.get(url.replace('chave=', 'chave=x')).status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_chave_renovada_revoga_url_antiga(self):
+        """POST em me/calendario gera outra chave; a URL anterior e chaves só com o ID deixam de valer"""
+        from django.core import signing
+        from .authentication import SALT_CALENDARIO
+        self.client.force_authenticate(user=self.user)
+        antiga = self.client.get('/api/participantes/me/calendario/').data['url']
+        self.assertEqual(self.client.get('/api/participantes/me/calendario/').data['url'], antiga)  # estável até renovar
+        nova = self.client.post('/api/participantes/me/calendario/').data['url']
+        self.client.force_authenticate(user=None)
+        self.assertNotEqual(nova, antiga)
+        self.assertEqual(self.client.get(nova).status_code, status.HTTP_200_OK)
+        self.assertEqual(self.client.get(antiga).status_code, status.HTTP_403_FORBIDDEN)
+        so_id = signing.dumps(self.user.pk, salt=SALT_CALENDARIO)
+        self.assertEqual(self.client.get('/api/participantes/me/calendar.ics', {'chave': so_id}).status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_inscricoes_e_checkin_mantem_o_etag(self):
+        """Inscrições e check-ins não mudam o feed do evento: pollers recebem 304 durante as inscrições"""
+        from .checkin import codigo_ingresso, registrar_checkins
+        url = f'/api/eventos/{self.evento.pk}/calendar.ics'
+        etag = self.client.get(url)['ETag']
+        inscricao = Inscricao.objects.create(participante=User.objects.create_user(username='inscrito_ics'), evento=self.evento)
+        inscricao.status = 'confirmado'
+        inscricao.save()
+        self.assertEqual(registrar_checkins(self.evento.pk, [{'codigo': codigo_ingresso(self.evento.pk, inscricao.pk)}])['registrados'], 1)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_304_NOT_MODIFIED)
+        Atividade.objects.create(
+            evento=self.evento, responsavel=self.user, titulo="Nova Palestra", tipo="palestra",
+            horario_inicio="2030-12-01T14:00:00Z", horario_fim="2030-12-01T15:00:00Z",
+        )
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_200_OK)
+
+    def test_evento_inexistente_nao_cria_versao(self):
+        """O feed de um ID inexistente dá 404 sem gravar uma versão no cache"""
+        from django.core.cache import caches
+        self.assertEqual(self.client.get('/api/eventos/987654/calendar.ics').status_code, status.HTTP_404_NOT_FOUND)
+        self.assertIsNone(caches['compartilhado'].get('evento:987654:versao'))
+
+class TestAgendaParticipante(APITestCase):
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.user = User.objects.create_user(username='agenda', password='pass')
+        self.palestrante = User.objects.create_user(username='palestrante', password='pass')
+        self.client.force_authenticate(user=self.user)
+        self.eventos = []
+        for nome, inicio, fim in [
+            ("Evento A", "2030-12-01T09:00:00Z", "2030-12-01T18:00:00Z"),
+            ("Evento B", "2030-12-01T14:00:00Z", "2030-12-01T20:00:00Z"),  # sobrepõe A
+            ("Evento C", "2030-12-05T09:00:00Z", "2030-12-05T18:00:00Z"),
+        ]:
+            evento = Evento.objects.create(nome=nome, descricao="X", local="Local", data_inicio=inicio, data_fim=fim)
+            Inscricao.objects.create(participante=self.user, evento=evento)
+            self.eventos.append(evento)
+        Atividade.objects.create(
+            evento=self.eventos[0], responsavel=self.palestrante, titulo="Oficina A", tipo="oficina",
+            horario_inicio="2030-12-01T15:00:00Z", horario_fim="2030-12-01T16:00:00Z",
+        )
+        Atividade.objects.create(
+            evento=self.eventos[1], responsavel=self.palestrante, titulo="Palestra B", tipo="palestra",
+            horario_inicio="2030-12-01T15:30:00Z", horario_fim="2030-12-01T16:30:00Z",
+        )
+
+    def test_detectar_conflitos_sweep_line(self):
+        """A varredura encontra apenas sobreposições entre grupos diferentes"""
+        from .agenda import detectar_conflitos
+        intervalos = [(1, 5, 'a', 'a1'), (2, 3, 'a', 'a2'), (4, 6, 'b', 'b1'), (6, 7, 'c', 'c1')]
+        self.assertEqual(detectar_conflitos(intervalos), [('a1', 'b1')])
+
+    def test_agenda_ordenada_com_conflitos_e_consultas_fixas(self):
+        """A agenda traz eventos e atividades em ordem, sinaliza conflitos e usa consultas fixas"""
+        with self.assertNumQueries(3):  # ids dos eventos (cache de versão), inscrições+eventos, atividades
+            response = self.client.get('/api/participantes/me/agenda/')
+        self.assertEqual([evento['nome'] for evento in response.data['eventos']], ["Evento A", "Evento B", "Evento C"])
+        self.assertEqual(response.data['eventos'][0]['atividades'][0]['responsavel_nome'], 'palestrante')
+        tipos = sorted((c['primeiro']['tipo'], c['primeiro']['titulo'], c['segundo']['titulo']) for c in response.data['conflitos'])
+        self.assertEqual(tipos, [('atividade', 'Oficina A', 'Palestra B'), ('evento', 'Evento A', 'Evento B')])
+
+        with self.assertNumQueries(0):
+            self.client.get('/api/participantes/me/agenda/')
+
+    def test_filtro_periodo_e_invalidacao(self):
+        """Filtra por período e invalida o cache quando as inscrições mudam"""
+        response = self.client.get('/api/participantes/me/agenda/?inicio=2030-12-02')
+        self.assertEqual([evento['nome'] for evento in response.data['eventos']], ["Evento C"])
+
+        Inscricao.objects.filter(participante=self.user, evento=self.eventos[2]).get().delete()
+        response = self.client.get('/api/participantes/me/agenda/?inicio=2030-12-02')
+        self.assertEqual(response.data['eventos'], [])
+        self.assertEqual(self.client.get('/api/participantes/me/agenda/?fim=ontem').status_code, status.HTTP_400_BAD_REQUEST)
+
+class TestPerfilBancoSQLite(APITestCase):
+
+    def _inscricoes_concorrentes(self, pragmas, threads=4):
+        """
+        Uma inscrição por thread enquanto outra conexão segura o lock de escrita; retorna
+        (sucessos, falhas). O lock só é solto depois que todas as tentativas terminaram ou,
+        se elas estão esperando no busy_timeout, após ESPERA segundos: sem busy_timeout
+        todas falham na hora, com ele todas entram.
+        """
+        import os
+        import sqlite3
+        import tempfile
+        import threading
+        from .db import aplicar_pragmas
+        ESPERA = 0.5
+
+        with tempfile.TemporaryDirectory() as pasta:
+            caminho = os.path.join(pasta, 'concorrencia.sqlite3')
+            dono = sqlite3.connect(caminho, isolation_level=None, check_same_thread=False)
+            aplicar_pragmas(dono.cursor(), pragmas)  # journal_mode=WAL fica gravado no arquivo, como em produção
+            dono.execute('CREATE TABLE inscricao (id INTEGER PRIMARY KEY, participante INTEGER, evento INTEGER, UNIQUE (participante, evento))')
+            conexoes = [sqlite3.connect(caminho, timeout=0, isolation_level=None, check_same_thread=False) for _ in range(threads)]
+            for conexao in conexoes:
+                aplicar_pragmas(conexao.cursor(), pragmas)
+            resultado = {'sucessos': 0, 'falhas': 0}
+            trava, largada = threading.Lock(), threading.Barrier(threads + 1)
+            concluidas = threading.Semaphore(0)
+
+            def inscrever(numero, conexao):
+                largada.wait()
+                try:
+                    conexao.execute('BEGIN IMMEDIATE')
+                    conexao.execute('SELECT COUNT(*) FROM inscricao WHERE evento = 1').fetchone()
+                    conexao.execute('INSERT INTO inscricao (participante, evento) VALUES (?, 1)', (numero,))
+                    conexao.execute('COMMIT')
+                    chave = 'sucessos'
+                except sqlite3.OperationalError:  # database is locked
+                    chave = 'falhas'
+                with trava:
+                    resultado[chave] += 1
+                concluidas.release()
+
+            trabalhadores = [threading.Thread(target=inscrever, args=(numero, conexao)) for numero, conexao in enumerate(conexoes)]
+            try:
+                dono.execute('BEGIN IMMEDIATE')  # uma inscrição em andamento segura o lock de escrita
+                for trabalhador in trabalhadores:
+                    trabalhador.start()
+                largada.wait()
+                for _ in range(threads):
+                    if not concluidas.acquire(timeout=ESPERA):
+                        break  # as restantes esperam no busy_timeout
+                dono.execute('COMMIT')
+                for trabalhador in trabalhadores:
+                    trabalhador.join()
+            finally:
+                for conexao in conexoes + [dono]:
+                    conexao.close()
+        return resultado['sucessos'], resultado['falhas']
+
+    def test_pragmas_aplicados_no_arquivo(self):
+        """Os PRAGMAs configurados ativam WAL, synchronous=NORMAL e o busy_timeout num banco em arquivo"""
+        import os
+        import sqlite3
+        import tempfile
+        from django.conf import settings
+        from .db import aplicar_pragmas
+
+        with tempfile.TemporaryDirectory() as pasta:
+            conexao = sqlite3.connect(os.path.join(pasta, 'pragmas.sqlite3'))
+            try:
+                self.assertEqual(aplicar_pragmas(conexao.cursor(), settings.SQLITE_PRAGMAS), 'wal')
+                self.assertEqual(conexao.execute('PRAGMA synchronous').fetchone()[0], 1)  # NORMAL
+                self.assertEqual(conexao.execute('PRAGMA busy_timeout').fetchone()[0], settings.SQLITE_PRAGMAS['busy_timeout'])
+            finally:
+                conexao.close()
+
+    def test_conexao_do_django_configurada(self):
+        """O receiver de connection_created aplica os PRAGMAs; o busy_timeout tem uma única origem"""
+        from django.conf import settings
+        from django.db import connection
+        self.assertNotIn('timeout', settings.DATABASES['default']['OPTIONS'])  # sobrescrito pelo PRAGMA
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], settings.SQLITE_PRAGMAS['busy_timeout'])
+            cursor.execute('PRAGMA synchronous')
+            self.assertEqual(cursor.fetchone()[0], 1)
+
+    def test_inscricoes_concorrentes_sem_database_locked(self):
+        """Com o lock de escrita ocupado, o padrão falha na hora; com os PRAGMAs todas as inscrições entram"""
+        from django.conf import settings
+        self.assertEqual(self._inscricoes_concorrentes({}), (0, 4))
+        self.assertEqual(self._inscricoes_concorrentes(settings.SQLITE_PRAGMAS), (4, 0))
+
+class TestReplicaLeitura(TransactionTestCase):  # sem a transação envolvente do TestCase
+
+    def setUp(self):
+        from django.core.cache import cache, caches
+        cache.clear()
+        caches['compartilhado'].clear()
+
+    def test_router_envia_leituras_marcadas_para_replica(self):
+        """Leituras marcadas vão para a réplica; escritas e transações ficam no primário"""
+        from django.db import transaction
+        from .routers import ReplicaRouter, _ler_da_replica
+        from rest_framework.authtoken.models import Token
+
+        router = ReplicaRouter(replicas=['replica_1'])
+        self.assertIsNone(router.db_for_read(Evento))  # fora de requisição marcada
+        marcador = _ler_da_replica.set(True)
+        try:
+            self.assertEqual(router.db_for_read(Evento), 'replica_1')
+            self.assertIsNone(router.db_for_read(Token))  # só o app core é roteado
+            with transaction.atomic():
+                self.assertEqual(router.db_for_read(Evento), 'default')
+        finally:
+            _ler_da_replica.reset(marcador)
+        self.assertEqual(router.db_for_write(Evento), 'default')
+        self.assertFalse(router.allow_migrate('replica_1', 'core'))
+
+    def test_caches_por_versao_preenchidos_no_primario(self):
+        """Programação, dashboard e contagens gravados na chave da versão são lidos do primário"""
+        from unittest import mock
+        from django.db import router
+        from django.utils.connection import ConnectionDoesNotExist
+        from .routers import ReplicaRouter, _ler_da_replica
+        from .programacao import programacao_evento
+        from .views import dados_dashboard
+        evento = Evento.objects.create(
+            nome="Evento Réplica", descricao="X", local="Local",
+            data_inicio="2030-12-01T09:00:00Z", data_fim="2030-12-03T18:00:00Z",
+        )
+        replica_router = next(r for r in router.routers if isinstance(r, ReplicaRouter))
+        marcador = _ler_da_replica.set(True)
+        try:
+            with mock.patch.object(replica_router, 'replicas', ['replica_inexistente']):
+                with self.assertRaises(ConnectionDoesNotExist):
+                    Evento.objects.count()  # leitura comum iria para a réplica
+                self.assertEqual(programacao_evento(evento.pk)[1]['dias'], [])
+                self.assertEqual(dados_dashboard(evento.pk)[1]['nome'], "Evento Réplica")
+                self.assertEqual(self.client.get('/eventos/').status_code, status.HTTP_200_OK)
+        finally:
+            _ler_da_replica.reset(marcador)
+
+    def test_fixacao_no_primario_apos_escrita(self):
+        """Depois de uma escrita o cliente lê do primário, por cookie ou pela credencial (em qualquer worker)"""
+        from unittest import mock
+        from django.core.cache import cache
+        from django.http import HttpResponse
+        from django.test import RequestFactory
+        from .middleware import ReplicaMiddleware, COOKIE_FIXACAO
+        from .routers import ler_da_replica
+
+        leituras = []
+
+        def view(request):
+            leituras.append(ler_da_replica())
+            return HttpResponse('ok')
+
+        middleware = ReplicaMiddleware(view)
+        fabrica = RequestFactory()
+        with mock.patch('core.middleware.aliases_replicas', return_value=['replica_1']):
+            middleware(fabrica.get('/api/eventos/', HTTP_AUTHORIZATION='Token abc'))
+            response = middleware(fabrica.post('/api/inscricoes/', HTTP_AUTHORIZATION='Token abc'))
+            self.assertIn(COOKIE_FIXACAO, response.cookies)
+            cache.clear()  # o cache local de outro worker não sabe da escrita
+            middleware(fabrica.get('/api/inscricoes/', HTTP_AUTHORIZATION='Token abc'))  # mesma credencial, sem cookie
+            requisicao = fabrica.get('/api/inscricoes/')
+            requisicao.COOKIES[COOKIE_FIXACAO] = '1'
+            middleware(requisicao)
+            middleware(fabrica.get('/api/eventos/', HTTP_AUTHORIZATION='Token outro'))
+        self.assertEqual(leituras, [True, False, False, False, True])
+        self.assertFalse(ler_da_replica())  # o marcador é desfeito ao fim da requisição
+
+class TestLimiteJanelaDeslizante(APITestCase):
+
+    def setUp(self):
+        from django.core.cache import caches
+        caches['compartilhado'].clear()
+
+    def _throttle(self, agora):
+        from .throttling import JanelaDeslizanteThrottle
+        throttle = JanelaDeslizanteThrottle()
+        throttle.timer = lambda: agora
+        return throttle
+
+    def test_janela_deslizante_com_dois_contadores(self):
+        """Conta com dois inteiros por chave e pondera a janela anterior"""
+        from types import SimpleNamespace
+        from django.core.cache import caches
+        from django.test import RequestFactory
+        from django.contrib.auth.models import AnonymousUser
+
+        requisicao = RequestFactory().get('/api/eventos/')
+        requisicao.user = AnonymousUser()
+        view = SimpleNamespace(throttle_scope='teste')
+        rest = {'DEFAULT_THROTTLE_RATES': {'teste': '3/min'}}
+        with override_settings(REST_FRAMEWORK=rest):
+            inicio = 6000.0  # início de uma janela de 60s
+            self.assertEqual([self._throttle(inicio).allow_request(requisicao, view) for _ in range(4)], [True, True, True, False])
+            self.assertEqual(caches['compartilhado'].get('throttle:teste:127.0.0.1:100'), 3)  # a recusada não conta
+
+            meio = self._throttle(inicio + 90)  # metade da janela seguinte: 3 * 0.5 + atual
+            self.assertTrue(meio.allow_request(requisicao, view))
+            negado = self._throttle(inicio + 90)
+            self.assertFalse(negado.allow_request(requisicao, view))
+            self.assertAlmostEqual(negado.wait(), 10.0)  # 3 * (1 - f) + 2 <= 3  =>  f >= 2/3, ou seja, 10s depois
+
+    def test_producao_exige_cache_compartilhado(self):
+        """Com DEBUG=False e sem CACHE_COMPARTILHADO_URL as settings não carregam"""
+        import os
+        import subprocess
+        import sys
+        from django.conf import settings
+        ambiente = {chave: valor for chave, valor in os.environ.items() if chave != 'CACHE_COMPARTILHADO_URL'}
+        ambiente.update(DEBUG='False', SECRET_KEY='teste')
+        resultado = subprocess.run(
+            [sys.executable, '-c', 'import gestao_eventos.settings'],
+            cwd=settings.BASE_DIR, env=ambiente, capture_output=True, text=True,
+        )
+        self.assertNotEqual(resultado.returncode, 0)
+        self.assertIn('CACHE_COMPARTILHADO_URL', resultado.stderr)
+
+    def test_limite_por_escopo_no_registro(self):
+        """O registro tem limite próprio e não consome a cota das leituras"""
+        from django.conf import settings
+        rest = dict(settings.REST_FRAMEWORK, DEFAULT_THROTTLE_RATES={'registro': '2/hour', 'leitura': '100/hour', 'anon': '100/hour'})
+        with override_settings(REST_FRAMEWORK=rest):
+            for numero in range(2):
+                response = self.client.post('/api/participantes/registro/', {
+                    'username': f'novo{numero}', 'email': f'novo{numero}@x.com',
+                    'password': 'SenhaForte123', 'password_confirm': 'SenhaForte123',
+                })
+                self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            response = self.client.post('/api/participantes/registro/', {'username': 'novo3'})
+            self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+            self.assertIn('Retry-After', response)
+            self.assertEqual(self.client.get('/api/eventos/').status_code, status.HTTP_200_OK)
+
+class TestArquivamentoEventos(APITestCase):
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.user = User.objects.create_user(username='arquivo', password='pass')
+        self.palestrante = User.objects.create_user(username='palestrante', password='pass')
+        self.eventos = []
+        for nome in ["Antigo 1", "Antigo 2", "Futuro"]:
+            evento = Evento.objects.create(
+                nome=nome, descricao="X", local="Local",
+                data_inicio="2030-03-01T09:00:00Z", data_fim="2030-03-01T18:00:00Z",
+            )
+            Atividade.objects.create(
+                evento=evento, responsavel=self.palestrante, titulo=f"Palestra {nome}", tipo="palestra",
+                horario_inicio="2030-03-01T10:00:00Z", horario_fim="2030-03-01T11:00:00Z",
+            )
+            Inscricao.objects.create(participante=self.user, evento=evento)
+            self.eventos.append(evento)
+        # Eventos já encerrados (o save() não permite inscrições em eventos passados)
+        antigos = [evento.pk for evento in self.eventos[:2]]
+        Evento.objects.filter(pk__in=antigos).update(data_inicio="2020-03-01T09:00:00Z", data_fim="2020-03-01T18:00:00Z")
+        Atividade.objects.filter(evento_id__in=antigos).update(horario_inicio="2020-03-01T10:00:00Z", horario_fim="2020-03-01T11:00:00Z")
+
+    def test_arquivar_eventos_encerrados_em_lotes(self):
+        """Eventos antigos (inclusive excluídos) vão para o arquivo com atividades e inscrições"""
+        from .arquivamento import arquivar_eventos
+        from .models import EventoArquivado, InscricaoArquivada
+        Evento.objects.get(pk=self.eventos[1].pk).delete()  # soft delete também é arquivado
+
+        self.assertEqual(arquivar_eventos(retencao_dias=30, tamanho_lote=1), 2)
+        self.assertEqual(list(Evento.all_objects.values_list('nome', flat=True)), ["Futuro"])
+        self.assertEqual(Inscricao.objects.count(), 1)
+        arquivado = EventoArquivado.objects.get(pk=self.eventos[0].pk)  # IDs preservados
+        self.assertEqual(arquivado.atividades.get().responsavel, self.palestrante)
+        self.assertIsNotNone(EventoArquivado.objects.get(pk=self.eventos[1].pk).excluido_em)
+        self.assertEqual(InscricaoArquivada.objects.filter(participante=self.user).count(), 2)
+        self.assertEqual(arquivar_eventos(retencao_dias=30), 0)  # nada mais a arquivar
+
+    def test_endpoint_somente_leitura(self):
+        """Eventos arquivados continuam legíveis, mas não editáveis"""
+        from .arquivamento import arquivar_eventos
+        arquivar_eventos(retencao_dias=30)
+        with self.assertNumQueries(3):  # contagem, eventos com total de inscritos, atividades
+            response = self.client.get('/api/eventos-arquivados/')
+        self.assertEqual(response.data['count'], 2)
+        detalhe = self.client.get(f'/api/eventos-arquivados/{self.eventos[0].pk}/').data
+        self.assertEqual(detalhe['total_inscritos'], 1)
+        self.assertEqual(detalhe['atividades'][0]['responsavel_nome'], 'palestrante')
+        self.client.force_authenticate(user=self.user)
+        response = self.client.delete(f'/api/eventos-arquivados/{self.eventos[0].pk}/')
+        self.assertEqual(response.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+
+    def test_soft_delete_com_indices_parciais(self):
+        """delete() só marca o evento; ele some da API e da agenda e pode ser restaurado"""
+        from django.db import connection
+        futuro = self.eventos[2]
+        self.client.force_authenticate(user=self.user)
+        agenda = '/api/participantes/me/agenda/?inicio=2030-01-01'
+        self.assertEqual(len(self.client.get(agenda).data['eventos']), 1)
+
+        futuro.delete()
+        self.assertTrue(Evento.all_objects.filter(pk=futuro.pk).exists())
+        self.assertEqual(self.client.get(f'/api/eventos/{futuro.pk}/').status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.client.get(agenda).data['eventos'], [])
+
+        Evento.all_objects.get(pk=futuro.pk).undelete()
+        self.assertEqual(self.client.get(f'/api/eventos/{futuro.pk}/').status_code, status.HTTP_200_OK)
+        with connection.cursor() as cursor:
+            indices = connection.introspection.get_constraints(cursor, Evento._meta.db_table)
+        self.assertTrue({'evento_ativo_inicio_idx', 'evento_ativo_fim_idx'} <= set(indices))
+
+    def test_filhos_de_evento_excluido_somem_da_api(self):
+        """Atividades e inscrições de um evento excluído não aparecem em /api/atividades/ nem em /api/inscricoes/"""
+        futuro = self.eventos[2]
+        self.client.force_authenticate(user=self.user)
+        futuro.delete()
+        atividades = self.client.get('/api/atividades/').data['results']
+        self.assertNotIn(futuro.pk, [atividade['evento'] for atividade in atividades])
+        inscricoes = self.client.get('/api/inscricoes/').data['results']
+        self.assertNotIn(futuro.pk, [inscricao['evento'] for inscricao in inscricoes])
+
+    def test_arquivamento_sem_signals_por_linha(self):
+        """Atividades e inscrições saem com DELETE direto; as agendas dos inscritos são invalidadas"""
+        from django.db.models.signals import post_delete
+        from .arquivamento import arquivar_eventos
+        from .cache_eventos import eventos_do_participante
+        self.assertEqual(len(eventos_do_participante(self.user.pk)), 3)
+        removidas = []
+        receptor = lambda sender, instance, **kwargs: removidas.append(instance)
+        post_delete.connect(receptor, sender=Inscricao)
+        post_delete.connect(receptor, sender=Atividade)
+        try:
+            arquivar_eventos(retencao_dias=30)
+        finally:
+            post_delete.disconnect(receptor, sender=Inscricao)
+            post_delete.disconnect(receptor, sender=Atividade)
+        self.assertEqual(removidas, [])
+        self.assertEqual(eventos_do_participante(self.user.pk), [self.eventos[2].pk])
+
+class TestRequisicoesEmLote(APITestCase):
+
+    def setUp(self):
+        from django.core.cache import cache, caches
+        cache.clear()
+        caches['compartilhado'].clear() # Contadores do throttle
+        self.user = User.objects.create_user(username='lote', password='pass')
+        self.client.force_authenticate(user=self.user)
+        self.evento = Evento.objects.create(
+            nome="Evento Lote", descricao="X", local="Local",
+            data_inicio="2030-05-01T09:00:00Z", data_fim="2030-05-01T18:00:00Z",
+        )
+        Inscricao.objects.create(participante=self.user, evento=self.evento)
+
+    def test_tela_do_evento_em_uma_requisicao(self):
+        """Retorna todas as respostas em ordem e busca o evento repetido uma única vez"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        base = f'/api/eventos/{self.evento.pk}/'
+        urls = [base, base + 'atividades/', base + 'participantes/', base + 'dashboard/', '/api/inscricoes/', base]
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.post('/api/batch/', {'requisicoes': urls}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        respostas = response.data['respostas']
+        self.assertEqual([r['url'] for r in respostas], urls)
+        self.assertEqual({r['status'] for r in respostas}, {200})
+        self.assertEqual(respostas[0]['dados']['nome'], "Evento Lote")
+        self.assertEqual(respostas[3]['dados']['total_inscritos'], 1)
+        self.assertEqual(respostas[4]['dados']['results'][0]['evento'], self.evento.pk)
+        sqls = [consulta['sql'] for consulta in consultas.captured_queries if 'FROM "core_evento"' in consulta['sql']]
+        self.assertEqual(len(sqls), len(set(sqls)))  # get_object() do evento reaproveitado entre as URLs
+
+    def test_throttle_por_sub_requisicao(self):
+        """Cada sub-requisição conta no limite da própria rota; a recusada volta com 429 no item"""
+        from django.conf import settings
+        rest = dict(settings.REST_FRAMEWORK, DEFAULT_THROTTLE_RATES={'leitura': '2/hour', 'user': '1/hour'})
+        urls = ['/api/eventos/', f'/api/eventos/{self.evento.pk}/', '/api/inscricoes/', '/api/eventos/']
+        with override_settings(REST_FRAMEWORK=rest):
+            response = self.client.post('/api/batch/', {'requisicoes': urls}, format='json')
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            # O lote consome uma leitura; sobra uma para a primeira sub-requisição de leitura
+            self.assertEqual([r['status'] for r in response.data['respostas']], [200, 429, 200, 200])
+            response = self.client.post('/api/batch/', {'requisicoes': urls}, format='json')
+            self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_excecao_inesperada_fica_no_item(self):
+        """Uma exceção em uma sub-requisição vira 500 só no item; as demais respondem"""
+        from unittest import mock
+        urls = [f'/api/eventos/{self.evento.pk}/similares/', '/api/eventos/abc/similares/', f'/api/eventos/{self.evento.pk}/']
+        with mock.patch('core.views.EventoViewSet.similares', side_effect=RuntimeError('falha')), self.assertLogs('core.lote', 'ERROR'):
+            response = self.client.post('/api/batch/', {'requisicoes': urls}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([r['status'] for r in response.data['respostas']], [500, 500, 200])
+
+    def test_rotas_recusadas(self):
+        """Só aceita leituras JSON das rotas do core; erros ficam na sub-resposta"""
+        urls = [
+            '/api/eventos/999/', 'https://externo.com/api/eventos/', '/admin/', '/api/batch/',
+            f'/api/eventos/{self.evento.pk}/calendar.ics',
+        ]
+        response = self.client.post('/api/batch/', {'requisicoes': urls}, format='json')
+        self.assertEqual([r['status'] for r in response.data['respostas']], [404, 400, 400, 400, 400])
+        response = self.client.post('/api/batch/', {'requisicoes': ['/api/eventos/'] * 21}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+class _ServidorSMTPFalso:
+    """Servidor SMTP mínimo em thread: registra conexões e mensagens; recusa destinatários 'falha@'."""
+
+    def __init__(self):
+        import socketserver
+        import threading
+        servidor = self
+        self.conexoes = 0
+        self.mensagens = []
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                servidor.conexoes += 1
+                self.wfile.write(b'220 stub\r\n')
+                destinatarios, dados = [], None
+                for linha in self.rfile:
+                    linha = linha.decode().rstrip('\r\n')
+                    if dados is not None:
+                        if linha == '.':
+                            servidor.mensagens.append((destinatarios, '\n'.join(dados)))
+                            destinatarios, dados = [], None
+                            self.wfile.write(b'250 ok\r\n')
+                        else:
+                            dados.append(linha)
+                        continue
+                    comando = linha[:4].upper()
+                    if comando == 'QUIT':
+                        self.wfile.write(b'221 tchau\r\n')
+                        return
+                    if comando == 'RCPT' and 'falha@' in linha:
+                        self.wfile.write(b'451 tente depois\r\n')
+                    elif comando == 'RCPT':
+                        destinatarios.append(linha.split(':', 1)[1].strip(' <>'))
+                        self.wfile.write(b'250 ok\r\n')
+                    elif comando == 'DATA':
+                        dados = []
+                        self.wfile.write(b'354 envie\r\n')
+                    else:  # EHLO, HELO, MAIL, RSET, NOOP
+                        self.wfile.write(b'250 ok\r\n')
+
+        self.servidor = socketserver.ThreadingTCPServer(('127.0.0.1', 0), Handler)
+        self.servidor.daemon_threads = True
+        self.porta = self.servidor.server_address[1]
+        threading.Thread(target=self.servidor.serve_forever, daemon=True).start()
+
+    def fechar(self):
+        self.servidor.shutdown()
+        self.servidor.server_close()
+
+
+class TestCaixaSaidaEmails(APITestCase):
+
+    def setUp(self):
+        self.smtp = _ServidorSMTPFalso()
+        self.addCleanup(self.smtp.fechar)
+        self.configuracao = override_settings(
+            EMAIL_BACKEND='django.core.mail.backends.smtp.EmailBackend', EMAIL_HOST='127.0.0.1',
+            EMAIL_PORT=self.smtp.porta, EMAIL_MAX_POR_SEGUNDO=1000, TAREFAS_SINCRONAS=True,
+        )
+        self.configuracao.enable()
+        self.addCleanup(self.configuracao.disable)
+
+    def test_lote_por_uma_conexao_com_novas_tentativas(self):
+        """O lote usa uma conexão SMTP; destinatários recusados voltam para a fila com espera"""
+        from django.utils import timezone
+        from .caixa_saida import enfileirar_email
+        from .models import EmailPendente
+        destinatarios = [f'pessoa{numero}@x.com' for numero in range(4)] + ['falha@x.com']
+        with self.captureOnCommitCallbacks(execute=True):
+            enfileirar_email('Aviso', 'Corpo', destinatarios)
+
+        self.assertEqual(self.smtp.conexoes, 1)
+        self.assertEqual(sorted(d for ds, _ in self.smtp.mensagens for d in ds), destinatarios[:4])
+        self.assertEqual(EmailPendente.objects.filter(status='enviado').count(), 4)
+        falha = EmailPendente.objects.get(destinatario='falha@x.com')
+        self.assertEqual((falha.status, falha.tentativas), ('pendente', 1))
+        self.assertGreater(falha.proxima_tentativa, timezone.now())
+        self.assertIn('SMTPRecipientsRefused', falha.erro)
+
+    def test_notificar_inscritos_em_blocos_sem_duplicar(self):
+        """A notificação em massa é gravada em blocos e pode ser repetida sem duplicar"""
+        from io import StringIO
+        from django.core.management import call_command
+        from .models import EmailPendente
+        evento = Evento.objects.create(
+            nome="Evento Email", descricao="X", local="Local",
+            data_inicio="2030-06-01T09:00:00Z", data_fim="2030-06-01T18:00:00Z",
+        )
+        for numero in range(5):
+            participante = User.objects.create_user(username=f'inscrito{numero}', password='pass', email=f'inscrito{numero}@x.com')
+            Inscricao.objects.create(participante=participante, evento=evento, status='cancelado' if numero == 4 else 'pendente')
+        argumentos = [str(evento.pk), '--assunto', 'Mudança de sala', '--mensagem', 'Sala 2', '--bloco', '2']
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('notificar_inscritos', *argumentos, stdout=StringIO())
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('notificar_inscritos', *argumentos, stdout=StringIO())
+        self.assertEqual(EmailPendente.objects.count(), 4)
+        self.assertEqual(EmailPendente.objects.filter(status='enviado').count(), 4)
+        self.assertEqual(len(self.smtp.mensagens), 4)
+
+    def test_formulario_de_contato_enfileira(self):
+        """O formulário de contato grava na caixa de saída e não fala com o SMTP na requisição"""
+        from unittest import mock
+        from .models import EmailPendente
+        with override_settings(TAREFAS_SINCRONAS=False), mock.patch('core.tarefas._executor') as executor:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post('/contato/', {'email': 'visitante@x.com', 'mensagem': 'Olá'})
+        self.assertEqual(response.status_code, 302)
+        email = EmailPendente.objects.get()
+        self.assertEqual((email.responder_para, email.status), ('visitante@x.com', 'pendente'))
+        self.assertTrue(executor.submit.called)  # envio agendado no pool
+        self.assertEqual(self.smtp.conexoes, 0)
+
+    def test_mensagem_invalida_nao_trava_a_fila(self):
+        """Um cabeçalho inválido conta tentativa só da sua mensagem; as demais do lote ficam enviadas"""
+        from .caixa_saida import drenar_caixa_saida
+        from .models import EmailPendente
+        EmailPendente.objects.create(destinatario='a@x.com', assunto='Oi', corpo='X')
+        EmailPendente.objects.create(destinatario='b@x.com', assunto='Oi', corpo='X', responder_para='x@x.com\nBcc: todos@x.com')
+        EmailPendente.objects.create(destinatario='c@x.com', assunto='Oi', corpo='X')
+        drenar_caixa_saida()
+        self.assertEqual(sorted(EmailPendente.objects.filter(status='enviado').values_list('destinatario', flat=True)), ['a@x.com', 'c@x.com'])
+        invalida = EmailPendente.objects.get(destinatario='b@x.com')
+        self.assertEqual((invalida.status, invalida.tentativas), ('pendente', 1))
+        self.assertIn('BadHeaderError', invalida.erro)
+
+    def test_um_drenador_entre_processos(self):
+        """Com outro processo drenando (marca no cache compartilhado), o enviar_emails não envia em paralelo"""
+        from io import StringIO
+        from django.core.cache import cache, caches
+        from django.core.management import call_command
+        from .caixa_saida import CHAVE_DRENAGEM
+        from .models import EmailPendente
+        EmailPendente.objects.create(destinatario='a@x.com', assunto='Oi', corpo='X')
+        caches['compartilhado'].add(CHAVE_DRENAGEM, True, 60)
+        cache.clear()  # a marca não está no cache local deste processo
+        call_command('enviar_emails', stdout=StringIO())
+        self.assertEqual(self.smtp.conexoes, 0)
+        caches['compartilhado'].delete(CHAVE_DRENAGEM)
+        call_command('enviar_emails', stdout=StringIO())
+        self.assertEqual(EmailPendente.objects.get().status, 'enviado')
+
+    def test_um_drenador_por_notificacao_e_contato_validado(self):
+        """A notificação em blocos agenda um único drenador; o contato recusa emails inválidos"""
+        from unittest import mock
+        from .caixa_saida import notificar_inscritos
+        from .models import EmailPendente
+        evento = Evento.objects.create(
+            nome="Evento Blocos", descricao="X", local="Local",
+            data_inicio="2030-06-01T09:00:00Z", data_fim="2030-06-01T18:00:00Z",
+        )
+        for numero in range(5):
+            participante = User.objects.create_user(username=f'bloco{numero}', password='pass', email=f'bloco{numero}@x.com')
+            Inscricao.objects.create(participante=participante, evento=evento)
+        with mock.patch('core.caixa_saida.agendar') as agendar:
+            self.assertEqual(notificar_inscritos(evento, 'Aviso', 'X', tamanho_bloco=2), 5)
+        self.assertEqual(agendar.call_count, 1)
+        EmailPendente.objects.all().delete()
+        self.client.post('/contato/', {'email': 'x@x.com\nBcc: todos@x.com', 'mensagem': 'Olá'})
+        self.assertFalse(EmailPendente.objects.exists())
+
+class TestDashboardAoVivo(APITestCase):
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.user = User.objects.create_user(username='aovivo', password='pass', tipo='estudante')
+        self.evento = Evento.objects.create(
+            nome="Evento Ao Vivo", descricao="X", local="Local",
+            data_inicio="2030-07-01T09:00:00Z", data_fim="2030-07-01T18:00:00Z",
+        )
+
+    async def test_hub_compartilha_uma_assinatura_por_canal(self):
+        """Vários ouvintes do mesmo evento usam uma única assinatura no backend"""
+        import asyncio
+        from .tempo_real import Hub, MemoriaPubSub
+        backend = MemoriaPubSub()
+        hub = Hub(backend)
+        filas = [hub.entrar('evento:1'), hub.entrar('evento:1')]
+        self.assertEqual(len(backend._callbacks['evento:1']), 1)
+
+        backend.publicar('evento:1', {'tipo': 'delta', 'versao': 1, 'dados': {'total_inscritos': 1}})
+        await asyncio.sleep(0)
+        self.assertEqual([fila.get_nowait()['dados'] for fila in filas], [{'total_inscritos': 1}] * 2)
+        for fila in filas:
+            hub.sair('evento:1', fila)
+        self.assertNotIn('evento:1', backend._callbacks)
+
+    def test_signals_publicam_deltas_apos_commit(self):
+        """Inscrições e atividades novas geram deltas; edições pedem ressincronização"""
+        from .tempo_real import obter_hub, canal_evento
+        recebidas = []
+        backend = obter_hub().backend
+        backend.assinar(canal_evento(self.evento.pk), recebidas.append)
+        self.addCleanup(backend.cancelar, canal_evento(self.evento.pk), recebidas.append)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Inscricao.objects.create(participante=self.user, evento=self.evento)
+            atividade = Atividade.objects.create(
+                evento=self.evento, responsavel=self.user, titulo="Oficina", tipo="oficina",
+                horario_inicio="2030-07-01T10:00:00Z", horario_fim="2030-07-01T11:00:00Z",
+            )
+        with self.captureOnCommitCallbacks(execute=True):
+            atividade.titulo = "Oficina 2"
+            atividade.save()
+        self.assertEqual([mensagem['tipo'] for mensagem in recebidas], ['delta', 'delta', 'resync'])
+        self.assertEqual(recebidas[0]['dados'], {'total_inscritos': 1, 'participantes_por_tipo': {'estudante': 1}})
+        self.assertEqual(recebidas[1]['dados'], {'total_atividades': 1, 'atividades_por_tipo': {'oficina': 1}})
+        self.assertLess(recebidas[1]['versao'], recebidas[2]['versao']) # commits separados, versões crescentes
+
+    async def test_stream_sse_snapshot_e_deltas(self):
+        """O stream envia o snapshot e depois os deltas publicados no canal"""
+        import json
+        from .tempo_real import obter_hub, canal_evento
+        response = await self.async_client.get(f'/api/eventos/{self.evento.pk}/dashboard/stream/')
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        conteudo = response.streaming_content
+        snapshot = (await anext(conteudo)).decode()
+        self.assertIn('event: snapshot', snapshot)
+        self.assertEqual(json.loads(snapshot.split('data: ')[1])['total_inscritos'], 0)
+
+        hub = obter_hub()
+        self.assertEqual(hub.ouvintes(canal_evento(self.evento.pk)), 1)
+        hub.backend.publicar(canal_evento(self.evento.pk), {'tipo': 'delta', 'versao': 0, 'dados': {'total_inscritos': 5}})  # antiga
+        hub.backend.publicar(canal_evento(self.evento.pk), {'tipo': 'delta', 'versao': 2 ** 63, 'dados': {'total_inscritos': 1}})
+        delta = (await anext(conteudo)).decode()
+        self.assertIn('event: delta', delta)
+        self.assertEqual(json.loads(delta.split('data: ')[1]), {'total_inscritos': 1})
+        await conteudo.aclose()
+
+    def test_wsgi_envia_snapshot_e_retry(self):
+        """Sem ASGI o endpoint responde o snapshot e pede reconexão"""
+        response = self.client.get(f'/api/eventos/{self.evento.pk}/dashboard/stream/')
+        corpo = response.content.decode()
+        self.assertTrue(corpo.startswith('retry: '))
+        self.assertIn('event: snapshot', corpo)
+        self.assertEqual(self.client.get('/api/eventos/999/dashboard/stream/').status_code, status.HTTP_404_NOT_FOUND)
+
+class TestCheckinEntrada(APITestCase):
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.organizador = User.objects.create_user(username='porteiro', password='pass', tipo='organizador')
+        self.evento = Evento.objects.create(
+            nome="Evento Check-in", descricao="X", local="Local", organizador=self.organizador,
+            data_inicio="2030-08-01T09:00:00Z", data_fim="2030-08-01T18:00:00Z",
+        )
+        self.inscricoes = [
+            Inscricao.objects.create(participante=User.objects.create_user(username=f'p{i}', password='pass'), evento=self.evento)
+            for i in range(3)
+        ]
+        self.inscricoes[2].status = 'cancelado'
+        self.inscricoes[2].save()
+        self.url = f'/api/eventos/{self.evento.pk}/checkin/'
+
+    def test_codigo_de_ingresso_assinado(self):
+        """O código identifica a inscrição só no seu evento e não aceita adulteração"""
+        from .checkin import codigo_ingresso, ler_codigo
+        codigo = codigo_ingresso(self.evento.pk, 42)
+        self.assertEqual(ler_codigo(self.evento.pk, codigo.lower()), 42)
+        self.assertIsNone(ler_codigo(self.evento.pk + 1, codigo))
+        self.assertIsNone(ler_codigo(self.evento.pk, '43' + codigo[2:]))
+        self.assertIsNone(ler_codigo(self.evento.pk, 'lixo'))
+
+    def test_roster_para_organizadores_com_etag(self):
+        """A lista de ingressos exclui canceladas, é restrita a organizadores e responde 304 sem mudanças"""
+        self.client.force_authenticate(user=self.inscricoes[0].participante)
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_403_FORBIDDEN)
+
+        self.client.force_authenticate(user=self.organizador)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([ingresso['nome'] for ingresso in response.data['ingressos']], ['p0', 'p1'])
+        with self.assertNumQueries(1): # apenas o get_object do evento
+            repetida = self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(repetida.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_apenas_o_organizador_do_evento(self):
+        """O tipo 'organizador' não basta: só quem organiza este evento (ou staff) vê ingressos e faz check-in"""
+        from .checkin import codigo_ingresso
+        resposta = self.client.post('/api/participantes/registro/', {
+            'username': 'intruso', 'email': 'intruso@x.com', 'password': 'pass', 'password_confirm': 'pass', 'tipo': 'organizador',
+        })
+        intruso = User.objects.get(pk=resposta.data['user_id'])
+        self.assertEqual(intruso.tipo, 'estudante') # o cadastro ignora o tipo
+        intruso.tipo = 'organizador'
+        intruso.save()
+        self.client.force_authenticate(user=intruso)
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_403_FORBIDDEN)
+        lote = {'checkins': [{'codigo': codigo_ingresso(self.evento.pk, self.inscricoes[0].pk)}]}
+        self.assertEqual(self.client.post(self.url, lote, format='json').status_code, status.HTTP_403_FORBIDDEN)
+        self.client.force_authenticate(user=User.objects.create_user(username='equipe', password='pass', is_staff=True))
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_200_OK)
+
+    def test_lote_offline_idempotente(self):
+        """Check-ins em lote: horário mais cedo vence, reenvio não altera e códigos inválidos são listados"""
+        from .checkin import codigo_ingresso
+        self.client.force_authenticate(user=self.organizador)
+        etag = self.client.get(self.url)['ETag']
+        codigos = [codigo_ingresso(self.evento.pk, inscricao.pk) for inscricao in self.inscricoes]
+        lote = {'checkins': [
+            {'codigo': codigos[0], 'horario': '2030-08-01T09:10:00Z'},
+            {'codigo': codigos[0], 'horario': '2030-08-01T09:05:00Z'},
+            {'codigo': codigos[1], 'horario': '2030-08-01T09:20:00Z'},
+            {'codigo': codigos[2]},
+            {'codigo': '999-FORJADO'},
+        ]}
+        response = self.client.post(self.url, lote, format='json')
+        self.assertEqual(response.data, {'registrados': 2, 'ja_registrados': 0, 'invalidos': ['999-FORJADO', codigos[2]]})
+        self.inscricoes[0].refresh_from_db()
+        self.assertEqual(self.inscricoes[0].data_checkin.isoformat(), '2030-08-01T09:05:00+00:00')
+
+        response = self.client.post(self.url, lote, format='json')
+        self.assertEqual((response.data['registrados'], response.data['ja_registrados']), (0, 2))
+        self.assertNotEqual(self.client.get(self.url)['ETag'], etag) # lista nova com os check-ins
+        self.assertEqual(self.client.post(self.url, {'checkins': 'x'}, format='json').status_code, status.HTTP_400_BAD_REQUEST)
+
+class TestSnapshotEvento(APITestCase):
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.responsavel = User.objects.create_user(username='palestrante', password='pass', first_name='Ana', last_name='Lima')
+        self.evento = Evento.objects.create(
+            nome="Evento Snapshot", descricao="X", local="Local",
+            data_inicio="2030-09-01T09:00:00Z", data_fim="2030-09-01T18:00:00Z",
+        )
+        for hora, titulo in ((10, 'Abertura'), (11, 'Oficina')):
+            Atividade.objects.create(
+                evento=self.evento, responsavel=self.responsavel, titulo=titulo, tipo="palestra",
+                horario_inicio=f"2030-09-01T{hora}:00:00Z", horario_fim=f"2030-09-01T{hora}:30:00Z",
+            )
+        self.url = f'/api/eventos/{self.evento.pk}/snapshot/'
+
+    def test_artefato_gzip_compartilhado(self):
+        """Todos recebem os mesmos bytes gzip; clientes sem gzip recebem o JSON puro"""
+        import gzip, json
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        dados = json.loads(gzip.decompress(response.content))
+        self.assertEqual([atividade['titulo'] for atividade in dados['atividades']], ['Abertura', 'Oficina'])
+        self.assertEqual(dados['responsaveis'], [{'id': self.responsavel.pk, 'nome': 'Ana Lima', 'tipo': 'estudante'}])
+
+        with self.assertNumQueries(0):
+            repetida = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip, br')
+        self.assertEqual((repetida.content, repetida['ETag']), (response.content, response['ETag']))
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'], HTTP_ACCEPT_ENCODING='gzip').status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(json.loads(self.client.get(self.url).content), dados)
+        recusado = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip;q=0')
+        self.assertFalse(recusado.has_header('Content-Encoding'))
+        self.assertEqual(json.loads(recusado.content), dados)
+        self.assertEqual(self.client.get('/api/eventos/999/snapshot/').status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_range_retoma_download(self):
+        """Range devolve 206 com o trecho pedido; If-Range com outro ETag devolve tudo"""
+        completo = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip')
+        total = len(completo.content)
+        parcial = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip', HTTP_RANGE='bytes=10-')
+        self.assertEqual(parcial.status_code, status.HTTP_206_PARTIAL_CONTENT)
+        self.assertEqual(parcial['Content-Range'], f'bytes 10-{total - 1}/{total}')
+        self.assertEqual(completo.content[:10] + parcial.content, completo.content)
+        self.assertEqual(self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip', HTTP_RANGE='bytes=-5').content, completo.content[-5:])
+        self.assertEqual(self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip', HTTP_RANGE=f'bytes={total}-').status_code, 416)
+        outro = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip', HTTP_RANGE='bytes=10-', HTTP_IF_RANGE='"antigo"')
+        self.assertEqual(outro.status_code, status.HTTP_200_OK)
+
+    @override_settings(TAREFAS_SINCRONAS=True)
+    def test_regeneracao_em_segundo_plano(self):
+        """Nova versão: serve o artefato anterior e refaz em segundo plano; inscrições não mudam o ETag"""
+        etag = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip')['ETag']
+        Inscricao.objects.create(participante=self.responsavel, evento=self.evento) # muda a versão, não o conteúdo
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip')['ETag'], etag)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip')['ETag'], etag)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Atividade.objects.filter(titulo='Oficina').first().delete()
+        self.assertNotEqual(self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip')['ETag'], etag)
+
+class TestBuscaParticipantes(APITestCase):
+
+    def setUp(self):
+        self.staff = User.objects.create_user(username='Suporte', password='pass', is_staff=True, is_superuser=True, email='suporte@x.com')
+        self.maria = User.objects.create_user(username='Maria.Souza', password='pass', email='Maria@Exemplo.com', celular='(61) 99876-5432')
+        self.joao = User.objects.create_user(username='joao', password='pass', email='joao@outro.com', celular='+55 11 91234-0000', tipo='palestrante')
+        self.client.force_authenticate(user=self.staff)
+
+    def _buscar(self, termo):
+        response = self.client.get('/api/participantes/', {'search': termo})
+        return sorted(participante['username'] for participante in response.data['results'])
+
+    def test_colunas_normalizadas_no_save(self):
+        """username/email em minúsculas e celular só com dígitos, também com update_fields"""
+        self.assertEqual((self.maria.username_normalizado, self.maria.email_normalizado), ('maria.souza', 'maria@exemplo.com'))
+        self.assertEqual((self.maria.celular_digitos, self.maria.celular_invertido), ('61998765432', '23456789916'))
+        self.maria.celular = '61 3333-4444'
+        self.maria.save(update_fields=['celular'])
+        self.maria.refresh_from_db()
+        self.assertEqual(self.maria.celular_digitos, '6133334444')
+
+    def test_busca_por_prefixo_final_do_celular_e_tipo(self):
+        """Prefixo de usuário/email, início ou final do telefone e tipo exato"""
+        self.assertEqual(self._buscar('MARIA'), ['Maria.Souza'])
+        self.assertEqual(self._buscar('joao@'), ['joao'])
+        self.assertEqual(self._buscar('(61) 9987'), ['Maria.Souza'])
+        self.assertEqual(self._buscar('5432'), ['Maria.Souza']) # final do número
+        self.assertEqual(self._buscar('palestrante'), ['joao'])
+        self.assertEqual(self._buscar('souza'), []) # meio do texto não é buscado
+
+    def test_busca_usa_indice(self):
+        """A consulta de busca é resolvida por índices (sem varrer a tabela)"""
+        from django.db import connection
+        if connection.vendor != 'sqlite':
+            self.skipTest('Plano verificado apenas no SQLite')
+        consulta = User.objects.buscar('9987').only('pk').query
+        sql, params = consulta.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+            plano = ' '.join(linha[-1] for linha in cursor.fetchall())
+        self.assertIn('INDEX', plano)
+        self.assertNotIn('SCAN core_participante', plano.replace('USING INDEX', ''))
+
+    def test_prefixo_com_startswith_fora_do_sqlite(self):
+        """O intervalo bytewise fica só no SQLite; nos demais bancos a busca é um startswith"""
+        from django.db.models import Q
+        from .models import filtro_prefixo
+        self.assertEqual(filtro_prefixo('email_normalizado', 'ma', 'sqlite'), Q(email_normalizado__gte='ma', email_normalizado__lt='ma\U0010ffff'))
+        self.assertEqual(filtro_prefixo('email_normalizado', 'ma', 'postgresql'), Q(email_normalizado__startswith='ma'))
+
+    def test_busca_no_admin(self):
+        """O admin de participantes usa a mesma busca indexada"""
+        from django.contrib import admin
+        modelo_admin = admin.site._registry[User]
+        resultado, duplicados = modelo_admin.get_search_results(None, User.objects.all(), '5432')
+        self.assertEqual((list(resultado), duplicados), ([self.maria], False))
+        self.assertTrue(modelo_admin.search_fields) # mantém a caixa de busca na lista
+
+class TestEventosSimilares(APITestCase):
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.eventos = [
+            Evento.objects.create(
+                nome=f"Evento {i}", descricao="X", local="Local",
+                data_inicio=f"2030-10-0{i + 1}T09:00:00Z", data_fim=f"2030-10-0{i + 1}T18:00:00Z",
+            )
+            for i in range(4)
+        ]
+        self.participantes = [User.objects.create_user(username=f'co{i}', password='pass') for i in range(4)]
+        # Evento 0: co0, co1, co2 | Evento 1: co0, co1 | Evento 2: co2, co3 | Evento 3: ninguém
+        for participante, eventos in ((0, (0, 1)), (1, (0, 1)), (2, (0, 2)), (3, (2,))):
+            for evento in eventos:
+                Inscricao.objects.create(participante=self.participantes[participante], evento=self.eventos[evento])
+
+    def _similares(self, evento):
+        return [(item['id'], item['em_comum']) for item in self.client.get(f'/api/eventos/{evento.pk}/similares/').data]
+
+    def test_cosseno_da_co_inscricao(self):
+        """Pontuação = em comum / sqrt(|A| * |B|), em ordem decrescente"""
+        import math
+        from .recomendacoes import atualizar_recomendacoes
+        self.assertEqual(atualizar_recomendacoes(completo=True), 4)
+        self.assertEqual(self._similares(self.eventos[0]), [(self.eventos[1].pk, 2), (self.eventos[2].pk, 1)])
+        response = self.client.get(f'/api/eventos/{self.eventos[0].pk}/similares/')
+        self.assertAlmostEqual(response.data[0]['pontuacao'], 2 / math.sqrt(3 * 2), places=5)
+        self.assertAlmostEqual(response.data[1]['pontuacao'], 1 / math.sqrt(3 * 2), places=5)
+        self.assertEqual(self._similares(self.eventos[3]), [])
+        with self.assertNumQueries(2): # o evento (404 se não existe) e as recomendações pelo índice
+            self.client.get(f'/api/eventos/{self.eventos[1].pk}/similares/')
+
+    def test_evento_invalido_ou_excluido(self):
+        """IDs não numéricos, inexistentes ou de eventos excluídos respondem 404"""
+        self.eventos[3].delete()
+        for pk in ('abc', '999999', self.eventos[3].pk):
+            self.assertEqual(self.client.get(f'/api/eventos/{pk}/similares/').status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_atualizacao_incremental(self):
+        """Só os eventos afetados pelas novas inscrições são recalculados"""
+        from .recomendacoes import atualizar_recomendacoes
+        atualizar_recomendacoes(completo=True)
+        self.assertEqual(atualizar_recomendacoes(), 0) # nada novo
+
+        Inscricao.objects.create(participante=self.participantes[3], evento=self.eventos[3])
+        recalculados = atualizar_recomendacoes()
+        self.assertEqual(recalculados, 2) # evento 3 e evento 2 (co3 está nos dois)
+        self.assertEqual(self._similares(self.eventos[3]), [(self.eventos[2].pk, 1)])
+        self.assertEqual(self._similares(self.eventos[2]), [(self.eventos[3].pk, 1), (self.eventos[0].pk, 1)]) # 1/sqrt(2) > 1/sqrt(6)
+
+    def test_pagina_do_evento_mostra_similares(self):
+        """A página de detalhes lista as recomendações"""
+        from .recomendacoes import atualizar_recomendacoes
+        atualizar_recomendacoes(completo=True)
+        response = self.client.get(f'/evento/{self.eventos[1].pk}/')
+        self.assertContains(response, 'também se inscreveu em')
+        self.assertContains(response, f'/evento/{self.eventos[0].pk}/')
+
+@override_settings(TAREFAS_SINCRONAS=True, TIME_ZONE='UTC')
+class TestEstatisticasInscricoes(APITestCase):
+
+    def setUp(self):
+        self.organizador = User.objects.create_user(username='analista', password='pass', is_staff=True)
+        self.eventos = [
+            Evento.objects.create(
+                nome=f"Evento Série {i}", descricao="X", local="Local",
+                data_inicio="2030-11-01T09:00:00Z", data_fim="2030-11-01T18:00:00Z",
+            )
+            for i in range(2)
+        ]
+        self.client.force_authenticate(user=self.organizador)
+
+    def _inscrever(self, username, evento, data, tipo='estudante', status_inscricao='pendente'):
+        with self.captureOnCommitCallbacks(execute=True):
+            inscricao = Inscricao.objects.create(
+                participante=User.objects.create_user(username=username, password='pass', tipo=tipo), evento=evento, status=status_inscricao,
+            )
+        from .estatisticas import consolidar_inscricoes
+        Inscricao.objects.filter(pk=inscricao.pk).update(data_inscricao=data) # data_inscricao é auto_now_add
+        consolidar_inscricoes([evento.pk])
+        inscricao.refresh_from_db()
+        return inscricao
+
+    def _serie(self, **params):
+        return self.client.get('/api/estatisticas/inscricoes/', {'inicio': '2030-01-01', 'fim': '2030-12-31', **params}).data['serie']
+
+    def test_serie_por_dia_e_hora_com_detalhamento(self):
+        """Totais por período, status e tipo, por evento e gerais"""
+        from datetime import datetime, timezone as dt_timezone
+        self._inscrever('s1', self.eventos[0], datetime(2030, 3, 1, 10, 5, tzinfo=dt_timezone.utc))
+        self._inscrever('s2', self.eventos[0], datetime(2030, 3, 1, 10, 40, tzinfo=dt_timezone.utc), tipo='convidado', status_inscricao='confirmado')
+        self._inscrever('s3', self.eventos[1], datetime(2030, 3, 2, 8, 0, tzinfo=dt_timezone.utc))
+
+        with self.assertNumQueries(1):
+            serie = self._serie(granularidade='dia')
+        self.assertEqual([(ponto['periodo'].day, ponto['total']) for ponto in serie], [(1, 2), (2, 1)])
+        self.assertEqual(serie[0]['status'], {'pendente': 1, 'confirmado': 1})
+        self.assertEqual(serie[0]['tipo'], {'estudante': 1, 'convidado': 1})
+
+        por_evento = self._serie(granularidade='hora', evento=self.eventos[0].pk, inicio='2030-03-01', fim='2030-03-05')
+        self.assertEqual([(ponto['periodo'].hour, ponto['total']) for ponto in por_evento], [(10, 2)])
+        self.assertEqual(self._serie(granularidade='mes')[0]['total'], 3)
+
+    def test_mudanca_de_status_e_remocao_recalculam(self):
+        """Mudanças de status (inclusive em lote pelo admin) e remoções atualizam a consolidação"""
+        from datetime import datetime, timezone as dt_timezone
+        from .models import InscricaoHora
+        from .tarefas import criar_tarefa_lote
+        with self.captureOnCommitCallbacks(execute=True):
+            Inscricao.objects.create(participante=self.organizador, evento=self.eventos[1])
+        self.assertEqual(self.client.get('/api/estatisticas/inscricoes/', {'evento': self.eventos[1].pk}).data['serie'][0]['total'], 1)
+
+        inscricao = self._inscrever('s1', self.eventos[0], datetime(2030, 3, 1, 10, 5, tzinfo=dt_timezone.utc))
+        with self.captureOnCommitCallbacks(execute=True):
+            criar_tarefa_lote('confirmar', Inscricao.objects.filter(pk=inscricao.pk))
+        self.assertEqual(self._serie()[0]['status'], {'confirmado': 1})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            inscricao.delete()
+        self.assertEqual(self._serie(), [])
+        self.assertFalse(InscricaoHora.objects.filter(evento_id=self.eventos[0].pk).exists())
+
+    def test_arquivamento_mantem_a_serie_geral(self):
+        """Arquivar um evento não apaga suas horas, e a consolidação completa as refaz do arquivo"""
+        from datetime import datetime, timezone as dt_timezone
+        from .arquivamento import arquivar_lote
+        from .estatisticas import consolidar_inscricoes
+        from .models import InscricaoHora
+        self._inscrever('s1', self.eventos[0], datetime(2030, 3, 1, 10, 5, tzinfo=dt_timezone.utc))
+        self._inscrever('s2', self.eventos[1], datetime(2030, 3, 1, 11, 0, tzinfo=dt_timezone.utc))
+        arquivar_lote([self.eventos[0].pk])
+        self.assertEqual(self._serie()[0]['total'], 2)
+        InscricaoHora.objects.all().delete()
+        consolidar_inscricoes()
+        self.assertEqual(self._serie()[0]['total'], 2)
+        self.eventos[1].delete()  # excluídos saem da série
+        self.assertEqual(self._serie()[0]['total'], 1)
+
+    def test_backfill_e_validacao(self):
+        """O comando reconstrói a consolidação; parâmetros inválidos e não organizadores são recusados"""
+        from datetime import datetime, timezone as dt_timezone
+        from django.core.management import call_command
+        from io import StringIO
+        from .models import InscricaoHora
+        self._inscrever('s1', self.eventos[0], datetime(2030, 3, 1, 10, 5, tzinfo=dt_timezone.utc))
+        InscricaoHora.objects.all().delete()
+        call_command('consolidar_inscricoes', stdout=StringIO())
+        self.assertEqual(self._serie()[0]['total'], 1)
+
+        self.assertEqual(self.client.get('/api/estatisticas/inscricoes/', {'granularidade': 'ano'}).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get('/api/estatisticas/inscricoes/', {'granularidade': 'hora', 'inicio': '2029-01-01'}).status_code, status.HTTP_400_BAD_REQUEST)
+        self.client.force_authenticate(user=User.objects.get(username='s1'))
+        self.assertEqual(self.client.get('/api/estatisticas/inscricoes/').status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_organizador_ve_so_os_proprios_eventos(self):
+        """Sem staff, só a série de um evento que o usuário organiza"""
+        dono = User.objects.create_user(username='dono', password='pass', tipo='organizador')
+        Evento.objects.filter(pk=self.eventos[0].pk).update(organizador=dono)
+        self.client.force_authenticate(user=dono)
+        self.assertEqual(self.client.get('/api/estatisticas/inscricoes/', {'evento': self.eventos[0].pk}).status_code, status.HTTP_200_OK)
+        self.assertEqual(self.client.get('/api/estatisticas/inscricoes/', {'evento': self.eventos[1].pk}).status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(self.client.get('/api/estatisticas/inscricoes/').status_code, status.HTTP_403_FORBIDDEN)
+
+class TestEsquemaOpenAPI(APITestCase):
+
+    def setUp(self):
+        import tempfile
+        diretorio = tempfile.TemporaryDirectory()
+        self.addCleanup(diretorio.cleanup)
+        from . import esquema
+        esquema._memoria.clear()
+        configuracao = self.settings(ESQUEMA_OPENAPI_DIR=diretorio.name, VERSAO_CODIGO='teste-1')
+        configuracao.enable()
+        self.addCleanup(configuracao.disable)
+        self.diretorio = diretorio.name
+
+    def test_gerado_uma_vez_e_servido_da_memoria(self):
+        """O primeiro acesso gera e grava; os seguintes servem os mesmos bytes sem introspecção"""
+        import os
+        from unittest import mock
+        from drf_spectacular.generators import SchemaGenerator
+        with mock.patch.object(SchemaGenerator, 'get_schema', autospec=True, side_effect=SchemaGenerator.get_schema) as gerar:
+            primeira = self.client.get('/api/schema/')
+            segunda = self.client.get('/api/schema/', {'format': 'json'})
+            terceira = self.client.get('/api/schema/')
+        self.assertEqual(gerar.call_count, 1)
+        self.assertEqual(primeira.content, terceira.content)
+        self.assertIn(b'openapi:', primeira.content)
+        self.assertEqual(segunda.json()['info']['title'], 'API de Gestão de Eventos')
+        self.assertEqual(sorted(os.listdir(self.diretorio)), ['openapi-teste-1.json', 'openapi-teste-1.yaml'])
+        self.assertEqual(self.client.get('/api/schema/', HTTP_IF_NONE_MATCH=primeira['ETag']).status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_nova_versao_do_codigo_regenera(self):
+        """Com outra versão do código o esquema é refeito e os arquivos antigos removidos"""
+        import os
+        from django.core.management import call_command
+        from io import StringIO
+        call_command('gerar_esquema', stdout=StringIO())
+        etag = self.client.get('/api/schema/')['ETag']
+        with self.settings(VERSAO_CODIGO='teste-2'):
+            response = self.client.get('/api/schema/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED) # mesmo código, mesmo conteúdo
+        self.assertEqual(sorted(os.listdir(self.diretorio)), ['openapi-teste-2.json', 'openapi-teste-2.yaml'])
+
+    def test_gzip_pre_comprimido(self):
+        """Clientes com gzip recebem a versão já comprimida, com ETag próprio"""
+        import gzip
+        normal = self.client.get('/api/schema/')
+        comprimido = self.client.get('/api/schema/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(comprimido['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(comprimido.content), normal.content)
+        self.assertNotEqual(comprimido['ETag'], normal['ETag'])
+        recusado = self.client.get('/api/schema/', HTTP_ACCEPT_ENCODING='gzip;q=0')
+        self.assertFalse(recusado.has_header('Content-Encoding'))
+        self.assertEqual((recusado.content, recusado['ETag']), (normal.content, normal['ETag']))
+
+
+class TestDetectorConsultas(APITestCase):
+
+    def setUp(self):
+        self.evento = Evento.objects.create(
+            nome="Evento Consultas", descricao="X", local="Local",
+            data_inicio="2030-12-01T09:00:00Z", data_fim="2030-12-02T18:00:00Z",
+        )
+        for i in range(8):
+            responsavel = User.objects.create_user(username=f'palestrante{i}')
+            Atividade.objects.create(
+                evento=self.evento, titulo=f"Palestra {i}", descricao="X", tipo='palestra', responsavel=responsavel,
+                horario_inicio=f"2030-12-01T{10 + i}:00:00Z", horario_fim=f"2030-12-01T{10 + i}:30:00Z",
+            )
+            Inscricao.objects.create(participante=responsavel, evento=self.evento)
+
+    def test_normaliza_sql(self):
+        """Literais, parâmetros e listas IN de qualquer tamanho viram o mesmo formato"""
+        from .consultas import normalizar_sql
+        um = normalizar_sql('SELECT "id" FROM "core_evento" WHERE "id" IN (%s, %s, %s) AND "nome" = \'a\'')
+        outro = normalizar_sql('SELECT  "id" FROM "core_evento"\nWHERE "id" IN (%s) AND "nome" = \'b\'')
+        self.assertEqual(um, outro)
+        self.assertEqual(um, 'SELECT "id" FROM "core_evento" WHERE "id" IN (...) AND "nome" = ?')
+
+    def test_aponta_consulta_por_linha_e_origem(self):
+        """Um acesso a FK por linha aparece como formato repetido, com a linha que o disparou"""
+        from .consultas import ColetorConsultas
+        with ColetorConsultas().coletar() as coletor:
+            nomes = [atividade.responsavel.username for atividade in Atividade.objects.filter(evento=self.evento)]
+        self.assertEqual(len(nomes), 8)
+        formato, vezes, origem = coletor.repetidas(5)[0]
+        self.assertEqual(vezes, 8)
+        self.assertIn('FROM "core_participante"', formato)
+        self.assertRegex(origem, r'^core/tests\.py:\d+ ')
+
+    def test_orcamento_por_acao(self):
+        """O orçamento segue a ação da rota, com chaves 'acao:METODO' como o throttle_scope"""
+        from django.urls import resolve
+        from .consultas import orcamento_da_view
+        rota = resolve(f'/api/eventos/{self.evento.pk}/participantes/')
+        self.assertEqual(orcamento_da_view(rota.func, 'GET'), 4)
+        self.assertEqual(orcamento_da_view(rota.func, 'POST'), 6)
+        self.assertEqual(orcamento_da_view(resolve('/api/atividades/').func, 'HEAD'), 4)
+        self.assertIsNone(orcamento_da_view(resolve('/api/schema/').func, 'GET'))
+
+    def test_listas_dentro_do_orcamento_e_estouro(self):
+        """Listas com várias linhas cabem no orçamento; acima dele, erro nos testes e aviso em produção"""
+        from unittest import mock
+        from .consultas import ConsultasExcessivas
+        from .views import AtividadeViewSet
+        for url in ('/api/atividades/', '/api/eventos/', f'/api/eventos/{self.evento.pk}/', f'/api/eventos/{self.evento.pk}/dashboard/'):
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertLessEqual(int(response['X-Consultas']), 5)
+        with mock.patch.object(AtividadeViewSet, 'orcamento_consultas', {'retrieve': 0}):
+            with self.assertRaises(ConsultasExcessivas):
+                self.client.get(f'/api/atividades/{Atividade.objects.first().pk}/')
+            with self.settings(DETECTOR_CONSULTAS_MODO='log'), self.assertLogs('core.consultas', 'WARNING') as logs:
+                response = self.client.get(f'/api/atividades/{Atividade.objects.first().pk}/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('(orçamento: 0)', logs.output[0])
+
+    def test_lote_avaliado_por_sub_requisicao(self):
+        """Leituras de eventos diferentes no lote não são N+1; o orçamento de cada rota continua valendo"""
+        from unittest import mock
+        from django.conf import settings
+        from .consultas import ConsultasExcessivas
+        from .views import EventoViewSet
+        self.assertTrue(settings.DETECTOR_CONSULTAS) # ligado pelas settings de teste, não pelo sys.argv
+        eventos = [self.evento] + [
+            Evento.objects.create(
+                nome=f"Evento Lote {i}", descricao="X", local="Local",
+                data_inicio="2030-12-01T09:00:00Z", data_fim="2030-12-02T18:00:00Z",
+            )
+            for i in range(5)
+        ]
+        self.client.force_authenticate(user=User.objects.get(username='palestrante0'))
+        requisicoes = [f'/api/eventos/{evento.pk}/' for evento in eventos]
+        response = self.client.post('/api/batch/', {'requisicoes': requisicoes}, format='json')
+        self.assertEqual([item['status'] for item in response.data['respostas']], [200] * 6)
+        self.assertGreaterEqual(int(response['X-Consultas']), 6) # o total ainda soma as sub-requisições
+        with mock.patch.object(EventoViewSet, 'orcamento_consultas', {'retrieve': 0}):
+            with self.assertRaises(ConsultasExcessivas):
+                self.client.post('/api/batch/', {'requisicoes': requisicoes[:1]}, format='json')
+
+
+class TestLogEstruturado(APITestCase):
+
+    def setUp(self):
+        import logging
+        import tempfile
+        from .logs import FilaHandler, FiltroRequisicao
+        self.diretorio = tempfile.mkdtemp()
+        self.handler = FilaHandler(f'{self.diretorio}/app.log')
+        self.handler.addFilter(FiltroRequisicao())
+        self.logger = logging.getLogger('core.requisicoes')
+        self.logger.addHandler(self.handler)
+        self.addCleanup(self._remover)
+
+    def _remover(self):
+        import shutil
+        self.logger.removeHandler(self.handler)
+        self.handler.close()
+        shutil.rmtree(self.diretorio, ignore_errors=True)
+
+    def _linhas(self):
+        import json
+        self.handler.listener.stop() # Esvazia a fila antes de ler o arquivo
+        with open(f'{self.diretorio}/app.log', encoding='utf-8') as arquivo:
+            return [json.loads(linha) for linha in arquivo]
+
+    def test_linha_json_com_request_id(self):
+        """Cada requisição vira uma linha JSON com o mesmo request_id devolvido no cabeçalho"""
+        response = self.client.get('/api/eventos/')
+        recebido = self.client.get('/api/eventos/', HTTP_X_REQUEST_ID='proxy-123')
+        linhas = self._linhas()
+        self.assertEqual([linha['request_id'] for linha in linhas], [response['X-Request-ID'], 'proxy-123'])
+        self.assertEqual(recebido['X-Request-ID'], 'proxy-123')
+        self.assertEqual(linhas[0]['caminho'], '/api/eventos/')
+        self.assertEqual(linhas[0]['status'], 200)
+        self.assertIsInstance(linhas[0]['duracao_ms'], float)
+        self.assertEqual(len(self.client.get('/api/eventos/', HTTP_X_REQUEST_ID='inválido com espaço')['X-Request-ID']), 32)
+
+    def test_amostragem_mantem_erros(self):
+        """Com amostragem zero, só erros (e requisições lentas) são registrados"""
+        with self.settings(LOG_AMOSTRAGEM_REQUISICOES=0.0):
+            self.client.get('/api/eventos/')
+            self.client.get('/api/eventos/999999/')
+        self.assertEqual([linha['status'] for linha in self._linhas()], [404])
+
+    def test_gravacao_fora_da_requisicao(self):
+        """Com o disco travado, registrar não espera a gravação; fila cheia descarta em vez de bloquear"""
+        import threading
+        import time
+        from .logs import FilaHandler
+        liberar = threading.Event()
+        handler = FilaHandler(f'{self.diretorio}/lento.log', tamanho_fila=50)
+        arquivo = handler.listener.handlers[0]
+        emitir = arquivo.emit
+        arquivo.emit = lambda record: (liberar.wait(5), emitir(record))
+        self.logger.addHandler(handler)
+        try:
+            inicio = time.perf_counter()
+            for i in range(200):
+                self.logger.info('registro %d', i)
+            decorrido = time.perf_counter() - inicio
+        finally:
+            self.logger.removeHandler(handler)
+            liberar.set()
+            handler.close()
+        self.assertLess(decorrido, 1.0)
+        self.assertGreater(handler.descartados, 0)
+        with open(f'{self.diretorio}/lento.log', encoding='utf-8') as arquivo_log:
+            self.assertEqual(len(arquivo_log.readlines()), 200 - handler.descartados)
+
+    def test_latencia_da_requisicao_sem_a_gravacao(self):
+        """Com o arquivo de log travado, a requisição responde sem esperar a gravação da sua linha"""
+        import threading
+        import time
+        liberar = threading.Event()
+        arquivo = self.handler.listener.handlers[0]
+        emitir = arquivo.emit
+        arquivo.emit = lambda record: (liberar.wait(5), emitir(record))
+        try:
+            self.client.get('/api/eventos/')  # aquece caches e conexões
+            inicio = time.perf_counter()
+            response = self.client.get('/api/eventos/')
+            decorrido = time.perf_counter() - inicio
+        finally:
+            liberar.set()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertLess(decorrido, 1.0)  # a gravação bloqueada levaria 5 s
+        self.assertEqual(len(self._linhas()), 2)
+
+    def test_reabre_o_arquivo_rotacionado(self):
+        """Depois do logrotate mover o arquivo, os registros seguintes vão para um arquivo novo no mesmo caminho"""
+        import os
+        self.logger.info('antes da rotação')
+        self.handler.listener.stop()
+        os.rename(f'{self.diretorio}/app.log', f'{self.diretorio}/app.log.1')
+        self.handler.listener.start()
+        self.logger.info('depois da rotação')
+        self.assertEqual([linha['mensagem'] for linha in self._linhas()], ['depois da rotação'])
+
+
+class TestMinhasInscricoes(APITestCase):
+
+    def setUp(self):
+        from datetime import timedelta
+        from django.utils import timezone
+        self.usuario = User.objects.create_user(username='inscrito_feed')
+        agora = timezone.now()
+        datas = {
+            'passado': (agora - timedelta(days=10), agora - timedelta(days=9)),
+            'agora': (agora - timedelta(hours=1), agora + timedelta(hours=5)),
+            'depois': (agora + timedelta(days=20), agora + timedelta(days=21)),
+            'logo': (agora + timedelta(days=2), agora + timedelta(days=3)),
+        }
+        self.eventos = {}
+        for nome, (inicio, fim) in datas.items():
+            evento = Evento.objects.create(
+                nome=f"Feed {nome}", descricao="X", local="Local",
+                data_inicio=agora + timedelta(days=30), data_fim=agora + timedelta(days=31),
+            )
+            Inscricao.objects.create(participante=self.usuario, evento=evento, status='confirmado' if nome != 'logo' else 'pendente')
+            Evento.objects.filter(pk=evento.pk).update(data_inicio=inicio, data_fim=fim) # inscrição só é aceita em eventos futuros
+            self.eventos[nome] = evento
+        outro = User.objects.create_user(username='outro_feed')
+        Inscricao.objects.create(participante=outro, evento=self.eventos['depois'])
+        self.client.force_authenticate(user=self.usuario)
+
+    def test_janelas_ordenadas_com_resumo(self):
+        """Cada janela traz só seus eventos, na ordem da tela, com o resumo do evento embutido"""
+        proximos = self.client.get('/api/inscricoes/', {'janela': 'proximos'}).data
+        self.assertEqual([i['evento_resumo']['nome'] for i in proximos['results']], ["Feed logo", "Feed depois"])
+        self.assertEqual(set(proximos['results'][0]['evento_resumo']), {'id', 'nome', 'local', 'data_inicio', 'data_fim', 'banner'})
+        andamento = self.client.get('/api/inscricoes/', {'janela': 'em_andamento'}).data
+        self.assertEqual([i['evento'] for i in andamento['results']], [self.eventos['agora'].pk])
+        passados = self.client.get('/api/inscricoes/', {'janela': 'passados'}).data
+        self.assertEqual([i['evento'] for i in passados['results']], [self.eventos['passado'].pk])
+        self.eventos['logo'].delete() # soft delete: some das janelas
+        proximos = self.client.get('/api/inscricoes/', {'janela': 'proximos'}).data
+        self.assertEqual([i['evento'] for i in proximos['results']], [self.eventos['depois'].pk])
+
+    def test_contagem_por_status_em_consultas_fixas(self):
+        """Os totais por status ignoram ?status= e a lista não faz consultas por linha"""
+        with self.assertNumQueries(3): # página com JOIN, COUNT da paginação e totais por status
+            response = self.client.get('/api/inscricoes/', {'janela': 'proximos', 'status': 'pendente'})
+        self.assertEqual([i['evento'] for i in response.data['results']], [self.eventos['logo'].pk])
+        self.assertEqual(response.data['contagem_status'], {'pendente': 1, 'confirmado': 1, 'cancelado': 0})
+        todas = self.client.get('/api/inscricoes/').data
+        self.assertEqual(todas['count'], 4)
+        self.assertEqual(todas['contagem_status'], {'pendente': 1, 'confirmado': 3, 'cancelado': 0})
+
+    def test_janela_invalida(self):
+        response = self.client.get('/api/inscricoes/', {'janela': 'ontem'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class TestRosterEvento(APITestCase):
+
+    def setUp(self):
+        self.evento = Evento.objects.create(
+            nome="Evento Roster", descricao="X", local="Local",
+            data_inicio="2030-10-01T09:00:00Z", data_fim="2030-10-01T18:00:00Z",
+        )
+        self.inscritos = []
+        for i in range(5):
+            participante = User.objects.create_user(username=f'roster{i}', email=f'roster{i}@x.com', tipo='profissional' if i % 2 else 'estudante')
+            Inscricao.objects.create(participante=participante, evento=self.evento, status='cancelado' if i == 4 else 'confirmado')
+            self.inscritos.append(participante)
+        self.organizador = User.objects.create_user(username='organizador_roster')
+        Evento.objects.filter(pk=self.evento.pk).update(organizador=self.organizador)
+        self.url = f'/api/eventos/{self.evento.pk}/participantes/'
+        self.client.force_authenticate(user=self.organizador)
+
+    def test_paginacao_por_cursor(self):
+        """As páginas seguem pelo cursor, em ordem de inscrição, com uma consulta por página"""
+        vistos, url, params = [], self.url, {'tamanho': 2}
+        while url:
+            with self.assertNumQueries(2): # evento (get_object) e a página
+                pagina = self.client.get(url, params).data
+            vistos += pagina['results']
+            url, params = pagina['next'], None
+        self.assertEqual([linha['username'] for linha in vistos], [f'roster{i}' for i in range(5)])
+        self.assertEqual(vistos[4]['status'], 'cancelado')
+        self.assertEqual(set(vistos[0]), {'id', 'username', 'email', 'celular', 'tipo', 'inscricao', 'status', 'data_inscricao', 'data_checkin'})
+
+    def test_filtros_de_status_e_tipo(self):
+        """?status= filtra pela inscrição, ?tipo= pelo participante; valores inválidos dão 400"""
+        response = self.client.get(self.url, {'status': 'confirmado', 'tipo': 'estudante'})
+        self.assertEqual([linha['username'] for linha in response.data['results']], ['roster0', 'roster2'])
+        self.assertEqual(self.client.get(self.url, {'tipo': 'astronauta'}).status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_stream_ndjson(self):
+        """formato=ndjson transmite todos os inscritos filtrados, uma linha JSON por inscrito"""
+        import json
+        response = self.client.get(self.url, {'formato': 'ndjson', 'status': 'confirmado'})
+        self.assertTrue(response.streaming)
+        self.assertTrue(response['Content-Type'].startswith('application/x-ndjson'))
+        linhas = [json.loads(linha) for linha in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual([linha['id'] for linha in linhas], [participante.pk for participante in self.inscritos[:4]])
+        self.assertEqual({linha['status'] for linha in linhas}, {'confirmado'})
+
+    def test_contatos_so_para_o_organizador(self):
+        """Outros usuários veem a lista sem email e celular e não baixam o stream ndjson"""
+        self.client.force_authenticate(user=self.inscritos[0])
+        linha = self.client.get(self.url).data['results'][0]
+        self.assertEqual(set(linha), {'id', 'username', 'tipo', 'inscricao', 'status', 'data_inscricao', 'data_checkin'})
+        self.assertEqual(self.client.get(self.url, {'formato': 'ndjson'}).status_code, status.HTTP_403_FORBIDDEN)
+
+
+class TestProgramacaoEvento(APITestCase):
+
+    def setUp(self):
+        self.evento = Evento.objects.create(
+            nome="Evento Programação", descricao="X", local="Local",
+            data_inicio="2030-09-01T12:00:00Z", data_fim="2030-09-02T22:00:00Z",
+        )
+        self.palestrante = User.objects.create_user(username='palestrante_prog', first_name='Ana', last_name='Lima')
+        self.monitor = User.objects.create_user(username='monitor_prog')
+        self._atividade("Encerramento", "2030-09-02T18:00:00Z", "2030-09-02T19:00:00Z", 'palestra')
+        self._atividade("Abertura", "2030-09-01T13:00:00Z", "2030-09-01T14:00:00Z", 'palestra', self.palestrante)
+        self._atividade("Oficina de Django", "2030-09-01T15:00:00Z", "2030-09-01T17:00:00Z", 'oficina')
+        self.url = f'/api/eventos/{self.evento.pk}/programacao/'
+
+    def _atividade(self, titulo, inicio, fim, tipo, responsavel=None):
+        return Atividade.objects.create(
+            evento=self.evento, titulo=titulo, descricao="X", tipo=tipo, responsavel=responsavel or self.monitor,
+            horario_inicio=inicio, horario_fim=fim,
+        )
+
+    def test_agrupada_por_dia_e_em_cache(self):
+        """Dias em ordem, atividades pelo início e responsável embutido; a segunda leitura vem do cache"""
+        with self.assertNumQueries(2): # evento e atividades com responsável (JOIN)
+            dados = self.client.get(self.url).data
+        self.assertEqual([str(dia['dia']) for dia in dados['dias']], ['2030-09-01', '2030-09-02'])
+        self.assertEqual([a['titulo'] for a in dados['dias'][0]['atividades']], ["Abertura", "Oficina de Django"])
+        self.assertEqual(dados['dias'][0]['atividades'][0]['responsavel'], {'id': self.palestrante.pk, 'nome': 'Ana Lima'})
+        self.assertEqual(dados['dias'][1]['atividades'][0]['responsavel']['nome'], 'monitor_prog') # sem nome completo, o usuário
+        with self.assertNumQueries(0):
+            self.client.get(self.url, {'tipo': 'oficina'})
+
+    def test_filtros_de_tipo_e_periodo(self):
+        """?tipo= e ?inicio=/?fim= filtram a versão em cache; dias vazios somem"""
+        oficinas = self.client.get(self.url, {'tipo': 'oficina'}).data
+        self.assertEqual([a['titulo'] for dia in oficinas['dias'] for a in dia['atividades']], ["Oficina de Django"])
+        segundo_dia = self.client.get(self.url, {'inicio': '2030-09-02T00:00:00Z'}).data
+        self.assertEqual([a['titulo'] for dia in segundo_dia['dias'] for a in dia['atividades']], ["Encerramento"])
+        self.assertEqual(self.client.get(self.url, {'tipo': 'festa'}).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get('/api/eventos/999999/programacao/').status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_invalidada_quando_atividade_ou_palestrante_muda(self):
+        """Nova atividade ou palestrante renomeado geram outra versão (ETag); sem mudança, 304"""
+        etag = self.client.get(self.url)['ETag']
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_304_NOT_MODIFIED)
+        self._atividade("Workshop extra", "2030-09-02T13:00:00Z", "2030-09-02T14:00:00Z", 'workshop')
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([a['titulo'] for a in response.data['dias'][1]['atividades']], ["Workshop extra", "Encerramento"])
+        self.palestrante.first_name = 'Ana Maria'
+        self.palestrante.save()
+        self.assertEqual(self.client.get(self.url).data['dias'][0]['atividades'][0]['responsavel']['nome'], 'Ana Maria Lima')
+
+    def test_inscricoes_e_checkin_mantem_a_versao(self):
+        """Inscrições e check-ins não mudam a programação: o ETag continua valendo"""
+        etag = self.client.get(self.url)['ETag']
+        inscricao = Inscricao.objects.create(participante=self.monitor, evento=self.evento)
+        inscricao.status = 'confirmado'
+        inscricao.save()
+        from .checkin import codigo_ingresso, registrar_checkins
+        self.assertEqual(registrar_checkins(self.evento.pk, [{'codigo': codigo_ingresso(self.evento.pk, inscricao.pk)}])['registrados'], 1)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_304_NOT_MODIFIED)
+        self.evento.delete()
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_404_NOT_FOUND)
+
+
+@override_settings(PAGINAS_ESTATICAS=True, TAREFAS_SINCRONAS=True)
+class TestPaginasEstaticas(APITestCase):
+
+    def setUp(self):
+        import tempfile
+        self.pasta = tempfile.TemporaryDirectory()
+        self.addCleanup(self.pasta.cleanup)
+        configuracao = self.settings(PAGINAS_ESTATICAS_DIR=self.pasta.name)
+        configuracao.enable()
+        self.addCleanup(configuracao.disable)
+        self.evento = Evento.objects.create(
+            nome="Evento Estático", descricao="X", local="Local",
+            data_inicio="2030-10-01T12:00:00Z", data_fim="2030-10-02T22:00:00Z",
+        )
+        self.outro = Evento.objects.create(
+            nome="Outro Evento", descricao="X", local="Local",
+            data_inicio="2030-11-01T12:00:00Z", data_fim="2030-11-02T22:00:00Z",
+        )
+
+    def _exportar(self):
+        from io import StringIO
+        from django.core.management import call_command
+        call_command('exportar_paginas', stdout=StringIO())
+
+    def _arquivo(self, *partes):
+        from pathlib import Path
+        return Path(self.pasta.name).joinpath(*partes, 'index.html')
+
+    def _conteudo(self, response):
+        return b''.join(response.streaming_content)
+
+    def test_comando_exporta_e_middleware_serve_sem_consultas(self):
+        """Detalhes e lista saem do disco para anônimos, sem tocar no banco; uma nova exportação não regrava nada"""
+        self._exportar()
+        self.assertTrue(self._arquivo('evento', str(self.evento.pk)).exists())
+        self.assertTrue(self._arquivo('eventos', '1').exists())
+        with self.assertNumQueries(0):
+            detalhes = self.client.get(f'/evento/{self.evento.pk}/')
+            lista = self.client.get('/', {'page': 1})
+        self.assertIn("Evento Estático".encode(), self._conteudo(detalhes))
+        self.assertIn("Outro Evento".encode(), self._conteudo(lista))
+        modificado = self._arquivo('evento', str(self.evento.pk)).stat().st_mtime_ns
+        from core.paginas_estaticas import exportar_tudo
+        self.assertEqual(exportar_tudo(), {'eventos': 0, 'removidos': 0, 'lista': 0})
+        self.assertEqual(self._arquivo('evento', str(self.evento.pk)).stat().st_mtime_ns, modificado)
+
+    def test_gzip_e_revalidacao(self):
+        """Com Accept-Encoding: gzip sai o .gz; o ETag do arquivo responde 304"""
+        import gzip
+        self._exportar()
+        url = f'/evento/{self.evento.pk}/'
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn("Evento Estático".encode(), gzip.decompress(self._conteudo(response)))
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertRegex(response['ETag'], r'^"pagina-[0-9a-f]+-[0-9a-f]+-gz"$')  # sufixo dentro das aspas
+        revalidacao = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(revalidacao.status_code, status.HTTP_304_NOT_MODIFIED)
+        lista = f'"outro", W/{response["ETag"]}'
+        self.assertEqual(self.client.get(url, HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=lista).status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH='*').status_code, status.HTTP_304_NOT_MODIFIED)
+        parcial = response['ETag'][:-4] + '"'  # prefixo de um ETag válido não confere
+        self.assertEqual(self.client.get(url, HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=parcial).status_code, status.HTTP_200_OK)
+
+    def test_alteracao_reexporta_so_o_evento(self):
+        """Editar um evento regrava a página dele (e a lista); a do outro fica intacta; excluído, a página sai"""
+        self._exportar()
+        outro = self._arquivo('evento', str(self.outro.pk))
+        modificado = outro.stat().st_mtime_ns
+        with self.captureOnCommitCallbacks(execute=True):
+            self.evento.nome = "Evento Renomeado"
+            self.evento.save()
+        self.assertIn("Evento Renomeado".encode(), self._arquivo('evento', str(self.evento.pk)).read_bytes())
+        self.assertIn("Evento Renomeado".encode(), self._arquivo('eventos', '1').read_bytes())
+        self.assertEqual(outro.stat().st_mtime_ns, modificado)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.evento.delete()
+        self.assertFalse(self._arquivo('evento', str(self.evento.pk)).exists())
+        self.assertEqual(self.client.get(f'/evento/{self.evento.pk}/').status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_filtros_e_sessao_vao_para_a_view(self):
+        """Querystring além de ?page= ou cookie de sessão: resposta da view, não do arquivo"""
+        self._exportar()
+        busca = self.client.get('/eventos/', {'search': 'Outro'})
+        self.assertFalse(busca.streaming)
+        self.assertNotContains(busca, "Evento Estático")
+        self.client.cookies['sessionid'] = 'qualquer'
+        self.assertFalse(self.client.get(f'/evento/{self.evento.pk}/').streaming)
@@ -0,0 +1,92 @@
+from django.core.cache import caches
+from django.utils.connection import ConnectionProxy
+from rest_framework.settings import api_settings
+from rest_framework.throttling import SimpleRateThrottle
+
+METODOS_SEGUROS = ('GET', 'HEAD', 'OPTIONS')
+
+
+def escopo_da_requisicao(request, view):
+    """
+    Escopo de limite da requisição.
+
+    A view pode declarar 'throttle_scope' como string ou como dicionário por ação
+    ('create', 'participantes:POST', ...). Sem escopo, vale 'user' ou 'anon'.
+    """
+    escopo = getattr(view, 'throttle_scope', None)
+    if isinstance(escopo, dict):
+        acao = getattr(view, 'action', None)
+        escopo = escopo.get(f'{acao}:{request.method}', escopo.get(acao))
+    if escopo:
+        return escopo
+    return 'user' if request.user and request.user.is_authenticated else 'anon'
+
+
+class JanelaDeslizanteThrottle(SimpleRateThrottle):
+    """
+    Limite por janela deslizante com dois contadores (estado O(1) por chave).
+
+    Em vez da lista de timestamps do SimpleRateThrottle, guarda só o contador da
+    janela atual e o da anterior; a contagem estimada é
+    anterior * (fração restante da janela) + atual. O contador é incrementado com
+    cache.incr (atômico no Redis/Memcached/LocMem), sem reescrever listas.
+
+    Os contadores ficam no cache 'compartilhado' (Redis em produção), para o limite
+    valer para todos os processos/servidores e não por worker.
+
+    Cada requisição conta em um único escopo (ver escopo_da_requisicao), com as
+    taxas de DEFAULT_THROTTLE_RATES; no /api/batch/, cada sub-requisição conta no
+    escopo da própria rota.
+    """
+    cache = ConnectionProxy(caches, 'compartilhado') # Como o django.core.cache.cache: resolvido por thread
+    cache_format = 'throttle:%(scope)s:%(ident)s'
+
+    def get_rate(self):
+        """Sem taxa fixa na construção: allow_request usa a do escopo de cada requisição."""
+        return None
+
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            ident = request.user.pk
+        else:
+            ident = self.get_ident(request)
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
+
+    def allow_request(self, request, view):
+        self.scope = escopo_da_requisicao(request, view)
+        self.rate = api_settings.DEFAULT_THROTTLE_RATES.get(self.scope)
+        if self.rate is None:
+            return True
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+
+        chave = self.get_cache_key(request, view)
+        self.now = self.timer()
+        janela = int(self.now // self.duration)
+        chave_atual = f'{chave}:{janela}'
+        try:
+            atual = self.cache.incr(chave_atual)
+        except ValueError: # Primeira requisição da janela
+            if self.cache.add(chave_atual, 1, self.duration * 2):
+                atual = 1
+            else:
+                atual = self.cache.incr(chave_atual)
+        self.anterior = self.cache.get(f'{chave}:{janela - 1}', 0)
+        self.decorrido = (self.now % self.duration) / self.duration
+
+        if self.anterior * (1 - self.decorrido) + atual > self.num_requests:
+            self.cache.decr(chave_atual) # Requisição recusada não consome a cota
+            self.atual = atual - 1
+            return False
+        self.atual = atual
+        return True
+
+    def wait(self):
+        """Segundos até a contagem estimada comportar mais uma requisição."""
+        limite = self.num_requests - 1
+        if self.atual <= limite:
+            # anterior * (1 - fração) + atual <= limite  =>  fração >= 1 - (limite - atual) / anterior
+            fracao = 1 - (limite - self.atual) / self.anterior if self.anterior else self.decorrido
+            return max(0.0, (fracao - self.decorrido) * self.duration)
+        # Janela atual esgotada: espera a próxima, onde a atual passa a ser a anterior
+        fracao = 1 - limite / self.atual if self.atual else 0
+        return (1 - self.decorrido + max(0.0, fracao)) * self.duration
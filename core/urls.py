@@ -15,7 +15,8 @@ urlpatterns = [
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import (
-    ParticipanteViewSet, EventoViewSet, AtividadeViewSet, InscricaoViewSet,
+    ParticipanteViewSet, EventoViewSet, AtividadeViewSet, InscricaoViewSet, EventoArquivadoViewSet,
+    CalendarioEventoView, CalendarioParticipanteView, LoteView, dashboard_ao_vivo, EstatisticasInscricoesView,
     # Novas views HTML
     eventos_list, busca_eventos, contato
 )
@@ -25,7 +26,14 @@ router.register(r'participantes', ParticipanteViewSet)
 router.register(r'eventos', EventoViewSet)
 router.register(r'atividades', AtividadeViewSet)
 router.register(r'inscricoes', InscricaoViewSet)
+router.register(r'eventos-arquivados', EventoArquivadoViewSet)  # somente leitura
 
 urlpatterns = [
+    # Feeds iCalendar (sem barra final, como esperam os clientes de calendário)
+    path('eventos/<int:pk>/calendar.ics', CalendarioEventoView.as_view(), name='calendario_evento'),
+    path('participantes/me/calendar.ics', CalendarioParticipanteView.as_view(), name='calendario_participante'),
+    path('batch/', LoteView.as_view(), name='lote'),  # Várias leituras em uma requisição
+    path('eventos/<int:pk>/dashboard/stream/', dashboard_ao_vivo, name='dashboard_ao_vivo'),  # SSE (ASGI)
+    path('estatisticas/inscricoes/', EstatisticasInscricoesView.as_view(), name='estatisticas_inscricoes'),  # Séries consolidadas
     path('', include(router.urls)),  # Rotas API mantidas
 ]
\ No newline at end of file
@@ -66,7 +66,6 @@ def registro(self, request):
         - password: string (obrigatório)
         - password_confirm: string (obrigatório, deve coincidir com password)
         - celular: string (opcional)
-        - tipo: string (opcional, padrão 'estudante')
 
         Retorno: {'token': str, 'user_id': int, 'username': str}
         """
@@ -319,28 +318,116 @@ from rest_framework import viewsets, permissions, status, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.authtoken.models import Token  # importante para autenticação por token
-from django.db.models import Count, Q, Case, When   # para agregações e filtros complexos
+from rest_framework.authentication import TokenAuthentication, SessionAuthentication
+from rest_framework.views import APIView
+from rest_framework.exceptions import PermissionDenied  # estatísticas: staff ou organizador do evento
+from django.db.models import Count, Q, Case, When, Prefetch, prefetch_related_objects   # para agregações e filtros complexos
 from django.shortcuts import get_object_or_404, render, redirect
-from django.http import HttpResponse  # para respostas HTTP personalizadas
+from django.http import HttpResponse, StreamingHttpResponse, Http404  # para respostas HTTP personalizadas
+from django.urls import reverse
+import django_filters  # FilterSet das inscrições
 from django_filters.rest_framework import DjangoFilterBackend  # [cite: 974]
 from django.views.decorators.cache import cache_page  # para cache de views
 from django.utils.decorators import method_decorator  # para aplicar decoradores em métodos de classe
+from django.views.decorators.http import require_safe  # esquema OpenAPI: apenas GET/HEAD
 from django.views.generic import ListView, TemplateView, DetailView  # Novas: para views HTML
 from django.contrib import messages  # Para feedback no form de contato
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email  # email do form de contato (Reply-To)
 from django.utils import timezone  # Para filtro de eventos futuros
+from django.utils.dateparse import parse_date, parse_datetime  # filtros de período (?inicio=, ?fim=)
+from datetime import datetime, time, timedelta
 from django.core.paginator import Paginator  # Para paginação manual (compatível com API)
+from django.core.cache import cache  # cache versionado por evento
+from django.conf import settings  # destinatário do formulário de contato
 import csv  # para exportação CSV
-
-from .models import Participante, Evento, Atividade, Inscricao
+import asyncio  # stream SSE do dashboard
+import gzip  # snapshot para clientes sem gzip
+import re  # cabeçalho Range
+import json
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+
+INTERVALO_SSE = 15  # segundos entre pings do stream (e de retry sob WSGI)
+CAMPOS_ROSTER = {  # nome na resposta -> campo da inscrição (lista de inscritos do evento)
+    'id': 'participante_id', 'username': 'participante__username', 'email': 'participante__email',
+    'celular': 'participante__celular', 'tipo': 'participante__tipo',
+    'inscricao': 'pk', 'status': 'status', 'data_inscricao': 'data_inscricao', 'data_checkin': 'data_checkin',
+}
+CAMPOS_ROSTER_PUBLICOS = {  # sem os contatos: o que os demais usuários veem da lista
+    nome: campo for nome, campo in CAMPOS_ROSTER.items() if nome not in ('email', 'celular')
+}
+
+from .models import Participante, Evento, Atividade, Inscricao, EventoArquivado, AtividadeArquivada
 from .serializers import (
     ParticipanteSerializer, ParticipanteRegistroSerializer, EventoSerializer, 
-    AtividadeSerializer, InscricaoSerializer, EventoDashboardSerializer, RelatorioParticipacaoSerializer
+    AtividadeSerializer, InscricaoSerializer, EventoDashboardSerializer, RelatorioParticipacaoSerializer,
+    EventoArquivadoSerializer, EventoSimilarSerializer,
+)
+from .permissions import IsOrganizadorOrReadOnly, IsResponsavelOrReadOnly, IsOrganizadorDoEvento, organiza_evento  # permissões customizadas
+from .cache_eventos import (  # chaves de cache atreladas à versão do evento
+    chave_evento, versao_evento, versoes_cards, versao_lista_eventos, cache_pagina_anonima, etag_confere
 )
-from .permissions import IsOrganizadorOrReadOnly, IsResponsavelOrReadOnly  # permissões customizadas
+from .pagination import PaginatorContagemCache, RosterPagination  # COUNT da paginação HTML em cache; cursor dos inscritos
+from .routers import no_primario  # caches por versão preenchidos com leituras do primário
+from .authentication import ChaveCalendarioAuthentication, chave_calendario  # feeds .ics pessoais
+from . import calendario  # feeds iCalendar em cache por versão do evento
+from .agenda import agenda_em_cache  # agenda pessoal com detecção de conflitos
+from .lote import ObjetoEmLoteMixin, ErroLote, executar_lote  # /api/batch/
+from .caixa_saida import enfileirar_email  # emails enviados em segundo plano
+from .checkin import ErroCheckin, roster_evento, registrar_checkins  # check-in na entrada
+from .snapshot import obter_snapshot  # artefato gzip do evento para o app
+from .recomendacoes import similares_do_evento  # "quem se inscreveu também se inscreveu em"
+from .tempo_real import obter_hub, canal_evento  # dashboard ao vivo (SSE)
+from .estatisticas import GRANULARIDADES, serie_inscricoes  # séries consolidadas por hora
+from .esquema import FORMATOS, formato_pedido, obter_esquema  # OpenAPI pré-gerado
+from .programacao import programacao_evento, filtrar_programacao  # programação por dia em cache
+from .middleware import codificacoes_aceitas  # Accept-Encoding com q-values (q=0 recusa)
 
 # Removida home_view simples; substituída por EventosListView abaixo
 
-class ParticipanteViewSet(viewsets.ModelViewSet):
+def _parse_periodo(valor, fim_do_dia=False):
+    """Converte ?inicio=/?fim= (data ou data-hora ISO) em datetime com fuso; datas viram início/fim do dia."""
+    if not valor:
+        return None
+    momento = parse_datetime(valor)
+    if momento is None:
+        data = parse_date(valor)
+        if data is None:
+            raise ValueError(valor)
+        momento = datetime.combine(data, time.max if fim_do_dia else time.min)
+    if timezone.is_naive(momento):
+        momento = timezone.make_aware(momento)
+    return momento
+
+def dados_dashboard(evento_id):
+    """Estatísticas do dashboard em cache pela versão do evento. Retorna (versao, dados); dados é None se o evento não existe."""
+    versao = versao_evento(evento_id)
+    chave = f'dashboard:{evento_id}:{versao}'  # mesmo formato de chave_evento('dashboard', ...)
+    dados = cache.get(chave)
+    if dados is None:
+        with no_primario():  # preenche a chave da versão nova com dados do primário, não de uma réplica atrasada
+            stats = Evento.objects.filter(pk=evento_id).annotate(
+                total_inscritos=Count('participantes', distinct=True),
+                total_atividades=Count('atividades', distinct=True)
+            ).prefetch_related('atividades__responsavel', 'participantes').first()  # otimiza consultas
+            if stats is None:
+                return versao, None
+            dados = EventoDashboardSerializer(stats).data
+        cache.set(chave, dados, 60 * 15)  # Cache por 15 minutos
+    return versao, dados
+
+class BuscaParticipanteFilter(filters.SearchFilter):
+    """
+    ?search= de participantes pelas colunas normalizadas e indexadas (Participante.objects.buscar):
+    prefixo de username/email, prefixo ou final do celular e tipo exato.
+    """
+    def filter_queryset(self, request, queryset, view):
+        termo = request.query_params.get(self.search_param, '')
+        return queryset.buscar(termo) if termo.strip() else queryset
+
+class ParticipanteViewSet(ObjetoEmLoteMixin, viewsets.ModelViewSet):
     """
     ViewSet para gerenciamento de participantes.
 
@@ -368,9 +455,13 @@ class ParticipanteViewSet(viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated]
     
     # Filtros e Busca
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter]
-    search_fields = ['username', 'email', 'celular', 'tipo', 'nome']
+    filter_backends = [DjangoFilterBackend, BuscaParticipanteFilter]  # ?search= usa as colunas indexadas
     filterset_fields = ['tipo']
+    throttle_scope = {'registro': 'registro', 'agenda': 'leitura'}  # limites por ação (core.throttling)
+    orcamento_consultas = {  # máximo de consultas por ação (core.consultas); destroy remove em cascata e fica de fora
+        'list': 4, 'retrieve': 3, 'create': 5, 'update': 4, 'partial_update': 4,
+        'registro': 6, 'calendario': 2, 'agenda': 4,
+    }
 
     @action(detail=False, methods=['post'], permission_classes=[permissions.AllowAny])  # endpoint público
     def registro(self, request):
@@ -385,7 +476,6 @@ class ParticipanteViewSet(viewsets.ModelViewSet):
         - password: string (obrigatório)
         - password_confirm: string (obrigatório, deve coincidir com password)
         - celular: string (opcional)
-        - tipo: string (opcional, padrão 'estudante')
 
         Retorno: {'token': str, 'user_id': int, 'username': str}
         """
@@ -400,8 +490,44 @@ class ParticipanteViewSet(viewsets.ModelViewSet):
             }, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    @action(detail=False, methods=['get', 'post'], url_path='me/calendario')
+    def calendario(self, request):
+        """
+        Retorna a URL do feed iCalendar pessoal do usuário atual.
+
+        A URL contém uma chave assinada e pode ser assinada em clientes de calendário.
+        POST gera uma chave nova: as URLs anteriores (ex.: vazadas) deixam de valer.
+
+        Retorno: {'url': str}
+        """
+        chave = chave_calendario(request.user, renovar=request.method == 'POST')
+        url = reverse('calendario_participante') + '?chave=' + chave
+        return Response({'url': request.build_absolute_uri(url)})
+
+    @action(detail=False, methods=['get'], url_path='me/agenda')
+    def agenda(self, request):
+        """
+        Agenda pessoal: eventos inscritos e suas atividades em ordem cronológica.
+
+        Usa um número fixo de consultas e sinaliza sobreposições entre eventos diferentes
+        (e entre atividades de eventos diferentes). Fica em cache até as inscrições do
+        usuário ou os eventos inscritos mudarem.
+
+        Parâmetros:
+        - inicio: data/data-hora ISO (opcional) - ignora o que termina antes
+        - fim: data/data-hora ISO (opcional) - ignora o que começa depois
+
+        Retorno: {'eventos': [...], 'conflitos': [{'primeiro': {...}, 'segundo': {...}}]}
+        """
+        try:
+            inicio = _parse_periodo(request.query_params.get('inicio'))
+            fim = _parse_periodo(request.query_params.get('fim'), fim_do_dia=True)
+        except ValueError:
+            return Response({'error': 'Use datas ISO (AAAA-MM-DD ou AAAA-MM-DDTHH:MM).'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(agenda_em_cache(request.user.pk, inicio, fim))
+
 @method_decorator(cache_page(60 * 15), name='list') 
-class EventoViewSet(viewsets.ModelViewSet):
+class EventoViewSet(ObjetoEmLoteMixin, viewsets.ModelViewSet):
     """
     ViewSet para gerenciamento de eventos.
 
@@ -417,16 +543,30 @@ class EventoViewSet(viewsets.ModelViewSet):
     - destroy: Remove evento (DELETE /api/v1/eventos/{id}/)
 
     Ações customizadas:
-    - participantes: Gerenciar inscrições (GET/POST /api/v1/eventos/{id}/participantes/)
+    - participantes: Inscritos paginados por cursor ou em NDJSON / inscrever-se (GET/POST /api/v1/eventos/{id}/participantes/)
     - atividades: Gerenciar atividades (GET/POST /api/v1/eventos/{id}/atividades/)
     - dashboard: Estatísticas do evento (GET /api/v1/eventos/{id}/dashboard/) - Cache de 15 minutos
     - relatorio_participacao: Relatório de participantes (GET /api/v1/eventos/{id}/relatorio_participacao/)
+    - checkin: Ingressos e check-ins em lote (GET/POST /api/v1/eventos/{id}/checkin/) - Apenas o organizador do evento
+    - snapshot: Evento, atividades e responsáveis em um arquivo gzip (GET /api/v1/eventos/{id}/snapshot/)
+    - similares: Eventos com inscritos em comum (GET /api/v1/eventos/{id}/similares/)
+    - programacao: Atividades agrupadas por dia, em cache por versão (GET /api/v1/eventos/{id}/programacao/)
 
     Códigos de resposta: 200, 201, 400, 401, 403, 404
     """
     queryset = Evento.objects.all()
     serializer_class = EventoSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]  # 
+    throttle_scope = {  # limites por ação (core.throttling)
+        'list': 'leitura', 'retrieve': 'leitura', 'dashboard': 'leitura', 'atividades:GET': 'leitura',
+        'participantes:POST': 'inscricao', 'checkin:GET': 'leitura', 'snapshot': 'leitura', 'similares': 'leitura',
+        'programacao': 'leitura',
+    }
+    orcamento_consultas = {  # máximo de consultas por ação, independente do número de linhas (core.consultas)
+        'list': 5, 'retrieve': 4, 'create': 6, 'update': 6, 'partial_update': 6, 'destroy': 10,
+        'participantes:GET': 4, 'participantes:POST': 6, 'atividades:GET': 4, 'atividades:POST': 6, 'dashboard': 7,
+        'relatorio_participacao': 5, 'checkin:GET': 4, 'checkin:POST': 8, 'snapshot': 5, 'similares': 3, 'programacao': 3,
+    }
 
     # Configuração de Filtros (PDF 06)
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
@@ -434,18 +574,50 @@ class EventoViewSet(viewsets.ModelViewSet):
     ordering_fields = ['data_inicio', 'nome']      # Ordenação
     filterset_fields = ['local']                   # Filtro exato
 
+    def _atividades_aninhadas(self):  # EventoSerializer aninha as atividades com responsavel_nome
+        return Prefetch('atividades', queryset=Atividade.objects.select_related('responsavel'))
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'list':
+            queryset = queryset.prefetch_related(self._atividades_aninhadas())
+        return queryset
+
+    def get_object(self):
+        evento = super().get_object()
+        if self.action in ('retrieve', 'update', 'partial_update'):  # no objeto: o lote reaproveita o mesmo evento entre ações
+            prefetch_related_objects([evento], self._atividades_aninhadas())
+        return evento
+
+    def perform_create(self, serializer):
+        serializer.save(organizador=self.request.user)  # quem cria organiza (check-in, inscritos, estatísticas)
+
+    def perform_update(self, serializer):
+        super().perform_update(serializer)
+        serializer.data  # representa antes que o UpdateModelMixin descarte o prefetch das atividades
+
     @action(detail=True, methods=['get', 'post'], permission_classes=[permissions.IsAuthenticated])
     def participantes(self, request, pk=None):
         """
         Gerencia inscrições no evento.
 
-        GET: Lista participantes inscritos no evento.
+        GET: Lista os inscritos com o status da inscrição, paginada por cursor (uma
+        consulta por página, com participante e inscrição no mesmo JOIN). Com
+        formato=ndjson, transmite a lista inteira, uma linha JSON por inscrito, sem
+        montá-la em memória. Email e celular dos inscritos e o stream ndjson ficam
+        restritos ao organizador do evento (e staff).
         POST: Inscreve o usuário atual no evento (se não estiver inscrito).
 
         Parâmetros:
         - pk: ID do evento
-
-        Retorno GET: Lista de participantes serializados
+        - status: status da inscrição (opcional)
+        - tipo: tipo do participante (opcional)
+        - tamanho: itens por página (padrão 100, máximo 1000)
+        - cursor: valor de 'next'/'previous' da página anterior
+        - formato: 'ndjson' para o stream completo (apenas organizador/staff)
+
+        Retorno GET: {'next', 'previous', 'results': [{'id', 'username', 'email', 'celular', 'tipo', 'inscricao', 'status', 'data_inscricao', 'data_checkin'}]}
+        (sem 'email' e 'celular' para quem não organiza o evento)
         Retorno POST: {'status': 'Inscrição realizada'} ou {'status': 'Já inscrito'}
         """
         evento = self.get_object()
@@ -454,10 +626,34 @@ class EventoViewSet(viewsets.ModelViewSet):
             if created:
                 return Response({'status': 'Inscrição realizada'}, status=status.HTTP_201_CREATED)
             return Response({'status': 'Já inscrito'}, status=status.HTTP_400_BAD_REQUEST)
-        
-        inscritos = Participante.objects.filter(eventos_inscritos=evento)
-        serializer = ParticipanteSerializer(inscritos, many=True)
-        return Response(serializer.data)
+
+        inscritos = Inscricao.objects.filter(evento=evento)
+        for parametro, campo, opcoes in (('status', 'status', Inscricao.STATUS_CHOICES), ('tipo', 'participante__tipo', Participante.TIPO_CHOICES)):
+            valor = request.query_params.get(parametro)
+            if valor is None:
+                continue
+            if valor not in dict(opcoes):
+                return Response({'error': f"'{parametro}' deve ser um de: {', '.join(dict(opcoes))}."}, status=status.HTTP_400_BAD_REQUEST)
+            inscritos = inscritos.filter(**{campo: valor})
+
+        organizador = organiza_evento(request.user, evento)
+        campos = CAMPOS_ROSTER if organizador else CAMPOS_ROSTER_PUBLICOS
+        if request.query_params.get('formato') == 'ndjson':
+            if not organizador:
+                raise PermissionDenied('Apenas staff ou o organizador do evento.')
+            linhas = (
+                json.dumps(dict(zip(CAMPOS_ROSTER, linha)), cls=DjangoJSONEncoder, ensure_ascii=False) + '\n'
+                for linha in inscritos.order_by('pk').values_list(*CAMPOS_ROSTER.values()).iterator(chunk_size=2000)
+            )
+            response = StreamingHttpResponse((linha.encode('utf-8') for linha in linhas), content_type='application/x-ndjson; charset=utf-8')
+            response['Content-Disposition'] = f'attachment; filename="inscritos-{evento.pk}.ndjson"'
+            return response
+
+        paginador = RosterPagination()
+        pagina = paginador.paginate_queryset(inscritos.values(*campos.values()), request, view=self)
+        return paginador.get_paginated_response([
+            {nome: linha[campo] for nome, campo in campos.items()} for linha in pagina
+        ])
 
     @action(detail=True, methods=['get', 'post'])
     def atividades(self, request, pk=None):
@@ -482,17 +678,57 @@ class EventoViewSet(viewsets.ModelViewSet):
                 return Response(serializer.data, status=status.HTTP_201_CREATED)
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-        atividades = Atividade.objects.filter(evento=evento)
+        atividades = Atividade.objects.filter(evento=evento).select_related('responsavel').order_by('horario_inicio', 'pk')  # responsavel_nome sem N+1
         serializer = AtividadeSerializer(atividades, many=True)
         return Response(serializer.data)
     
-    @method_decorator(cache_page(60 * 15))  # Cache por 15 minutos
+    @action(detail=True, methods=['get'])
+    def programacao(self, request, pk=None):
+        """
+        Programação do evento: atividades agrupadas por dia, em ordem de início, com o
+        responsável de cada uma.
+
+        Fica em cache pela versão da programação (invalidada quando o evento, uma
+        atividade ou um palestrante muda; inscrições e check-ins não a alteram) e
+        responde 304 ao If-None-Match com o ETag da versão baixada.
+
+        Parâmetros:
+        - pk: ID do evento
+        - tipo: tipo da atividade (opcional)
+        - inicio: data/data-hora ISO (opcional) - ignora o que termina antes
+        - fim: data/data-hora ISO (opcional) - ignora o que começa depois
+
+        Retorno: {'evento': id, 'dias': [{'dia': 'AAAA-MM-DD', 'atividades': [{'id', 'titulo', 'descricao', 'tipo', 'inicio', 'fim', 'responsavel'}]}]}
+        """
+        tipo = request.query_params.get('tipo')
+        if tipo is not None and tipo not in dict(Atividade.TIPO_ATIVIDADE):
+            return Response({'error': f"'tipo' deve ser um de: {', '.join(dict(Atividade.TIPO_ATIVIDADE))}."}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            inicio = _parse_periodo(request.query_params.get('inicio'))
+            fim = _parse_periodo(request.query_params.get('fim'), fim_do_dia=True)
+        except ValueError:
+            return Response({'error': 'Use datas ISO (AAAA-MM-DD ou AAAA-MM-DDTHH:MM).'}, status=status.HTTP_400_BAD_REQUEST)
+
+        versao, dados = programacao_evento(int(pk)) if str(pk).isdigit() else (None, None)
+        if dados is None:
+            raise Http404
+        etag = f'"programacao-{pk}-{versao}"'
+        if etag_confere(request, etag):
+            response = HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = Response(filtrar_programacao(dados, tipo, inicio, fim))
+        response['ETag'] = etag
+        response['Cache-Control'] = 'public, no-cache'
+        return response
+
     @action(detail=True, methods=['get'])
     def dashboard(self, request, pk=None):
         """
         Retorna estatísticas completas do evento (cache de 15 minutos).
 
         Inclui contadores, distribuições por tipo e listas de responsáveis/participantes.
+        O cache é versionado por evento: qualquer alteração no evento, em suas atividades
+        ou inscrições (inclusive ações em lote do admin) invalida os contadores.
 
         Parâmetros:
         - pk: ID do evento
@@ -500,12 +736,8 @@ class EventoViewSet(viewsets.ModelViewSet):
         Retorno: Estatísticas do evento com agregações por tipo
         """
         evento = self.get_object()
-        stats = Evento.objects.filter(pk=pk).annotate(
-            total_inscritos=Count('participantes', distinct=True),
-            total_atividades=Count('atividades', distinct=True)
-        ).prefetch_related('atividades__responsavel', 'participantes').first()  # otimiza consultas
-        serializer = EventoDashboardSerializer(stats)
-        return Response(serializer.data)
+        _, dados = dados_dashboard(evento.pk)
+        return Response(dados)
     
     @action(detail=True, methods=['get'], permission_classes=[permissions.IsAuthenticated])  # Apenas autenticados
     def relatorio_participacao(self, request, pk=None): 
@@ -522,7 +754,10 @@ class EventoViewSet(viewsets.ModelViewSet):
         Retorno: Lista de inscrições com dados dos participantes e atividades ministradas
         """
         evento = self.get_object()
-        inscricoes = Inscricao.objects.filter(evento=evento).select_related('participante').prefetch_related('evento__atividades')  # otimiza consultas
+        inscricoes = Inscricao.objects.filter(evento=evento).select_related('participante')  # otimiza consultas
+        atividades_por_responsavel = {}  # títulos por responsável, numa consulta só
+        for responsavel_id, titulo in Atividade.objects.filter(evento=evento, responsavel__isnull=False).values_list('responsavel_id', 'titulo'):
+            atividades_por_responsavel.setdefault(responsavel_id, []).append(titulo)
 
         formato = request.query_params.get('formato')  # verifica formato solicitado
         if formato == 'csv':
@@ -531,7 +766,7 @@ class EventoViewSet(viewsets.ModelViewSet):
             writer = csv.writer(response)
             writer.writerow(['Participante', 'Email', 'Tipo', 'Atividades Ministradas'])
             for inscricao in inscricoes:
-                atividades = ', '.join([a.titulo for a in inscricao.evento.atividades.filter(responsavel=inscricao.participante)])
+                atividades = ', '.join(atividades_por_responsavel.get(inscricao.participante_id, []))
                 writer.writerow([
                     inscricao.participante.username,
                     inscricao.participante.email,
@@ -540,11 +775,89 @@ class EventoViewSet(viewsets.ModelViewSet):
                 ])
             return response
         else:
-            serializer = RelatorioParticipacaoSerializer(inscricoes, many=True)
+            serializer = RelatorioParticipacaoSerializer(inscricoes, many=True, context={'atividades_por_responsavel': atividades_por_responsavel})
             return Response(serializer.data)
 
+    @action(detail=True, methods=['get', 'post'], permission_classes=[IsOrganizadorDoEvento])
+    def checkin(self, request, pk=None):
+        """
+        Check-in na entrada do evento, pensado para leitores que trabalham offline.
+
+        GET: Lista de ingressos válidos (código assinado, participante, status e check-in),
+        para conferência local dos códigos. Em cache pela versão do evento; responde 304
+        ao If-None-Match com o ETag da última lista baixada.
+        POST: Aplica em uma transação os check-ins acumulados pelo leitor. Reenviar o
+        mesmo lote é seguro (idempotente).
+
+        Parâmetros:
+        - pk: ID do evento
+        - POST body: {'checkins': [{'codigo': str, 'horario': ISO 8601 (opcional)}]}
+
+        Retorno GET: {'evento', 'gerado_em', 'ingressos': [...]}
+        Retorno POST: {'registrados': int, 'ja_registrados': int, 'invalidos': [codigos]}
+        """
+        evento = self.get_object()
+        if request.method == 'POST':
+            checkins = request.data.get('checkins') if isinstance(request.data, dict) else None
+            try:
+                resultado = registrar_checkins(evento.pk, checkins)
+            except ErroCheckin as exc:
+                return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+            return Response(resultado)
+
+        versao, dados = roster_evento(evento.pk)
+        etag = f'"checkin-{evento.pk}-{versao}"'
+        response = HttpResponse(status=status.HTTP_304_NOT_MODIFIED) if etag_confere(request, etag) else Response(dados)
+        response['ETag'] = etag
+        response['Cache-Control'] = 'private, no-cache'
+        return response
+
+    @action(detail=True, methods=['get'])
+    def snapshot(self, request, pk=None):
+        """
+        Evento completo para o app e uso offline: dados do evento, atividades e resumo
+        dos responsáveis em um JSON compacto comprimido com gzip.
+
+        O artefato é pré-gerado e refeito em segundo plano quando o evento muda; todos
+        os clientes recebem os mesmos bytes, com ETag (304) e Range (downloads retomáveis).
+
+        Parâmetros:
+        - pk: ID do evento
+
+        Retorno: JSON {'formato', 'evento', 'atividades', 'responsaveis'} (Content-Encoding: gzip)
+        """
+        artefato = obter_snapshot(int(pk)) if str(pk).isdigit() else None
+        if artefato is None:
+            raise Http404
+        conteudo, etag = artefato['conteudo'], artefato['etag']
+        if 'gzip' not in codificacoes_aceitas(request.META.get('HTTP_ACCEPT_ENCODING', '')):
+            conteudo, etag = gzip.decompress(conteudo), etag[:-1] + '-identity"'  # outra representação, outro ETag
+        response = _resposta_bytes(request, conteudo, etag, 'application/json')
+        if etag == artefato['etag']:
+            response['Content-Encoding'] = 'gzip'
+        response['Vary'] = 'Accept-Encoding'
+        response['Cache-Control'] = 'public, max-age=60'
+        return response
+
+    @action(detail=True, methods=['get'])
+    def similares(self, request, pk=None):
+        """
+        Eventos em que os inscritos deste evento também se inscreveram.
+
+        As recomendações são pré-calculadas por co-inscrição (python manage.py
+        atualizar_recomendacoes); a leitura é uma única consulta indexada.
+
+        Parâmetros:
+        - pk: ID do evento
+
+        Retorno: Lista de {'id', 'nome', 'local', 'data_inicio', 'pontuacao', 'em_comum'}, do mais parecido ao menos
+        """
+        evento = self.get_object()  # 404 para IDs inválidos, inexistentes ou excluídos
+        serializer = EventoSimilarSerializer(similares_do_evento(evento.pk), many=True)
+        return Response(serializer.data)
+
 @method_decorator(cache_page(60 * 15), name='list')
-class AtividadeViewSet(viewsets.ModelViewSet):
+class AtividadeViewSet(ObjetoEmLoteMixin, viewsets.ModelViewSet):
     """
     ViewSet para gerenciamento de atividades.
 
@@ -564,9 +877,13 @@ class AtividadeViewSet(viewsets.ModelViewSet):
 
     Códigos de resposta: 200, 201, 400, 401, 403, 404
     """
-    queryset = Atividade.objects.all()
+    queryset = Atividade.objects.filter(evento__deleted__isnull=True).select_related('responsavel')  # sem as de eventos excluídos; responsavel_nome sem N+1
     serializer_class = AtividadeSerializer
     permission_classes = [IsResponsavelOrReadOnly]  # Leitura pública, escrita autenticada
+    throttle_scope = {'list': 'leitura', 'retrieve': 'leitura'}
+    orcamento_consultas = {  # core.consultas
+        'list': 4, 'retrieve': 3, 'create': 5, 'update': 5, 'partial_update': 5, 'destroy': 6, 'responsavel': 4,
+    }
 
     # Filtros Avançados (PDF 06 + Enunciado)
     filter_backends = [DjangoFilterBackend, filters.SearchFilter]
@@ -603,14 +920,35 @@ class AtividadeViewSet(viewsets.ModelViewSet):
             return Response(serializer.data)
         return Response({'status': 'Sem responsável'}, status=status.HTTP_404_NOT_FOUND)
 
-class InscricaoViewSet(viewsets.ModelViewSet):
+class InscricaoFilter(django_filters.FilterSet):
+    """
+    ?status= e ?janela= das inscrições. As janelas comparam as datas do evento com
+    o momento atual (índices parciais evento_ativo_inicio_idx/evento_ativo_fim_idx),
+    consideram só eventos ativos e ordenam pela data mais relevante de cada uma.
+    """
+    JANELAS = (('proximos', 'Próximos'), ('em_andamento', 'Em andamento'), ('passados', 'Passados'))
+    janela = django_filters.ChoiceFilter(choices=JANELAS, method='filtrar_janela')
+
+    class Meta:
+        model = Inscricao
+        fields = ['status', 'janela']
+
+    def filtrar_janela(self, queryset, name, value):
+        agora = timezone.now()
+        if value == 'proximos':
+            return queryset.filter(evento__data_inicio__gt=agora).order_by('evento__data_inicio', 'pk')
+        if value == 'em_andamento':
+            return queryset.filter(evento__data_inicio__lte=agora, evento__data_fim__gt=agora).order_by('evento__data_fim', 'pk')
+        return queryset.filter(evento__data_fim__lte=agora).order_by('-evento__data_fim', '-pk')
+
+class InscricaoViewSet(ObjetoEmLoteMixin, viewsets.ModelViewSet):
     """
     ViewSet para gerenciamento de inscrições.
 
     Usuários podem gerenciar suas próprias inscrições. Admins veem todas.
 
     Métodos suportados:
-    - list: Lista inscrições do usuário (ou todas para admin) (GET /api/v1/inscricoes/)
+    - list: Lista inscrições do usuário (ou todas para admin), com resumo do evento e totais por status (GET /api/v1/inscricoes/)
     - create: Cria inscrição (POST /api/v1/inscricoes/) - Participante atual
     - retrieve: Detalhes da inscrição (GET /api/v1/inscricoes/{id}/)
     - update: Atualiza inscrição (PUT /api/v1/inscricoes/{id}/)
@@ -622,20 +960,313 @@ class InscricaoViewSet(viewsets.ModelViewSet):
     queryset = Inscricao.objects.all()
     serializer_class = InscricaoSerializer
     permission_classes = [permissions.IsAuthenticated]
+    throttle_scope = {'create': 'inscricao'}
+    orcamento_consultas = {  # core.consultas
+        'list': 4, 'retrieve': 3, 'create': 6, 'update': 7, 'partial_update': 7, 'destroy': 5,
+    }
     filter_backends = [DjangoFilterBackend]
-    filterset_fields = ['status']
+    filterset_class = InscricaoFilter  # ?status= e ?janela=proximos|em_andamento|passados
 
     def get_queryset(self):
         user = self.request.user
+        inscricoes = Inscricao.objects.filter(evento__deleted__isnull=True).select_related('participante', 'evento')  # sem eventos excluídos; nomes do serializer sem N+1
         if user.is_staff:
-            return Inscricao.objects.all()
-        return Inscricao.objects.filter(participante=user)
+            return inscricoes
+        return inscricoes.filter(participante=user)
+
+    def list(self, request, *args, **kwargs):
+        """
+        Inscrições do usuário com o resumo de cada evento, para a tela "meus eventos".
+
+        Número fixo de consultas: a página (inscrição, participante e evento num JOIN),
+        a contagem da paginação e os totais por status.
+
+        Parâmetros:
+        - janela: 'proximos', 'em_andamento' ou 'passados' (opcional)
+        - status: filtra a lista (opcional)
+
+        Retorno: Página de inscrições com 'evento_resumo', mais 'contagem_status' com os
+        totais por status na janela (ignora ?status=, para as abas da tela)
+        """
+        response = super().list(request, *args, **kwargs)
+        filtros = request.query_params.copy()
+        filtros.pop('status', None)
+        totais = dict(
+            InscricaoFilter(filtros, queryset=self.get_queryset(), request=request).qs
+            .order_by().values_list('status').annotate(total=Count('pk'))
+        )
+        if isinstance(response.data, dict):
+            response.data['contagem_status'] = {codigo: totais.get(codigo, 0) for codigo, _ in Inscricao.STATUS_CHOICES}
+        return response
 
     def perform_create(self, serializer):
         serializer.save(participante=self.request.user)
 
+class EventoArquivadoViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Consulta de eventos arquivados (somente leitura).
+
+    Eventos encerrados há mais que ARQUIVAMENTO_RETENCAO_DIAS saem das tabelas ativas
+    (python manage.py arquivar_eventos) e continuam disponíveis aqui, com suas
+    atividades e o total de inscritos.
+
+    Métodos suportados:
+    - list: Lista eventos arquivados (GET /api/eventos-arquivados/)
+    - retrieve: Detalhes do evento arquivado (GET /api/eventos-arquivados/{id}/)
+
+    Códigos de resposta: 200, 404
+    """
+    queryset = EventoArquivado.objects.annotate(total_inscritos=Count('inscricoes')).prefetch_related(
+        Prefetch('atividades', queryset=AtividadeArquivada.objects.select_related('responsavel'))
+    )
+    serializer_class = EventoArquivadoSerializer
+    permission_classes = [permissions.AllowAny]
+    throttle_scope = 'leitura'
+    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    search_fields = ['nome', 'local']
+    ordering_fields = ['data_inicio', 'nome']
+    filterset_fields = ['local']
+
+class LoteView(APIView):
+    """
+    Executa várias leituras da API em uma única requisição (POST /api/batch/).
+
+    Middleware e autenticação rodam uma vez para o lote inteiro; cada
+    sub-requisição reaproveita o usuário autenticado e conta no limite da
+    própria rota (um item recusado volta com status 429). URLs repetidas e
+    objetos repetidos entre URLs são buscados uma única vez.
+
+    Parâmetros no body:
+    - requisicoes: lista de caminhos GET da API (ex.: "/api/eventos/1/dashboard/")
+
+    Retorno: {'respostas': [{'url': str, 'status': int, 'dados': ...}]}, na ordem recebida
+    """
+    permission_classes = [permissions.AllowAny]  # cada rota aplica as próprias permissões
+    throttle_scope = 'leitura'
+    permite_em_lote = False
+
+    def post(self, request):
+        urls = request.data.get('requisicoes') if isinstance(request.data, dict) else None
+        if not isinstance(urls, list) or not all(isinstance(url, str) for url in urls):
+            return Response({'error': "Envie 'requisicoes' como uma lista de caminhos."}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            respostas = executar_lote(request, urls)
+        except ErroLote as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'respostas': respostas})
+
+def _resposta_bytes(request, conteudo, etag, content_type):
+    """
+    Resposta para um artefato pronto em memória: 304 com If-None-Match e 206 para
+    um único intervalo 'Range: bytes=' (ignorado se o If-Range não bater com o ETag).
+    """
+    if etag_confere(request, etag):
+        response = HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+        response['ETag'] = etag
+        return response
+    intervalo = re.fullmatch(r'bytes=(\d*)-(\d*)', request.META.get('HTTP_RANGE', '').strip())
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if intervalo and intervalo.group(0) != 'bytes=-' and (not if_range or if_range == etag):
+        total = len(conteudo)
+        inicio, fim = intervalo.groups()
+        if not inicio:  # sufixo: os últimos N bytes
+            inicio, fim = max(total - int(fim), 0), total - 1
+        else:
+            inicio, fim = int(inicio), min(int(fim), total - 1) if fim else total - 1
+        if inicio >= total or inicio > fim:
+            response = HttpResponse(status=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+            response['Content-Range'] = f'bytes */{total}'
+            return response
+        response = HttpResponse(conteudo[inicio:fim + 1], status=status.HTTP_206_PARTIAL_CONTENT, content_type=content_type)
+        response['Content-Range'] = f'bytes {inicio}-{fim}/{total}'
+    else:
+        response = HttpResponse(conteudo, content_type=content_type)
+    response['ETag'] = etag
+    response['Accept-Ranges'] = 'bytes'
+    return response
+
+def _resposta_ics(request, etag, feed, nome_arquivo, cache_control):
+    if etag_confere(request, etag):
+        response = HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        response = StreamingHttpResponse((parte.encode('utf-8') for parte in feed()), content_type='text/calendar; charset=utf-8')
+        response['Content-Disposition'] = f'inline; filename="{nome_arquivo}"'
+    response['ETag'] = etag
+    response['Cache-Control'] = cache_control
+    return response
+
+class CalendarioEventoView(APIView):
+    """
+    Feed iCalendar do evento e de todas as suas atividades (GET /api/eventos/{id}/calendar.ics).
+
+    Os blocos VEVENT ficam em cache pela versão do evento e o ETag é calculado sem
+    consultas ao banco: polls com If-None-Match recebem 304 sem tocar no banco.
+    """
+    permission_classes = [permissions.AllowAny]
+    throttle_scope = 'leitura'
+
+    def get(self, request, pk):
+        etag = calendario.etag_evento(pk)
+        if etag is None:
+            raise Http404
+        nome = None
+        if not etag_confere(request, etag):
+            nome = Evento.objects.filter(pk=pk).values_list('nome', flat=True).first()
+            if nome is None:
+                raise Http404
+        return _resposta_ics(request, etag, lambda: calendario.feed_evento(pk, nome), f'evento-{pk}.ics', 'public, max-age=300')
+
+class CalendarioParticipanteView(APIView):
+    """
+    Feed iCalendar com os eventos em que o usuário está inscrito (GET /api/participantes/me/calendar.ics).
+
+    Aceita a chave assinada de /api/participantes/me/calendario/ em '?chave=' além de Token/Sessão.
+    """
+    authentication_classes = [ChaveCalendarioAuthentication, TokenAuthentication, SessionAuthentication]
+    permission_classes = [permissions.IsAuthenticated]
+    throttle_scope = 'leitura'
+
+    def get(self, request):
+        participante_id = request.user.pk
+        etag = calendario.etag_participante(participante_id)
+        return _resposta_ics(request, etag, lambda: calendario.feed_participante(participante_id), 'minhas-inscricoes.ics', 'private, max-age=300')
+
+class EstatisticasInscricoesView(APIView):
+    """
+    Série temporal de inscrições (GET /api/estatisticas/inscricoes/), geral ou de um evento.
+
+    Calculada sobre a consolidação horária (InscricaoHora), sem varrer as inscrições:
+    qualquer intervalo custa uma consulta agregada sobre poucas linhas.
+
+    Parâmetros:
+    - evento: ID do evento (opcional; sem ele, todos os eventos - apenas staff)
+    - inicio, fim: data/data-hora ISO (padrão: últimos 30 dias)
+    - granularidade: 'hora', 'dia' (padrão), 'semana' ou 'mes'
+
+    Retorno: {'granularidade', 'inicio', 'fim', 'serie': [{'periodo', 'total', 'status': {...}, 'tipo': {...}}]}
+    """
+    permission_classes = [permissions.IsAuthenticated]  # staff, ou o organizador do evento pedido
+    throttle_scope = 'leitura'
+    MAX_DIAS_POR_HORA = 93  # séries horárias longas demais para um gráfico
+
+    def get(self, request):
+        granularidade = request.query_params.get('granularidade', 'dia')
+        if granularidade not in GRANULARIDADES:
+            return Response({'error': f"granularidade deve ser uma de: {', '.join(GRANULARIDADES)}."}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            fim = _parse_periodo(request.query_params.get('fim'), fim_do_dia=True) or timezone.now()
+            inicio = _parse_periodo(request.query_params.get('inicio')) or fim - timedelta(days=30)
+            evento_id = int(request.query_params['evento']) if request.query_params.get('evento') else None
+        except ValueError:
+            return Response({'error': 'Use datas ISO (AAAA-MM-DD ou AAAA-MM-DDTHH:MM) e um ID de evento numérico.'}, status=status.HTTP_400_BAD_REQUEST)
+        if not request.user.is_staff and (evento_id is None or not Evento.objects.filter(pk=evento_id, organizador=request.user).exists()):
+            raise PermissionDenied('Apenas staff ou o organizador do evento.')
+        if inicio >= fim or (granularidade == 'hora' and fim - inicio > timedelta(days=self.MAX_DIAS_POR_HORA)):
+            return Response({'error': f'Intervalo inválido (por hora, no máximo {self.MAX_DIAS_POR_HORA} dias).'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({
+            'granularidade': granularidade,
+            'inicio': inicio,
+            'fim': fim,
+            'serie': serie_inscricoes(inicio, fim, granularidade, evento_id),
+        })
+
+@require_safe
+def esquema_openapi(request):
+    """
+    Esquema OpenAPI (GET /api/schema/), no lugar do SpectacularAPIView.
+
+    Serve os bytes pré-gerados para a versão do código (core.esquema), em YAML ou
+    JSON (?format=json), já comprimidos com gzip quando aceito, com ETag (304) e Range.
+    """
+    formato = formato_pedido(request)
+    artefato = obter_esquema(formato)
+    comprimido = 'gzip' in codificacoes_aceitas(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+    if comprimido:
+        conteudo, etag = artefato['gzip'], artefato['etag'][:-1] + '-gzip"'  # outra representação, outro ETag
+    else:
+        conteudo, etag = artefato['conteudo'], artefato['etag']
+    response = _resposta_bytes(request, conteudo, etag, FORMATOS[formato])
+    if comprimido and response.status_code in (status.HTTP_200_OK, status.HTTP_206_PARTIAL_CONTENT):
+        response['Content-Encoding'] = 'gzip'
+    response['Vary'] = 'Accept, Accept-Encoding'
+    response['Cache-Control'] = 'public, max-age=300'
+    return response
+
+def _evento_sse(tipo, dados, versao=None):
+    linhas = f'id: {versao}\n' if versao is not None else ''
+    return f'{linhas}event: {tipo}\ndata: {json.dumps(dados, cls=DjangoJSONEncoder)}\n\n'
+
+async def dashboard_ao_vivo(request, pk):
+    """
+    Stream SSE do dashboard (GET /api/eventos/{id}/dashboard/stream/).
+
+    Envia um 'snapshot' com os dados completos e depois 'delta' com incrementos dos
+    contadores (inscrições e atividades) assim que são gravados. Todos os ouvintes do
+    evento no processo compartilham uma assinatura do pub/sub (core.tempo_real).
+    Requer servidor ASGI; sob WSGI envia apenas o snapshot e pede reconexão.
+    """
+    versao, dados = await sync_to_async(dados_dashboard)(pk)
+    if dados is None:
+        raise Http404
+    if not isinstance(request, ASGIRequest):  # WSGI: uma thread por conexão aberta seria caro demais
+        response = HttpResponse(f'retry: {INTERVALO_SSE * 1000}\n' + _evento_sse('snapshot', dados, versao), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        return response
+
+    hub = obter_hub()
+    canal = canal_evento(pk)
+
+    async def stream():
+        fila = hub.entrar(canal)  # assina antes do snapshot para não perder deltas
+        try:
+            versao_atual, dados_atual = await sync_to_async(dados_dashboard)(pk)
+            yield _evento_sse('snapshot', dados_atual, versao_atual)
+            while True:
+                try:
+                    mensagem = await asyncio.wait_for(fila.get(), timeout=INTERVALO_SSE)
+                except asyncio.TimeoutError:
+                    yield ': ping\n\n'  # mantém proxies e o EventSource conectados
+                    continue
+                if mensagem['tipo'] == 'resync':
+                    while not fila.empty():  # o snapshot novo cobre o que estiver na fila
+                        fila.get_nowait()
+                    versao_atual, dados_atual = await sync_to_async(dados_dashboard)(pk)
+                    yield _evento_sse('snapshot', dados_atual, versao_atual)
+                elif mensagem['versao'] > versao_atual:  # deltas anteriores já estão no snapshot
+                    yield _evento_sse('delta', mensagem['dados'], mensagem['versao'])
+        finally:
+            hub.sair(canal, fila)
+
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # nginx não deve acumular o stream
+    return response
+
 # Novas Views HTML (Frontend) - Adicionadas no final
-class EventosListView(ListView):
+class EventosCacheMixin:
+    """
+    Otimizações de cache para as listagens HTML de eventos.
+
+    - COUNT da paginação em cache por filtros + versão das listagens.
+    - Cada evento da página recebe 'versao_cache', a versão do card (inscrições e
+      atividades não a alteram), usada na chave do fragmento do card.
+    """
+    paginator_class = PaginatorContagemCache
+
+    def get_paginator(self, queryset, per_page, orphans=0, allow_empty_first_page=True, **kwargs):
+        filtros = sorted((chave, valor) for chave, valor in self.request.GET.items() if chave != self.page_kwarg)
+        kwargs['chave_contagem'] = f'{type(self).__name__}:{filtros}'
+        return super().get_paginator(queryset, per_page, orphans, allow_empty_first_page, **kwargs)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        eventos = context['object_list']
+        versoes = versoes_cards([evento.pk for evento in eventos])  # um único get_many
+        for evento in eventos:
+            evento.versao_cache = versoes[evento.pk]
+        return context
+
+class EventosListView(EventosCacheMixin, ListView):
     model = Evento
     template_name = 'index.html'  # Seu template atualizado com cards
     context_object_name = 'eventos'
@@ -662,12 +1293,13 @@ class EventosListView(ListView):
         context['page_title'] = 'Próximos Eventos'
         return context
 
+@cache_pagina_anonima(60 * 15, versao=lambda: versao_lista_eventos())
 def eventos_list(request):
-    """View para / e /eventos/ - lista HTML com filtros e paginação"""
+    """View para / e /eventos/ - lista HTML com filtros e paginação (página em cache para anônimos)"""
     view = EventosListView.as_view()
     return view(request)
 
-class BuscaEventosView(ListView):
+class BuscaEventosView(EventosCacheMixin, ListView):
     model = Evento
     template_name = 'busca_resultados.html'
     context_object_name = 'eventos'
@@ -688,12 +1320,13 @@ class BuscaEventosView(ListView):
         context = super().get_context_data(**kwargs)
         query = self.request.GET.get('q') or self.request.GET.get('search', '')
         context['query'] = query
-        context['resultados_count'] = self.object_list.count()
+        context['resultados_count'] = context['paginator'].count  # COUNT em cache (EventosCacheMixin)
         context['page_title'] = f'Resultados para "{query}" ({context["resultados_count"]} eventos)'
         return context
 
+@cache_pagina_anonima(60 * 15, versao=lambda: versao_lista_eventos())
 def busca_eventos(request):
-    """View para /busca/ - resultados com paginação"""
+    """View para /busca/ - resultados com paginação (página em cache para anônimos)"""
     view = BuscaEventosView.as_view()
     return view(request)
 
@@ -701,14 +1334,18 @@ class ContatoView(TemplateView):
     template_name = 'contato.html'
 
     def post(self, request, *args, **kwargs):
-        email = request.POST.get('email')
+        email = (request.POST.get('email') or '').strip()
         mensagem = request.POST.get('mensagem')
+        try:
+            validate_email(email)  # vai no Reply-To: sem quebras de linha nem endereços inválidos
+        except ValidationError:
+            email = ''
         if email and mensagem:
-            # TODO: Envie email real com django.core.mail.send_mail
-            # send_mail('Contato do Portal', f'De: {email}\n\n{mensagem}', 'no-reply@seuapp.com', ['admin@seuapp.com'])
+            # Enfileirado na caixa de saída; o SMTP fica fora da requisição (core.caixa_saida)
+            enfileirar_email('Contato do Portal', f'De: {email}\n\n{mensagem}', [settings.EMAIL_CONTATO], responder_para=email)
             messages.success(request, f'Mensagem de {email} enviada! Responderemos em breve.')
         else:
-            messages.error(request, 'Preencha email e mensagem.')
+            messages.error(request, 'Preencha um email válido e a mensagem.')
         return redirect('contato')  # Redireciona para si mesmo com messages
 
     def get_context_data(self, **kwargs):
@@ -725,8 +1362,13 @@ class EventoDetailView(DetailView):
     template_name = 'evento_detalhes.html'
     context_object_name = 'evento'
 
-    def get_queryset(self):
-        return super().get_queryset().prefetch_related('atividades')
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        # Atividades são carregadas dentro do fragmento em cache (só consultadas em cache frio)
+        context['versao_cache'] = versao_evento(self.object.pk)
+        context['similares'] = similares_do_evento(self.object.pk)  # pré-calculados; consultados só com o fragmento frio
+        return context
 
+@cache_pagina_anonima(60 * 15, versao=lambda pk: versao_evento(pk))
 def evento_detalhes(request, pk):
     return EventoDetailView.as_view()(request, pk=pk)
\ No newline at end of file
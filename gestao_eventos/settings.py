@@ -1,6 +1,8 @@
 import os
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
+
 from decouple import config, Csv # Para variáveis de ambiente
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -31,8 +33,14 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.RegistroRequisicaoMiddleware', # X-Request-ID e uma linha de log JSON por requisição (core.logs)
+    'core.middleware.DetectorConsultasMiddleware', # N+1 e orçamento de consultas por ação (DETECTOR_CONSULTAS)
     'corsheaders.middleware.CorsMiddleware', # Se necessário para CORS
     'django.middleware.security.SecurityMiddleware',
+    'whitenoise.middleware.WhiteNoiseMiddleware', # Serve estáticos pré-comprimidos (gzip/brotli) com cache imutável
+    'core.middleware.PaginasEstaticasMiddleware', # Páginas públicas exportadas em disco para anônimos (PAGINAS_ESTATICAS)
+    'core.middleware.CompressaoMiddleware', # Compressão gzip/brotli das respostas da API e do portal
+    'core.middleware.ReplicaMiddleware', # Leituras seguras nas réplicas; fixa no primário após escritas
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -61,11 +69,63 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'gestao_eventos.wsgi.application'
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# Banco de dados via variáveis de ambiente: DB_ENGINE=sqlite (padrão) ou postgres
+DB_ENGINE = config('DB_ENGINE', default='sqlite')
+
+if DB_ENGINE == 'postgres':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': config('DB_NAME', default='gestao_eventos'),
+            'USER': config('DB_USER', default='postgres'),
+            'PASSWORD': config('DB_PASSWORD', default=''),
+            'HOST': config('DB_HOST', default='localhost'),
+            'PORT': config('DB_PORT', default='5432'),
+            'CONN_MAX_AGE': config('DB_CONN_MAX_AGE', default=60, cast=int), # Conexões persistentes entre requisições
+            'CONN_HEALTH_CHECKS': True, # Descarta conexões persistentes que caíram antes de reutilizá-las
+            'OPTIONS': {'connect_timeout': config('DB_CONNECT_TIMEOUT', default=5, cast=int)},
+        }
+    }
+    if config('DB_POOL', default=False, cast=bool): # Pool nativo do Django (exige psycopg 3 com o extra [pool])
+        DATABASES['default']['CONN_MAX_AGE'] = 0 # O pool é incompatível com conexões persistentes
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'min_size': config('DB_POOL_MIN', default=2, cast=int),
+            'max_size': config('DB_POOL_MAX', default=10, cast=int),
+            'timeout': config('DB_POOL_TIMEOUT', default=10, cast=int),
+        }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': config('DB_NAME', default=str(BASE_DIR / 'db.sqlite3')),
+            'CONN_MAX_AGE': config('DB_CONN_MAX_AGE', default=60, cast=int),
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': { # Espera pelo lock: só o busy_timeout de SQLITE_PRAGMAS (sobrescreveria o 'timeout' daqui)
+                'transaction_mode': 'IMMEDIATE', # Pega o lock de escrita no BEGIN: evita falhas ao promover leitura para escrita
+            },
+        }
     }
+
+# Réplicas de leitura (core.routers.ReplicaRouter): arquivos SQLite ou hosts Postgres separados por vírgula
+DB_REPLICAS = config('DB_REPLICAS', default='', cast=Csv())
+for indice, replica in enumerate(DB_REPLICAS, start=1):
+    DATABASES[f'replica_{indice}'] = {
+        **DATABASES['default'],
+        'HOST' if DB_ENGINE == 'postgres' else 'NAME': replica,
+        'OPTIONS': dict(DATABASES['default']['OPTIONS']),
+        'TEST': {'MIRROR': 'default'}, # Nos testes a réplica aponta para o banco de teste do primário
+    }
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+REPLICA_JANELA_FIXACAO = config('REPLICA_JANELA_FIXACAO', default=10, cast=int) # Segundos no primário após uma escrita
+
+# PRAGMAs aplicados a cada nova conexão SQLite (core.db.configurar_sqlite)
+SQLITE_PRAGMAS = { # Ordem importa: busy_timeout antes de trocar o journal_mode
+    'busy_timeout': config('SQLITE_BUSY_TIMEOUT', default=5000, cast=int), # ms de espera pelo lock em vez de falhar na hora
+    'journal_mode': 'WAL', # Leitores não bloqueiam o escritor (e vice-versa)
+    'synchronous': 'NORMAL', # Seguro com WAL; evita um fsync por commit
+    'mmap_size': config('SQLITE_MMAP_SIZE', default=128 * 1024 * 1024, cast=int), # bytes
+    'cache_size': -20000, # ~20 MB de cache de páginas
+    'temp_store': 'MEMORY',
 }
 
 AUTH_USER_MODEL = 'core.Participante'
@@ -86,6 +146,17 @@ STATICFILES_DIRS = [BASE_DIR / 'static']
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+STORAGES = { # Estáticos com nome hasheado e versões .gz/.br geradas no collectstatic
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage'},
+}
+WHITENOISE_MANIFEST_STRICT = False # Arquivo fora do manifesto cai no nome original em vez de erro 500
+
+# Compressão de respostas dinâmicas (core.middleware.CompressaoMiddleware)
+COMPRESSAO_TAMANHO_MINIMO = config('COMPRESSAO_TAMANHO_MINIMO', default=1024, cast=int) # bytes
+COMPRESSAO_NIVEL_GZIP = 6
+COMPRESSAO_NIVEL_BROTLI = 5 # Níveis altos de brotli são caros demais para respostas dinâmicas
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # --- CONFIGURAÇÃO DRF (Alinhada com PDF 06 e 07) ---
@@ -113,16 +184,31 @@ REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS': 'core.pagination.CustomPagination',
     'PAGE_SIZE': 20,
 
+    # Janela deslizante com estado O(1); cada requisição conta em um único escopo
     'DEFAULT_THROTTLE_CLASSES': [
-        'rest_framework.throttling.AnonRateThrottle',
-        'rest_framework.throttling.UserRateThrottle',
+        'core.throttling.JanelaDeslizanteThrottle',
     ],
     'DEFAULT_THROTTLE_RATES': {
         'anon': '100/hour',
         'user': '1000/hour',
+        'leitura': '3000/hour', # Leituras servidas do cache (listas, detalhes, dashboard, feeds)
+        'inscricao': '30/hour',
+        'registro': '10/hour',
     },
 }
 
+LOTE_MAX_REQUISICOES = 20 # Sub-requisições por chamada a /api/batch/
+CHECKIN_MAX_LOTE = 5000 # Check-ins por envio dos leitores da entrada
+
+# Detector de N+1 (core.consultas): opcional em produção; ligado em modo 'erro' nos testes (settings_testes)
+DETECTOR_CONSULTAS = config('DETECTOR_CONSULTAS', default=False, cast=bool)
+DETECTOR_CONSULTAS_MODO = config('DETECTOR_CONSULTAS_MODO', default='log') # 'log' registra um aviso; 'erro' levanta ConsultasExcessivas
+DETECTOR_CONSULTAS_REPETICOES = config('DETECTOR_CONSULTAS_REPETICOES', default=5, cast=int) # Mesmo formato N vezes = N+1
+
+# Esquema OpenAPI pré-gerado (python manage.py gerar_esquema no deploy)
+VERSAO_CODIGO = config('VERSAO_CODIGO', default='') # Ex.: commit do deploy; vazio = hash do código-fonte
+ESQUEMA_OPENAPI_DIR = BASE_DIR / 'cache_esquema'
+
 SPECTACULAR_SETTINGS = { # Configurações da documentação da API. Responsável pelo Swagger e Redoc
     'TITLE': 'API de Gestão de Eventos',
     'DESCRIPTION': 'API com Auth Token e Filtros Avançados.',
@@ -142,17 +228,72 @@ CACHES = { # Configuração de cache simples. Pode ser ajustada conforme necessi
     'default': {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
         'LOCATION': 'unique-snowflake',
-    }
+    },
+    # Estado que vale para todos os processos (limites da API, estatísticas de
+    # compressão), com incr atômico: Redis em CACHE_COMPARTILHADO_URL. Em
+    # desenvolvimento (um processo) cai para a memória local.
+    'compartilhado': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': config('CACHE_COMPARTILHADO_URL'),
+    } if config('CACHE_COMPARTILHADO_URL', default='') else {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'compartilhado',
+    },
 }
+if not DEBUG and not config('CACHE_COMPARTILHADO_URL', default=''):
+    raise ImproperlyConfigured('Defina CACHE_COMPARTILHADO_URL (Redis): sem ele cada worker teria seus próprios limites e contadores.')
+COMPRESSAO_INTERVALO_ESTATISTICAS = 60 # Segundos entre as publicações dos totais de cada processo
  
-LOGGING = { # Configuração básica de logging para registrar eventos importantes
+# Tarefas em segundo plano (ações em lote do admin)
+TAREFAS_SINCRONAS = config('TAREFAS_SINCRONAS', default=False, cast=bool) # True executa na própria requisição (testes)
+TAREFAS_MAX_WORKERS = config('TAREFAS_MAX_WORKERS', default=2, cast=int)
+TAREFAS_TAMANHO_LOTE = config('TAREFAS_TAMANHO_LOTE', default=500, cast=int) # Linhas por transação
+EXPORTACOES_DIR = BASE_DIR / 'exportacoes' # CSVs com emails: fora do MEDIA_ROOT, baixados só pelo admin
+
+# Dashboard ao vivo (SSE): backend de pub/sub entre os signals e os streams
+TEMPO_REAL_BACKEND = 'core.tempo_real.MemoriaPubSub' # Em vários processos, troque por um backend compartilhado (ex.: Redis)
+
+# Email: SMTP configurável por ambiente; envio sempre pela caixa de saída (core.caixa_saida)
+EMAIL_BACKEND = config('EMAIL_BACKEND', default='django.core.mail.backends.smtp.EmailBackend')
+EMAIL_HOST = config('EMAIL_HOST', default='localhost')
+EMAIL_PORT = config('EMAIL_PORT', default=25, cast=int)
+EMAIL_HOST_USER = config('EMAIL_HOST_USER', default='')
+EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD', default='')
+EMAIL_USE_TLS = config('EMAIL_USE_TLS', default=False, cast=bool)
+EMAIL_TIMEOUT = 10 # Segundos; evita travar o worker com um servidor lento
+DEFAULT_FROM_EMAIL = config('DEFAULT_FROM_EMAIL', default='no-reply@gestaoeventos.local')
+EMAIL_CONTATO = config('EMAIL_CONTATO', default='contato@gestaoeventos.local') # Recebe o formulário de contato
+EMAIL_TAMANHO_LOTE = 100 # Mensagens por conexão SMTP
+EMAIL_MAX_POR_SEGUNDO = config('EMAIL_MAX_POR_SEGUNDO', default=10, cast=int) # Limite de taxa do envio
+EMAIL_MAX_TENTATIVAS = 5 # Depois disso a mensagem fica como 'falhou'
+
+# Arquivamento de eventos encerrados (python manage.py arquivar_eventos)
+ARQUIVAMENTO_RETENCAO_DIAS = config('ARQUIVAMENTO_RETENCAO_DIAS', default=365, cast=int) # Dias após data_fim
+ARQUIVAMENTO_TAMANHO_LOTE = config('ARQUIVAMENTO_TAMANHO_LOTE', default=50, cast=int) # Eventos por transação
+
+RECOMENDACOES_TOP_K = 5 # Eventos similares guardados por evento (python manage.py atualizar_recomendacoes)
+
+# Páginas públicas exportadas como HTML estático (python manage.py exportar_paginas; core.paginas_estaticas)
+PAGINAS_ESTATICAS = config('PAGINAS_ESTATICAS', default=False, cast=bool) # Reexporta nas alterações e serve do disco
+PAGINAS_ESTATICAS_DIR = BASE_DIR / 'paginas_estaticas' # Também pode ser servido direto pelo nginx/CDN
+PAGINAS_ESTATICAS_MAX_AGE = 60 # Segundos de cache no navegador/CDN
+
+# Logging em JSON pela fila (core.logs): as requisições só enfileiram; uma thread grava com rotação
+LOG_AMOSTRAGEM_REQUISICOES = config('LOG_AMOSTRAGEM_REQUISICOES', default=1.0, cast=float) # Fração das requisições de sucesso registradas
+LOG_REQUISICAO_LENTA_MS = config('LOG_REQUISICAO_LENTA_MS', default=1000, cast=int) # Acima disso (e erros) sempre registradas
+
+LOGGING = { # Registros em JSON com request_id, gravados fora do caminho da requisição
     'version': 1,
     'disable_existing_loggers': False,
+    'filters': {
+        'requisicao': {'()': 'core.logs.FiltroRequisicao'},
+    },
     'handlers': {
         'file': {
             'level': 'INFO',
-            'class': 'logging.FileHandler',
-            'filename': BASE_DIR / 'logs/django.log',
+            'class': 'core.logs.FilaHandler',
+            'filename': BASE_DIR / 'logs/django.log', # Rotação externa, pelo logrotate (core.logs)
+            'filters': ['requisicao'],
         },
     },
     'loggers': {
@@ -161,5 +302,10 @@ LOGGING = { # Configuração básica de logging para registrar eventos important
             'level': 'INFO',
             'propagate': True,
         },
+        'core': { # Inclui 'core.requisicoes' (uma linha por requisição) e os avisos do detector de consultas
+            'handlers': ['file'],
+            'level': 'INFO',
+            'propagate': True,
+        },
     },
 }
\ No newline at end of file
@@ -0,0 +1,8 @@
+from .settings import * # noqa: F401,F403
+
+# Testes (manage.py test): o detector de N+1 falha a requisição em vez de só registrar
+DETECTOR_CONSULTAS = True
+DETECTOR_CONSULTAS_MODO = 'erro'
+
+# Cache compartilhado em memória, mesmo com CACHE_COMPARTILHADO_URL: cada execução dos testes isolada
+CACHES = dict(CACHES, compartilhado={'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'compartilhado'}) # noqa: F405
@@ -34,7 +34,7 @@ from django.conf import settings
 from django.conf.urls.static import static
 from drf_spectacular.views import SpectacularAPIView, SpectacularRedocView, SpectacularSwaggerView
 from rest_framework.authtoken.views import obtain_auth_token
-from core.views import eventos_list, busca_eventos, contato, evento_detalhes
+from core.views import eventos_list, busca_eventos, contato, evento_detalhes, esquema_openapi
 
 urlpatterns = [
     path('', eventos_list, name='home'),
@@ -52,7 +52,7 @@ urlpatterns = [
     path('api-auth/', include('rest_framework.urls')),
     
     # Documentação
-    path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
+    path('api/schema/', esquema_openapi, name='schema'),  # Pré-gerado por versão do código (core.esquema)
     path('api/docs/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
 ]
 
@@ -6,7 +6,8 @@ import sys
 
 def main():
     """Run administrative tasks."""
-    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'gestao_eventos.settings')
+    padrao = 'gestao_eventos.settings_testes' if sys.argv[1:2] == ['test'] else 'gestao_eventos.settings'
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', padrao)
     try:
         from django.core.management import execute_from_command_line
     except ImportError as exc: